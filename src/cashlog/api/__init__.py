@@ -3,6 +3,8 @@ from fastapi import FastAPI
 from fastapi_pagination import add_pagination
 from cashlog.api.todo import router as todo_router
 from cashlog.api.transaction import router as transaction_router
+from cashlog.api.search import router as search_router
+from cashlog.api.report import router as report_router
 
 
 def create_app():
@@ -18,6 +20,8 @@ def create_app():
     # 注册路由
     app.include_router(todo_router, prefix="/api")
     app.include_router(transaction_router, prefix="/api")
+    app.include_router(search_router, prefix="/api")
+    app.include_router(report_router, prefix="/api")
     
     # 添加分页支持
     add_pagination(app)
@@ -0,0 +1,61 @@
+"""报表API路由"""
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from cashlog.models.db import get_db
+from cashlog.services.report_cache import report_cache
+from cashlog.services.report_service import ReportService
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["报表"],
+    responses={404: {"description": "Not found"}},
+)
+
+# 文本格式对应的响应类型
+MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "markdown": "text/markdown; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@router.get("/series", summary="收支趋势", description="生成最近N个周期的收支时间序列，全部周期通过一次查询汇总")
+def get_series(
+    time_dimension: str = Query("monthly", pattern="^(daily|weekly|monthly|quarterly)$", description="时间维度：daily, weekly, monthly, quarterly"),
+    periods: int = Query(12, ge=1, le=400, description="周期数量"),
+    until: Optional[str] = Query(None, description="截止日期，格式：YYYY-MM-DD，默认截止到当前周期"),
+    categories: Optional[str] = Query(None, description="分类筛选，多个分类用逗号分隔"),
+    by_category: bool = Query(False, description="是否按分类拆分每个周期的收支"),
+    format: str = Query("json", pattern="^(json|text|markdown|csv)$", description="输出格式：json, text, markdown, csv"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    收支趋势
+
+    - **time_dimension**: 时间维度，各周期划分与报表及其环比一致
+    - **periods**: 周期数量，结果按时间从早到晚排列
+    - **categories**: 分类筛选，多个分类用逗号分隔
+    - **by_category**: 是否按分类拆分
+    - **format**: json 返回结构化数据，其余格式返回文本
+    """
+    category_list = [c.strip() for c in categories.split(",") if c.strip()] if categories else None
+    try:
+        series_data = ReportService.generate_series(db, time_dimension, periods, category_list, by_category, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "json":
+        return series_data
+    return PlainTextResponse(ReportService.format_series(series_data, format), media_type=MEDIA_TYPES[format])
+
+
+@router.get("/cache", summary="报表缓存统计", description="查看API服务进程的报表缓存命中统计和各层条目数")
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    报表缓存统计
+
+    启用磁盘层时命中统计为各进程的累计值（shared为true），否则为API服务进程自身的统计。
+    """
+    return report_cache.stats()
@@ -0,0 +1,49 @@
+"""全文检索API路由"""
+from typing import Optional
+from fastapi import APIRouter, Query, Depends, HTTPException
+from sqlalchemy.orm import Session
+from fastapi_pagination import Page, Params
+from cashlog.models.db import get_db
+from cashlog.services.search_service import SearchService
+from cashlog.models.schemas import SearchResult
+
+router = APIRouter(
+    prefix="/search",
+    tags=["全文检索"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/", response_model=Page[SearchResult], summary="全文检索", description="按关键词检索交易备注、分类和待办事项内容，按相关度排序")
+def search(
+    q: str = Query(..., min_length=1, description="搜索关键词，多个关键词用空格分隔"),
+    kind: Optional[str] = Query(None, pattern="^(transaction|todo)$", description="记录类型：transaction（交易）, todo（待办事项），默认全部"),
+    params: Params = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    全文检索
+
+    - **q**: 搜索关键词，多个关键词需同时命中
+    - **kind**: 记录类型，transaction 或 todo，默认同时检索两者
+    """
+    try:
+        results, total = SearchService.search(
+            db, q, kind, limit=params.size, offset=(params.page - 1) * params.size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = [
+        SearchResult(
+            kind=result["kind"],
+            id=result["id"],
+            category=result["record"].category,
+            text=result["record"].notes if result["kind"] == "transaction" else result["record"].content,
+            snippet=result["snippet"],
+            score=result["score"],
+            created_at=result["record"].created_at,
+        )
+        for result in results
+    ]
+    return Page.create(items, params, total=total)
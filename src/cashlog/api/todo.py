@@ -1,11 +1,12 @@
 """待办事项API路由"""
-from typing import Optional
+from typing import Optional, Union
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.orm import Session
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.sqlalchemy import paginate
 from cashlog.models.db import get_db
 from cashlog.services.todo_service import TodoService
-from cashlog.models.schemas import Todo
+from cashlog.models.schemas import Todo, CursorPage
 
 router = APIRouter(
     prefix="/todos",
@@ -14,13 +15,17 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=Page[Todo], summary="查询待办事项列表", description="根据条件查询待办事项列表，支持分页")
+@router.get("/", response_model=Union[Page[Todo], CursorPage[Todo]], summary="查询待办事项列表", description="根据条件查询待办事项列表，支持页码分页和游标分页")
 def get_todos(
     status: Optional[str] = Query(None, description="待办状态，可选值：todo, doing, done"),
     category: Optional[str] = Query(None, description="待办分类"),
     deadline_before: Optional[str] = Query(None, description="截止时间之前，格式：YYYY-MM-DD"),
     deadline_after: Optional[str] = Query(None, description="截止时间之后，格式：YYYY-MM-DD"),
     tags: Optional[str] = Query(None, description="标签，多个标签用逗号分隔"),
+    tag_match: Optional[str] = Query(None, pattern="^(any|all)$", description="标签匹配方式：any（包含任一标签，默认）, all（包含全部标签）"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="游标分页：每页条数，指定后启用游标分页"),
+    params: Params = Depends(),
     db: Session = Depends(get_db)
 ):
     """
@@ -31,6 +36,8 @@ def get_todos(
     - **deadline_before**: 截止时间之前，格式：YYYY-MM-DD
     - **deadline_after**: 截止时间之后，格式：YYYY-MM-DD
     - **tags**: 标签，多个标签用逗号分隔
+    - **tag_match**: 标签匹配方式，any（包含任一标签，默认）或 all（包含全部标签）
+    - **cursor** / **limit**: 指定任一参数时使用游标分页，返回next_cursor用于获取下一页
     """
     filters = {}
     if status:
@@ -43,9 +50,21 @@ def get_todos(
         filters["deadline_after"] = deadline_after
     if tags:
         filters["tags"] = tags
+    if tag_match:
+        filters["tag_match"] = tag_match
     
-    todos = TodoService.get_todos(db, **filters)
-    return paginate(todos)
+    # 游标分页：按(created_at, id)定位，深分页无需扫描OFFSET
+    if cursor is not None or limit is not None:
+        page_limit = limit or params.size
+        try:
+            items, next_cursor = TodoService.get_todos_page(db, cursor, page_limit, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return CursorPage[Todo](items=items, limit=page_limit, next_cursor=next_cursor)
+
+    # 在数据库端使用LIMIT/OFFSET分页，总数通过不带排序的COUNT查询获取
+    query = TodoService.get_todos_query(db, **filters)
+    return paginate(db, query, params, subquery_count=False)
 
 
 @router.get("/{todo_id}", response_model=Todo, summary="根据ID查询待办事项", description="根据ID查询单个待办事项的详细信息")
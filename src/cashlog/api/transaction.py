@@ -1,11 +1,12 @@
 """交易账单API路由"""
-from typing import Optional
+from typing import Optional, Union
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.orm import Session
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.sqlalchemy import paginate
 from cashlog.models.db import get_db
 from cashlog.services.transaction_service import TransactionService
-from cashlog.models.schemas import Transaction
+from cashlog.models.schemas import Transaction, CursorPage
 
 router = APIRouter(
     prefix="/transactions",
@@ -14,12 +15,16 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=Page[Transaction], summary="查询交易账单列表", description="根据条件查询交易账单列表，支持分页")
+@router.get("/", response_model=Union[Page[Transaction], CursorPage[Transaction]], summary="查询交易账单列表", description="根据条件查询交易账单列表，支持页码分页和游标分页")
 def get_transactions(
     month: Optional[str] = Query(None, description="交易月份，格式：YYYY-MM"),
     category: Optional[str] = Query(None, description="交易分类"),
     tags: Optional[str] = Query(None, description="标签，多个标签用逗号分隔"),
+    tag_match: Optional[str] = Query(None, pattern="^(any|all)$", description="标签匹配方式：any（包含任一标签，默认）, all（包含全部标签）"),
     transaction_type: Optional[str] = Query(None, description="交易类型，可选值：income（收入）, expense（支出）"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="游标分页：每页条数，指定后启用游标分页"),
+    params: Params = Depends(),
     db: Session = Depends(get_db)
 ):
     """
@@ -28,7 +33,9 @@ def get_transactions(
     - **month**: 交易月份，格式：YYYY-MM
     - **category**: 交易分类
     - **tags**: 标签，多个标签用逗号分隔
+    - **tag_match**: 标签匹配方式，any（包含任一标签，默认）或 all（包含全部标签）
     - **transaction_type**: 交易类型，可选值：income（收入）, expense（支出）
+    - **cursor** / **limit**: 指定任一参数时使用游标分页，返回next_cursor用于获取下一页
     """
     filters = {}
     if month:
@@ -37,11 +44,23 @@ def get_transactions(
         filters["category"] = category
     if tags:
         filters["tags"] = tags
+    if tag_match:
+        filters["tag_match"] = tag_match
     if transaction_type:
         filters["transaction_type"] = transaction_type
     
-    transactions = TransactionService.get_transactions(db, **filters)
-    return paginate(transactions)
+    # 游标分页：按(created_at, id)定位，深分页无需扫描OFFSET
+    if cursor is not None or limit is not None:
+        page_limit = limit or params.size
+        try:
+            items, next_cursor = TransactionService.get_transactions_page(db, cursor, page_limit, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return CursorPage[Transaction](items=items, limit=page_limit, next_cursor=next_cursor)
+
+    # 在数据库端使用LIMIT/OFFSET分页，总数通过不带排序的COUNT查询获取
+    query = TransactionService.get_transactions_query(db, **filters)
+    return paginate(db, query, params, subquery_count=False)
 
 
 @router.get("/{transaction_id}", response_model=Transaction, summary="根据ID查询交易账单", description="根据ID查询单个交易账单的详细信息")
@@ -1,7 +1,20 @@
-"""命令行接口包"""
-from cashlog.cli.main_cli import cli
-from cashlog.cli.transaction_cli import transaction
-from cashlog.cli.todo_cli import todo
-from cashlog.cli.report_cli import report
+"""命令行接口包
+
+命令组在首次访问时才导入，导入本包不会加载数据库和各服务模块。
+"""
+import importlib
+
+_EXPORTS = {
+    "cli": "cashlog.cli.main_cli",
+    "transaction": "cashlog.cli.transaction_cli",
+    "todo": "cashlog.cli.todo_cli",
+    "report": "cashlog.cli.report_cli",
+}
 
 __all__ = ["cli", "transaction", "todo", "report"]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,9 +2,13 @@
 import click
 import os
 from typing import Optional
-from cashlog.services.data_service import DataService
+from cashlog.services.data_service import COMPRESSION_FORMATS, DataService
+from cashlog.services.incremental_service import IncrementalBackupService
+from cashlog.services.stats_service import StatsService
+from cashlog.services.maintenance_service import DEFAULT_VACUUM_PAGES, MaintenanceService
+from cashlog.services.export_service import DEFAULT_ROW_GROUP_SIZE, EXPORT_FORMATS, EXPORT_TABLES, ExportService
 from cashlog.utils.formatter import Formatter
-from cashlog.models.db import init_db
+from cashlog.models.db import DB_PATH, get_db, init_db
 
 
 @click.group()
@@ -18,21 +22,63 @@ def data():
 
 
 @data.command()
-@click.option("-o", "--output", help="指定备份文件路径（含文件名，后缀.db）")
+@click.option("-o", "--output", help="指定备份文件路径（含文件名，后缀.db）；增量模式下为备份链目录")
 @click.option("-f", "--overwrite", is_flag=True, default=False, help="强制覆盖已有备份文件")
-def backup(output: Optional[str], overwrite: bool):
+@click.option("--pages-per-step", type=click.IntRange(min=1), help="每步复制的页数，默认读取配置 backup_pages_per_step")
+@click.option("--sleep-ms", type=click.IntRange(min=0), help="每步之间休眠的毫秒数，默认读取配置 backup_sleep_ms")
+@click.option("--compress", type=click.Choice(list(COMPRESSION_FORMATS)),
+              help="压缩备份文件，zstd需安装zstandard；压缩前先在目标目录生成未压缩的临时副本，"
+                   "目标目录需有约数据库大小加压缩后大小的可用空间")
+@click.option("--incremental", is_flag=True, default=False, help="增量备份：首次创建基础备份，之后只保存变更集")
+@click.option("--new-chain", is_flag=True, default=False, help="增量模式下丢弃已有备份链，重新创建基础备份")
+def backup(output: Optional[str], overwrite: bool, pages_per_step: Optional[int], sleep_ms: Optional[int],
+           compress: Optional[str], incremental: bool, new_chain: bool):
     """
     创建数据库备份
+
+    使用SQLite在线备份接口分批复制，备份期间可以继续记账；
+    通过 --pages-per-step 和 --sleep-ms 限制备份占用的I/O。
+    --incremental 模式下备份保存为备份链，每次只写入上次备份以来的变更，
+    用 data chain 查看恢复点，data restore -i 备份链目录 --until 时间 恢复到任意恢复点。
     
     示例:
     cashlog data backup                      # 使用默认路径备份到 ~/.cashlog16/backup_YYYYMMDD.db
     cashlog data backup -o ~/cashlog_backup.db  # 指定备份路径
     cashlog data backup -o ~/cashlog_backup.db -f  # 强制覆盖已存在的备份文件
+    cashlog data backup --pages-per-step 256 --sleep-ms 50  # 降低备份对其他进程的影响
+    cashlog data backup --compress gzip      # 备份到 backup_YYYYMMDD.db.gz
+    cashlog data backup --incremental        # 增量备份到 backups/chain 目录
     """
     init_db()  # 确保数据库已初始化
+
+    def report_progress(copied, total):
+        percent = copied / total if total else 1
+        click.echo(f"\r已复制 {copied}/{total} 页（{percent:.0%}）", nl=False, err=True)
     
     try:
-        backup_path = DataService.create_backup(output_path=output, overwrite=overwrite)
+        if incremental:
+            result = IncrementalBackupService.backup(chain_dir=output, new_chain=new_chain, compress=compress,
+                                                     pages_per_step=pages_per_step, sleep_ms=sleep_ms,
+                                                     progress=report_progress)
+            if result["kind"] is None:
+                Formatter.print_info(f"自上次备份以来没有变更，备份链: {result['chain_dir']}")
+                return
+            if result["kind"] == "base":
+                click.echo(err=True)
+                Formatter.print_success(f"\n✅ 已创建备份链的基础备份")
+            else:
+                Formatter.print_success(f"\n✅ 增量备份成功：{result['rows']} 行变更，{result['deleted']} 行删除")
+            backup_path = result["path"]
+            Formatter.print_info(f"   备份文件: [bold]{backup_path}[/bold]")
+            Formatter.print_info(f"   文件大小: {os.path.getsize(backup_path) / 1024:.2f} KB")
+            return
+
+        if new_chain:
+            raise ValueError("--new-chain 只能与 --incremental 一起使用")
+        backup_path = DataService.create_backup(output_path=output, overwrite=overwrite,
+                                                pages_per_step=pages_per_step, sleep_ms=sleep_ms,
+                                                progress=report_progress, compress=compress)
+        click.echo(err=True)
         Formatter.print_success(f"\n✅ 数据库备份成功")
         Formatter.print_info(f"   备份文件: [bold]{backup_path}[/bold]")
         
@@ -59,15 +105,21 @@ def backup(output: Optional[str], overwrite: bool):
 
 
 @data.command()
-@click.option("-i", "--input", required=True, help="指定备份文件路径（需为合法SQLite文件）")
+@click.option("-i", "--input", required=True, help="指定备份文件路径（需为合法SQLite文件）或增量备份链目录")
 @click.option("-b", "--backup-current", default=True, help="恢复前自动备份当前数据库")
 @click.option("-y", "--confirm", is_flag=True, default=False, help="跳过恢复二次确认")
-def restore(input: str, backup_current: bool, confirm: bool):
+@click.option("--until", help="增量备份链的恢复时间点，格式：YYYY-MM-DD[ HH:MM[:SS]]，默认恢复到最新")
+def restore(input: str, backup_current: bool, confirm: bool, until: Optional[str]):
     """
     从备份文件恢复数据库
+
+    gzip、xz、zstd压缩的备份会按文件头自动识别并解压。
+    恢复在一个事务内写入当前数据库，中途失败不会破坏现有数据，运行中的API服务无需重启即可读到恢复后的数据。
     
     示例:
     cashlog data restore -i ~/cashlog_backup.db             # 从指定备份文件恢复，恢复前自动备份当前数据
+    cashlog data restore -i ~/backup_20240101.db.xz         # 从压缩备份恢复
+    cashlog data restore -i data/backups/chain --until "2024-01-15 18:00"  # 重放增量备份链到指定时间点
     cashlog data restore -i ~/cashlog_backup.db -y           # 跳过确认直接恢复
     cashlog data restore -i ~/cashlog_backup.db -y -b False  # 跳过确认且不备份当前数据直接恢复
     """
@@ -88,15 +140,24 @@ def restore(input: str, backup_current: bool, confirm: bool):
             Formatter.print_info("恢复操作已取消")
             return  # 直接返回，不执行后续操作
     
+    def report_progress(copied, total):
+        percent = copied / total if total else 1
+        click.echo(f"\r已恢复 {copied}/{total} 页（{percent:.0%}）", nl=False, err=True)
+
     try:
         result = DataService.restore_backup(
             input_path=input_path,
             backup_current=backup_current,
-            confirm=confirm
+            confirm=confirm,
+            until=until,
+            progress=report_progress
         )
+        click.echo(err=True)
         
         Formatter.print_success(f"\n✅ 数据库恢复成功")
         Formatter.print_info(f"   恢复源: [bold]{result['restored_from']}[/bold]")
+        if result.get("restored_point"):
+            Formatter.print_info(f"   恢复点: {result['restored_point']}")
         
         if result['current_backup_path']:
             Formatter.print_info(f"   当前数据备份: [bold]{result['current_backup_path']}[/bold]")
@@ -107,9 +168,11 @@ def restore(input: str, backup_current: bool, confirm: bool):
         # 输出恢复后的表统计
         if result['after_stats'] and 'tables' in result['after_stats']:
             Formatter.print_info("   恢复后:")
+            estimated = set(result['after_stats'].get('estimated', []))
             for table, count in result['after_stats']['tables'].items():
                 if not table.startswith('sqlite_'):  # 跳过SQLite系统表
-                    Formatter.print_info(f"     - {table}: {count} 条记录")
+                    prefix = "约 " if table in estimated else ""
+                    Formatter.print_info(f"     - {table}: {prefix}{count} 条记录")
         else:
             Formatter.print_info("   无法获取表统计信息")
     
@@ -124,4 +187,237 @@ def restore(input: str, backup_current: bool, confirm: bool):
         raise click.ClickException(str(e))
     except Exception as e:
         Formatter.print_error(f"\n❌ 恢复失败: {str(e)}")
-        raise click.ClickException(str(e))
\ No newline at end of file
+        raise click.ClickException(str(e))
+
+
+@data.command()
+@click.option("-i", "--input", help="增量备份链目录，默认为数据目录下的 backups/chain")
+def chain(input: Optional[str]):
+    """
+    查看增量备份链的恢复点
+
+    示例:
+    cashlog data chain
+    cashlog data chain -i ~/cashlog_chain
+    """
+    try:
+        points = IncrementalBackupService.describe(input or IncrementalBackupService.default_chain_dir())
+        rows = [{
+            "kind": "基础备份" if point["kind"] == "base" else "变更集",
+            "created_at": point["created_at"],
+            "rows": "-" if point["rows"] is None else point["rows"],
+            "deleted": "-" if point["deleted"] is None else point["deleted"],
+            "size": "缺失" if point["size"] is None else f"{point['size'] / 1024:.2f} KB",
+            "file": point["file"],
+        } for point in points]
+        Formatter.print_table(rows, {
+            "kind": "类型", "created_at": "时间", "rows": "变更行数", "deleted": "删除行数", "size": "大小", "file": "文件",
+        })
+    except ValueError as e:
+        Formatter.print_error(f"\n❌ {str(e)}")
+        raise click.ClickException(str(e))
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 读取备份链失败: {str(e)}")
+        raise click.ClickException(str(e))
+
+
+@data.command()
+def info():
+    """
+    查看数据库运行信息
+
+    显示数据库文件位置、大小、当前性能档位以及实际生效的PRAGMA。
+    性能档位可通过环境变量 CASHLOG_DB_PROFILE 或配置文件中的 db_profile 设置，
+    可选值：safe、balanced、throughput，无效时改用 balanced。
+
+    示例:
+    cashlog data info
+    CASHLOG_DB_PROFILE=throughput cashlog data info
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        result = DataService.get_database_info()
+
+        Formatter.print_info(f"数据库文件: [bold]{result['db_path']}[/bold]")
+        Formatter.print_info(f"文件大小: {result['file_size'] / 1024:.2f} KB")
+        Formatter.print_info(f"性能档位: [bold]{result['profile']}[/bold]")
+        for name, value in result["pragmas"].items():
+            Formatter.print_info(f"   {name}: {value}")
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 获取数据库信息失败: {str(e)}")
+        raise click.ClickException(str(e))
+
+
+@data.command()
+@click.option("--exact", is_flag=True, default=False, help="执行COUNT(*)统计准确行数，大数据量时较慢")
+def stats(exact: bool):
+    """
+    查看各表行数和各表、索引占用的空间
+
+    行数默认为估算值（最大rowid或ANALYZE统计信息），不扫描表数据；
+    空间按dbstat统计的页大小汇总，便于找出数据库文件增长的来源。
+
+    示例:
+    cashlog data stats
+    cashlog data stats --exact
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        counts = StatsService.get_row_counts(str(DB_PATH), exact)
+        sizes = StatsService.get_object_sizes(str(DB_PATH))
+        estimated = set(counts.get("estimated", []))
+        rows = [{
+            "table": entry["table"],
+            "rows": "-" if entry["table"] not in counts.get("tables", {}) else
+                    f"{'≈' if entry['table'] in estimated else ''}{counts['tables'][entry['table']]}",
+            "table_size": f"{entry['table_bytes'] / 1024:.1f} KB",
+            "index_size": f"{entry['index_bytes'] / 1024:.1f} KB",
+        } for entry in StatsService.group_by_table(sizes["objects"])]
+        Formatter.print_table(rows, {"table": "表", "rows": "行数", "table_size": "表大小", "index_size": "索引大小"})
+
+        indexes = [{
+            "name": obj["name"], "table": obj["table"], "size": f"{obj['bytes'] / 1024:.1f} KB",
+        } for obj in sizes["objects"] if obj["type"] == "index"]
+        if indexes:
+            Formatter.print_table(indexes, {"name": "索引", "table": "所属表", "size": "大小"})
+
+        Formatter.print_info(f"文件大小: {sizes['file_size'] / 1024:.2f} KB，空闲页: {sizes['free_bytes'] / 1024:.2f} KB")
+        if estimated:
+            Formatter.print_info("≈ 表示估算行数，使用 --exact 统计准确行数")
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 获取数据库统计失败: {str(e)}")
+        raise click.ClickException(str(e))
+
+
+@data.command("rebuild-rollups")
+def rebuild_rollups():
+    """
+    重建按日分类汇总
+
+    汇总表由触发器随交易写入自动维护，报表按天读取汇总。
+    当怀疑汇总与交易明细不一致时（例如手工修改过数据库文件），可执行此命令全量重建。
+
+    示例:
+    cashlog data rebuild-rollups
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        row_count = DataService.rebuild_rollups()
+        Formatter.print_success(f"\n✅ 汇总重建完成，共 {row_count} 条按日分类汇总")
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 汇总重建失败: {str(e)}")
+        raise click.ClickException(str(e))
+
+
+@data.command()
+@click.option("--vacuum-pages", type=click.IntRange(min=0), default=DEFAULT_VACUUM_PAGES,
+              help=f"最多回收的空闲页数，0表示全部回收，默认为{DEFAULT_VACUUM_PAGES}")
+@click.option("--schedule", is_flag=True, help="计划任务模式：不等待锁，遇到其他连接写入时让出，仍然繁忙则跳过该步骤")
+@click.option("--enable-incremental-vacuum", is_flag=True,
+              help="为未启用增量回收的数据库执行一次完整VACUUM并切换为增量模式（会锁定数据库，不能与--schedule一起使用）")
+def optimize(vacuum_pages: int, schedule: bool, enable_incremental_vacuum: bool):
+    """
+    维护数据库：更新统计信息、回收空闲页、截断WAL并检查完整性
+
+    依次执行 ANALYZE/PRAGMA optimize、incremental_vacuum、wal_checkpoint(TRUNCATE) 和 quick_check，
+    并报告每一步的耗时和回收的空间。适合通过cron等定时执行，定时执行时建议加上 --schedule。
+
+    示例:
+    cashlog data optimize
+    cashlog data optimize --vacuum-pages 0  # 回收全部空闲页
+    cashlog data optimize --schedule  # 不阻塞API服务的写入
+    cashlog data optimize --enable-incremental-vacuum  # 旧数据库首次启用增量回收
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        results = MaintenanceService.optimize(str(DB_PATH), vacuum_pages=vacuum_pages, schedule=schedule,
+                                              enable_incremental_vacuum=enable_incremental_vacuum)
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 数据库维护失败: {str(e)}")
+        raise click.ClickException(str(e))
+
+    status_labels = {"ok": "完成", "skipped": "跳过", "busy": "繁忙", "error": "失败"}
+    rows = [{
+        "step": result["step"],
+        "status": status_labels.get(result["status"], result["status"]),
+        "seconds": f"{result['seconds']:.3f}s",
+        "reclaimed": f"{result['reclaimed'] / 1024:.1f} KB",
+        "detail": result["detail"],
+    } for result in results]
+    Formatter.print_table(rows, {"step": "步骤", "status": "状态", "seconds": "耗时", "reclaimed": "回收", "detail": "说明"})
+
+    total = sum(result["reclaimed"] for result in results)
+    Formatter.print_info(f"共耗时 {sum(result['seconds'] for result in results):.3f}s，回收 {total / 1024:.1f} KB")
+    failed = [result for result in results if result["status"] == "error"]
+    if failed:
+        Formatter.print_error(f"\n❌ 数据库完整性检查未通过: {failed[0]['detail']}")
+        raise click.ClickException("数据库完整性检查未通过")
+
+
+@data.command()
+@click.option("--table", type=click.Choice(list(EXPORT_TABLES)), default="transactions", help="导出的表，默认为transactions")
+@click.option("--format", "file_format", type=click.Choice(EXPORT_FORMATS), default="csv", help="导出格式，默认为csv")
+@click.option("-o", "--output", help="输出文件路径，未指定时输出到标准输出（parquet格式必须指定）")
+@click.option("--start", help="创建时间起始日期（含），格式：YYYY-MM-DD")
+@click.option("--end", help="创建时间结束日期（含），格式：YYYY-MM-DD")
+@click.option("-m", "--month", help="月份，格式：YYYY-MM（仅交易）")
+@click.option("-c", "--category", help="分类")
+@click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, help="需同时包含全部标签（默认包含任一标签即可）")
+@click.option("--type", "transaction_type", type=click.Choice(["income", "expense"]), help="交易类型（仅交易）")
+@click.option("-s", "--status", type=click.Choice(["todo", "doing", "done"]), help="状态（仅待办事项）")
+@click.option("--row-group-size", type=click.IntRange(min=1), default=DEFAULT_ROW_GROUP_SIZE,
+              help=f"Parquet每个行组的行数，默认为{DEFAULT_ROW_GROUP_SIZE}")
+def export(table: str, file_format: str, output: Optional[str], start: Optional[str], end: Optional[str],
+           month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+           transaction_type: Optional[str], status: Optional[str], row_group_size: int):
+    """
+    导出交易或待办事项，供分析工具读取
+
+    数据逐批读取、逐条写出，导出全部账目也不会一次性载入内存。
+    时间为ISO 8601格式，金额为精确的两位小数；parquet格式需要安装pyarrow。
+
+    示例:
+    cashlog data export -o transactions.csv  # 导出全部交易
+    cashlog data export --format jsonl --start 2024-01-01 --end 2024-12-31 > 2024.jsonl
+    cashlog data export --format parquet -o ledger.parquet -c 餐饮  # 按分类导出为Parquet
+    cashlog data export --table todos -s done --format jsonl -o done.jsonl
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        if table == "todos" and (month or transaction_type):
+            raise ValueError("--month 和 --type 仅适用于交易表")
+        if table == "transactions" and status:
+            raise ValueError("--status 仅适用于待办事项表")
+
+        filters = {}
+        if month:
+            filters["month"] = month
+        if category:
+            filters["category"] = category
+        if tags:
+            filters["tags"] = tags
+            if all_tags:
+                filters["tag_match"] = "all"
+        if transaction_type:
+            filters["transaction_type"] = transaction_type
+        if status:
+            filters["status"] = status
+
+        db = next(get_db())
+        stats = ExportService.export(db, table, file_format, output, start, end, row_group_size, **filters)
+        # 输出到标准输出时只包含数据
+        if stats["path"]:
+            Formatter.print_success(f"\n✅ 导出完成，共 {stats['rows']} 行，耗时 {stats['elapsed']:.2f} 秒")
+            Formatter.print_info(f"   导出文件: [bold]{stats['path']}[/bold]")
+    except ValueError as e:
+        Formatter.print_error(f"\n❌ 参数错误: {str(e)}")
+        raise click.ClickException(str(e))
+    except Exception as e:
+        Formatter.print_error(f"\n❌ 导出失败: {str(e)}")
+        raise click.ClickException(str(e))
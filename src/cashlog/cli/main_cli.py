@@ -1,12 +1,40 @@
 """主命令行接口"""
+import importlib
+from typing import Dict, List, Optional
 import click
-from cashlog.cli.transaction_cli import transaction
-from cashlog.cli.todo_cli import todo
-from cashlog.cli.report_cli import report
-from cashlog.cli.data_cli import data
 
+# 子命令组名称 -> "模块:对象"，调用到哪个命令组才导入哪个模块
+SUBCOMMANDS: Dict[str, str] = {
+    "transaction": "cashlog.cli.transaction_cli:transaction",
+    "todo": "cashlog.cli.todo_cli:todo",
+    "report": "cashlog.cli.report_cli:report",
+    "data": "cashlog.cli.data_cli:data",
+    "search": "cashlog.cli.search_cli:search",
+}
 
-@click.group()
+
+class LazyGroup(click.Group):
+    """按需导入子命令的命令组
+
+    每次执行命令只导入被调用的命令组及其依赖（数据库模型、服务、rich等），
+    不访问数据库的选项（如 --version）不会导入任何命令组。
+    """
+
+    def __init__(self, *args, lazy_commands: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(":")
+            self.add_command(getattr(importlib.import_module(module_name), attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_commands=SUBCOMMANDS)
 @click.version_option("0.1.0", "-v", "--version")
 def cli():
     """
@@ -17,12 +45,5 @@ def cli():
     pass
 
 
-# 注册子命令
-cli.add_command(transaction)
-cli.add_command(todo)
-cli.add_command(report)
-cli.add_command(data)
-
-
 if __name__ == "__main__":
     cli()
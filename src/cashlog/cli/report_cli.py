@@ -2,7 +2,8 @@
 import click
 from typing import Optional, List
 from cashlog.models.db import get_db, init_db
-from cashlog.services.report_service import ReportService
+from cashlog.services.report_service import ReportService, PIVOT_COLUMNS, PIVOT_VALUES
+from cashlog.services.report_cache import report_cache
 from cashlog.utils.formatter import Formatter
 
 
@@ -45,7 +46,8 @@ def validate_fields(ctx, param, value):
 @click.option("--category", callback=validate_categories, help="分类筛选，支持多分类英文逗号分隔")
 @click.option("--fields", callback=validate_fields, help="指定展示字段，可选值：金额，分类，待办 ID, 日期，交易描述，英文逗号分隔")
 @click.option("--format", type=click.Choice(["text", "markdown"]), default="text", help="输出格式，默认为text")
-def generate(time_dimension: str, start: Optional[str], end: Optional[str], category: Optional[List[str]], fields: Optional[List[str]], format: str):
+@click.option("--no-cache", is_flag=True, default=False, help="跳过报表缓存，直接重新计算")
+def generate(time_dimension: str, start: Optional[str], end: Optional[str], category: Optional[List[str]], fields: Optional[List[str]], format: str, no_cache: bool):
     """
     生成多维度收支报表
     
@@ -56,6 +58,7 @@ def generate(time_dimension: str, start: Optional[str], end: Optional[str], cate
     cashlog report generate --start 2023-10-01 --end 2023-10-31  # 生成自定义区间报表
     cashlog report generate --category 餐饮,交通  # 筛选餐饮和交通分类
     cashlog report generate --fields 金额,分类,笔数  # 指定展示字段
+    cashlog report generate --no-cache  # 跳过缓存重新计算
     """
     init_db()  # 确保数据库已初始化
     
@@ -66,7 +69,7 @@ def generate(time_dimension: str, start: Optional[str], end: Optional[str], cate
         if start or end:
             time_dimension = "custom"
         
-        report_data = ReportService.generate_report(db, time_dimension, start, end, category)
+        report_data = ReportService.generate_report(db, time_dimension, start, end, category, use_cache=not no_cache)
         formatted_report = ReportService.format_report(report_data, format, fields)
         
         if not report_data["has_data"]:
@@ -114,3 +117,114 @@ def monthly(month: Optional[str], format: str):
         Formatter.print_error(str(e))
     except Exception as e:
         Formatter.print_error(f"生成报表失败: {str(e)}")
+
+
+@report.command()
+@click.option("--daily", "time_dimension", flag_value="daily", help="按日划分周期")
+@click.option("--weekly", "time_dimension", flag_value="weekly", help="按周划分周期")
+@click.option("--quarterly", "time_dimension", flag_value="quarterly", help="按季度划分周期")
+@click.option("--monthly", "time_dimension", flag_value="monthly", default=True, help="按月划分周期（默认）")
+@click.option("-n", "--periods", type=click.IntRange(1, 400), default=12, help="周期数量，默认为12")
+@click.option("--until", help="截止日期，格式：YYYY-MM-DD，默认截止到当前周期")
+@click.option("--category", callback=validate_categories, help="分类筛选，支持多分类英文逗号分隔")
+@click.option("--by-category", is_flag=True, default=False, help="按分类拆分每个周期的收支")
+@click.option("--format", type=click.Choice(["text", "markdown", "csv", "json"]), default="text", help="输出格式，默认为text")
+def series(time_dimension: str, periods: int, until: Optional[str], category: Optional[List[str]], by_category: bool, format: str):
+    """
+    生成最近N个周期的收支趋势
+
+    各周期的划分与 report generate 及其环比一致，全部周期通过一次查询汇总。
+
+    示例:
+    cashlog report series  # 最近12个月
+    cashlog report series --weekly -n 8  # 最近8周
+    cashlog report series --quarterly -n 4 --by-category --format csv  # 最近4个季度按分类拆分，输出CSV
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        db = next(get_db())
+        series_data = ReportService.generate_series(db, time_dimension, periods, category, by_category, until)
+        output = ReportService.format_series(series_data, format)
+
+        if format in ("csv", "json"):
+            # 机器可读格式直接输出，便于重定向到文件
+            click.echo(output, nl=not output.endswith("\n"))
+        else:
+            from rich.console import Console
+            console = Console()
+            console.print(output)
+
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"生成趋势报表失败: {str(e)}")
+
+
+@report.command()
+@click.option("--rows", type=click.Choice(["category"]), default="category", help="行维度，目前支持category")
+@click.option("--cols", type=click.Choice(["day", "week", "month", "quarter", "year"]), default="month", help="列维度，默认为month")
+@click.option("--start", required=True, help="开始日期，格式：YYYY-MM-DD")
+@click.option("--end", required=True, help="结束日期，格式：YYYY-MM-DD")
+@click.option("--value", type=click.Choice(["income", "expense", "net", "count"]), default="net", help="统计值，默认为净额net")
+@click.option("--category", callback=validate_categories, help="分类筛选，支持多分类英文逗号分隔")
+@click.option("--format", type=click.Choice(["text", "markdown", "csv"]), default="text", help="输出格式，默认为text")
+def pivot(rows: str, cols: str, start: str, end: str, value: str, category: Optional[List[str]], format: str):
+    """
+    生成分类 × 周期的交叉报表
+
+    整个矩阵通过一次汇总查询得到并逐行输出，行合计与列合计在同一次遍历中计算。
+
+    示例:
+    cashlog report pivot --rows category --cols month --start 2024-01-01 --end 2024-12-31
+    cashlog report pivot --cols quarter --start 2024-01-01 --end 2024-12-31 --value expense --format csv > pivot.csv
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        db = next(get_db())
+        columns = ReportService.pivot_columns(start, end, cols)
+        title = None
+        if format != "csv":
+            title = f"{start} 至 {end} 分类{PIVOT_VALUES[value]}（按{PIVOT_COLUMNS[cols][0]}）"
+        pivot_rows = ReportService.iter_pivot(db, start, end, cols, value, category)
+        for line in ReportService.format_pivot(columns, pivot_rows, format, title):
+            click.echo(line)
+
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"生成交叉报表失败: {str(e)}")
+
+
+@report.command()
+@click.option("--clear", is_flag=True, default=False, help="清空报表缓存")
+def cache(clear: bool):
+    """
+    查看或清空报表缓存
+
+    报表结果按参数和数据版本缓存，交易数据变更后自动失效。
+    内存层容量通过 report_cache_size 配置（0表示关闭），
+    设置 report_cache_dir 后启用磁盘层，在多次命令调用之间共享缓存和命中统计。
+    未启用磁盘层时命中统计只在进程内，API服务的统计通过 GET /api/reports/cache 查看。
+
+    示例:
+    cashlog report cache  # 查看缓存统计
+    cashlog report cache --clear  # 清空缓存
+    """
+    try:
+        if clear:
+            removed = report_cache.clear()
+            Formatter.print_success(f"报表缓存已清空，删除 {removed} 个磁盘缓存文件")
+            return
+
+        stats = report_cache.stats()
+        scope = "各进程累计" if stats["shared"] else "仅本次命令，未启用磁盘层"
+        Formatter.print_info(f"命中: {stats['hits']}（磁盘层 {stats['disk_hits']}），未命中: {stats['misses']}，命中率: {stats['hit_rate']:.1%}（{scope}）")
+        Formatter.print_info(f"内存层: {stats['memory_entries']}/{stats['memory_size']} 条")
+        if stats["disk_dir"]:
+            Formatter.print_info(f"磁盘层: {stats['disk_dir']}，{stats['disk_entries']} 个文件")
+        else:
+            Formatter.print_info("磁盘层: 未启用")
+    except Exception as e:
+        Formatter.print_error(f"操作报表缓存失败: {str(e)}")
@@ -0,0 +1,45 @@
+"""全文检索命令行接口"""
+import click
+from typing import Optional
+from cashlog.models.db import get_db, init_db
+from cashlog.services.search_service import SearchService
+from cashlog.utils.formatter import Formatter
+
+
+@click.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--type", "kind", type=click.Choice(["transaction", "todo"]), help="只检索指定类型的记录")
+@click.option("--limit", type=click.IntRange(1, 500), default=20, help="每页条数，默认为20")
+@click.option("--page", type=click.IntRange(1), default=1, help="页码，默认为1")
+def search(query: tuple, kind: Optional[str], limit: int, page: int):
+    """
+    全文检索交易备注和待办事项内容
+
+    结果按相关度排序，多个关键词需同时命中。
+
+    示例:
+    cashlog search 午餐  # 检索交易和待办事项
+    cashlog search 报销 发票 --type todo  # 只检索待办事项
+    """
+    init_db()  # 确保数据库已初始化
+
+    try:
+        db = next(get_db())
+        results, total = SearchService.search(db, " ".join(query), kind, limit=limit, offset=(page - 1) * limit)
+
+        headers = {
+            "kind": "类型",
+            "id": "ID",
+            "category": "分类",
+            "snippet": "匹配内容",
+            "created_at": "时间"
+        }
+        Formatter.print_table(Formatter.format_search_results(results), headers)
+        if total:
+            pages = (total + limit - 1) // limit
+            Formatter.print_info(f"共 {total} 条结果，第 {page}/{pages} 页")
+
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"检索失败: {str(e)}")
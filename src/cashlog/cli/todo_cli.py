@@ -4,6 +4,7 @@ from typing import Optional
 from cashlog.models.db import get_db, init_db
 from cashlog.services.todo_service import TodoService
 from cashlog.utils.formatter import Formatter
+from cashlog.utils.writers import OUTPUT_FORMATS, TODO_FIELDS, todo_record, write_records
 
 
 @click.group()
@@ -173,10 +174,13 @@ def unlink(todo_id: str):
 @click.option("-s", "--status", type=click.Choice(["todo", "doing", "done"]), help="状态")
 @click.option("-c", "--category", help="分类")
 @click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, help="需同时包含全部标签（默认包含任一标签即可）")
 @click.option("--before", help="截止时间之前，格式：YYYY-MM-DD")
 @click.option("--after", help="截止时间之后，格式：YYYY-MM-DD")
 @click.option("--with-transactions", is_flag=True, help="显示关联的交易详细信息")
-def list(status: Optional[str], category: Optional[str], tags: Optional[str], before: Optional[str], after: Optional[str], with_transactions: bool):
+@click.option("--output", type=click.Choice(OUTPUT_FORMATS), help="以机器可读格式流式输出到标准输出：json, jsonl, csv, tsv")
+def list(status: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool, before: Optional[str], after: Optional[str], with_transactions: bool,
+         output: Optional[str]):
     """
     列出待办事项
     
@@ -185,6 +189,7 @@ def list(status: Optional[str], category: Optional[str], tags: Optional[str], be
     cashlog todo list -s todo  # 列出待办状态的事项
     cashlog todo list -c 工作 --before 2023-12-31  # 列出工作分类且截止日期在2023-12-31之前的事项
     cashlog todo list --with-transactions  # 列出所有待办事项并显示关联交易
+    cashlog todo list -s todo --output jsonl  # 每行输出一个JSON对象，供脚本处理
     """
     init_db()  # 确保数据库已初始化
     
@@ -196,12 +201,20 @@ def list(status: Optional[str], category: Optional[str], tags: Optional[str], be
             filters["category"] = category
         if tags:
             filters["tags"] = tags
+            if all_tags:
+                filters["tag_match"] = "all"
         if before:
             filters["deadline_before"] = before
         if after:
             filters["deadline_after"] = after
         
         db = next(get_db())
+        if output:
+            # 流式输出，标准输出只包含数据
+            todos = TodoService.iter_todos(db, **filters)
+            write_records((todo_record(t) for t in todos), TODO_FIELDS, output)
+            return
+
         todos = TodoService.get_todos(db, **filters)
         
         # 格式化并打印
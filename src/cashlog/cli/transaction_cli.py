@@ -2,8 +2,25 @@
 import click
 from typing import Optional
 from cashlog.models.db import get_db, init_db
+from cashlog.services.import_service import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, ImportService
 from cashlog.services.transaction_service import TransactionService
 from cashlog.utils.formatter import Formatter
+from cashlog.utils.writers import OUTPUT_FORMATS, TRANSACTION_FIELDS, transaction_record, write_records
+
+# 流式输出时各列的显示宽度，无法预先根据全部数据计算
+STREAM_COLUMN_WIDTHS = {
+    "id": 6,
+    "amount": 10,
+    "type": 4,
+    "category": 8,
+    "tags": 12,
+    "notes": 16,
+    "created_at": 19,
+    "todo_id": 10,
+}
+
+# 导入结束后最多列出的错误行数
+MAX_REPORTED_ERRORS = 20
 
 
 @click.group()
@@ -59,9 +76,16 @@ def add(amount: str, category: str, tags: Optional[str], notes: Optional[str], d
 @click.option("-m", "--month", help="月份，格式：YYYY-MM")
 @click.option("-c", "--category", help="分类")
 @click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, help="需同时包含全部标签（默认包含任一标签即可）")
 @click.option("--type", type=click.Choice(["income", "expense"]), help="交易类型: income(收入), expense(支出)")
 @click.option("--with-todos", is_flag=True, help="显示关联的待办事项详细信息")
-def list(month: Optional[str], category: Optional[str], tags: Optional[str], type: Optional[str], with_todos: bool):
+@click.option("--after-cursor", help="游标分页：从上一页输出的游标之后开始列出")
+@click.option("--limit", type=click.IntRange(min=1), help="每页条数；流式输出时为最多输出的条数")
+@click.option("--offset", type=click.IntRange(min=0), help="跳过前N条记录，指定时使用流式输出")
+@click.option("--stream", is_flag=True, help="流式输出：边查询边逐行打印，适合大量数据")
+@click.option("--output", type=click.Choice(OUTPUT_FORMATS), help="以机器可读格式流式输出到标准输出：json, jsonl, csv, tsv")
+def list(month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool, type: Optional[str], with_todos: bool,
+         after_cursor: Optional[str], limit: Optional[int], offset: Optional[int], stream: bool, output: Optional[str]):
     """
     列出交易记录
     
@@ -70,7 +94,13 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
     cashlog transaction list -m 2023-10  # 列出10月交易
     cashlog transaction list --type income  # 列出所有收入
     cashlog transaction list -c 餐饮 -t "午餐,晚餐"  # 按分类和标签筛选
+    cashlog transaction list -t "日常,午餐" --all-tags  # 同时包含两个标签
     cashlog transaction list --with-todos  # 列出所有交易并显示关联待办事项
+    cashlog transaction list --limit 100  # 游标分页，输出下一页游标
+    cashlog transaction list --limit 100 --after-cursor <游标>  # 获取下一页
+    cashlog transaction list --stream  # 流式输出全部交易
+    cashlog transaction list --offset 1000 --limit 500  # 流式输出第1001~1500条
+    cashlog transaction list -m 2023-10 --output csv > 2023-10.csv  # 输出CSV供脚本处理
     """
     init_db()  # 确保数据库已初始化
     
@@ -82,14 +112,15 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
             filters["category"] = category
         if tags:
             filters["tags"] = tags
+            if all_tags:
+                filters["tag_match"] = "all"
         if type:
             filters["transaction_type"] = type
         
-        db = next(get_db())
-        transactions = TransactionService.get_transactions(db, **filters)
-        
-        # 格式化并打印
-        formatted_data = Formatter.format_transactions(transactions, with_todos=with_todos)
+        stream = stream or offset is not None or output is not None
+        if stream and after_cursor is not None:
+            raise ValueError("流式输出不能与游标分页同时使用")
+
         headers = {
             "id": "ID",
             "amount": "金额",
@@ -99,14 +130,43 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
             "notes": "备注",
             "created_at": "时间"
         }
-        
         if with_todos:
             headers["todo_id"] = "关联待办ID"
-            headers["todo_content"] = "关联待办内容"
+            headers["todo_info"] = "关联待办内容"
+
+        db = next(get_db())
+        if stream:
+            transactions = TransactionService.iter_transactions(
+                db, offset or 0, limit, with_todos=with_todos, **filters
+            )
+            if output:
+                # 标准输出只包含数据，不输出查询条件等提示
+                fields = TRANSACTION_FIELDS + (["todo_id"] if with_todos else [])
+                write_records((transaction_record(t, with_todos) for t in transactions), fields, output)
+                return
+            if filters:
+                Formatter.print_info(f"查询条件: {filters}")
+            rows = (Formatter.format_transaction(t, with_todos=with_todos) for t in transactions)
+            count = Formatter.stream_table(rows, headers, STREAM_COLUMN_WIDTHS)
+            Formatter.print_info(f"共输出 {count} 条记录")
+            return
+
+        next_cursor = None
+        if after_cursor is not None or limit is not None:
+            transactions, next_cursor = TransactionService.get_transactions_page(
+                db, after_cursor, limit or 50, **filters
+            )
+        else:
+            transactions = TransactionService.get_transactions(db, **filters)
+        
+        # 格式化并打印
+        formatted_data = Formatter.format_transactions(transactions, with_todos=with_todos)
         
         if filters:
             Formatter.print_info(f"查询条件: {filters}")
         Formatter.print_table(formatted_data, headers)
+        if next_cursor:
+            Formatter.print_info(f"下一页游标: {next_cursor}")
         
     except ValueError as e:
         Formatter.print_error(str(e))
@@ -172,6 +232,49 @@ def update(transaction_id: str, amount: Optional[str], category: Optional[str],
         Formatter.print_error(f"更新交易记录失败: {str(e)}")
 
 
+@transaction.command(name="import")
+@click.argument("file")
+@click.option("--format", "file_format", type=click.Choice(IMPORT_FORMATS), default="csv", help="文件格式，默认为csv")
+@click.option("--map", "mapping", help="列映射，格式：字段=列名，英文逗号分隔，如 amount=金额,created_at=日期")
+@click.option("--batch-size", type=click.IntRange(min=1), default=DEFAULT_BATCH_SIZE, help=f"每批写入的行数，默认为{DEFAULT_BATCH_SIZE}")
+def import_(file: str, file_format: str, mapping: Optional[str], batch_size: int):
+    """
+    从CSV或JSON Lines文件批量导入交易记录
+
+    可导入的字段为 amount、category、tags、notes、created_at，校验规则与 transaction add 一致。
+    有效行按批次写入，无效行跳过并报告行号和原因。
+
+    示例:
+    cashlog transaction import history.csv  # 列名与字段同名
+    cashlog transaction import bank.csv --map amount=金额,category=分类,created_at=日期
+    cashlog transaction import export.jsonl --format jsonl
+    """
+    init_db()  # 确保数据库已初始化
+
+    def report_progress(stats):
+        click.echo(f"\r已导入 {stats['imported']} 行，失败 {stats['failed']} 行，{stats['rate']:.0f} 行/秒", nl=False, err=True)
+
+    try:
+        columns = ImportService.parse_mapping(mapping)
+        db = next(get_db())
+        stats = ImportService.import_transactions(db, file, file_format, columns, batch_size, report_progress)
+        if stats["imported"]:
+            click.echo(err=True)
+
+        Formatter.print_success(
+            f"导入完成：共 {stats['total']} 行，成功 {stats['imported']} 行，失败 {stats['failed']} 行，"
+            f"耗时 {stats['elapsed']:.2f} 秒（{stats['rate']:.0f} 行/秒）"
+        )
+        for line_no, reason in stats["errors"][:MAX_REPORTED_ERRORS]:
+            Formatter.print_warning(f"第 {line_no} 行: {reason}")
+        if stats["failed"] > MAX_REPORTED_ERRORS:
+            Formatter.print_warning(f"其余 {stats['failed'] - MAX_REPORTED_ERRORS} 行错误未列出")
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"导入交易记录失败: {str(e)}")
+
+
 @transaction.command()
 @click.argument("transaction_id")
 def unlink(transaction_id: str):
@@ -0,0 +1,58 @@
+"""运行配置读取
+
+配置优先级：环境变量 > 配置文件 > 默认值。
+配置文件为JSON格式，默认位于 data/config.json，可通过环境变量 CASHLOG_CONFIG 指定其他路径。
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 数据目录（数据库、备份和配置文件的默认位置）
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+
+def get_config_path() -> Path:
+    """获取配置文件路径"""
+    return Path(os.environ.get("CASHLOG_CONFIG", DATA_DIR / "config.json")).expanduser()
+
+
+def load_config() -> Dict[str, Any]:
+    """
+    读取配置文件
+
+    Returns:
+        配置字典，配置文件不存在时返回空字典
+
+    Raises:
+        ValueError: 当配置文件不是合法的JSON对象时
+    """
+    config_path = get_config_path()
+    if not config_path.exists():
+        return {}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"配置文件读取失败: {config_path} ({e})")
+    if not isinstance(config, dict):
+        raise ValueError(f"配置文件格式错误: {config_path}")
+    return config
+
+
+def get_setting(key: str, env_var: str, default: Optional[Any] = None) -> Any:
+    """
+    获取单个配置项
+
+    Args:
+        key: 配置文件中的键名
+        env_var: 对应的环境变量名
+        default: 默认值
+
+    Returns:
+        配置值
+    """
+    value = os.environ.get(env_var)
+    if value not in (None, ""):
+        return value
+    return load_config().get(key, default)
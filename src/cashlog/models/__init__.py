@@ -1,5 +1,10 @@
 """数据模型包"""
 from cashlog.models.transaction import Transaction
 from cashlog.models.todo import Todo, TodoStatus
+from cashlog.models.tag import Tag
+from cashlog.models.rollup import DailyCategoryRollup
+from cashlog.models.version import DataVersion
+from cashlog.models.changes import ChangedRow, DeletedRow
+from cashlog.models import search  # noqa: F401  注册全文索引的建表事件
 
-__all__ = ["Transaction", "Todo", "TodoStatus"]
+__all__ = ["Transaction", "Todo", "TodoStatus", "Tag", "DailyCategoryRollup", "DataVersion", "DeletedRow", "ChangedRow"]
@@ -0,0 +1,83 @@
+"""批量写入交易
+
+交易表上的AFTER INSERT触发器逐行维护全文索引、按日汇总、数据版本和变更日志，批量写入时逐行触发的开销
+远大于写入本身（全文索引尤甚）。bulk_insert_transactions 在同一事务中暂时删除这些触发器，
+写入后以集合语句一次性补齐派生数据，再重建触发器。
+
+SQLite的DDL是事务性的，但pysqlite只在DML语句前自动执行BEGIN，DDL若在事务开始前执行会立即单独提交。
+因此删除触发器前先以 BEGIN IMMEDIATE 显式开启事务并取得写锁：其他连接在此期间无法写入，
+也看不到触发器缺失的中间状态；任何一步失败回滚时，触发器随之恢复。
+"""
+from typing import Any, Dict, List
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from cashlog.models.changes import create_change_triggers, log_changed_rows
+from cashlog.models.rollup import add_rollup_rows, create_rollup_triggers
+from cashlog.models.search import FTS_INDEXES, create_search_index, index_rows
+from cashlog.models.tag import link_tags
+from cashlog.models.transaction import Transaction
+from cashlog.models.version import bump_data_version, create_version_triggers
+
+# 批量写入期间暂停的触发器
+SUSPENDED_TRIGGERS = [
+    f"{FTS_INDEXES['transaction'][1]}_ai",
+    "transactions_rollup_ai",
+    "transactions_version_ai",
+    "transactions_changes_ai",
+]
+
+
+def _begin_immediate(conn: Connection) -> None:
+    """在DBAPI连接尚未开启事务时执行 BEGIN IMMEDIATE，已在事务中（已执行过写入）时沿用当前事务"""
+    dbapi_connection = conn.connection.dbapi_connection
+    if not dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def bulk_insert_transactions(conn: Connection, rows: List[Dict[str, Any]]) -> int:
+    """
+    批量写入交易并维护全文索引、按日汇总、数据版本、变更日志和标签关联
+
+    调用方负责提交事务，写入和派生数据维护在同一事务中完成。
+
+    Args:
+        conn: 数据库连接
+        rows: 交易表字段值列表，各行字段需一致
+
+    Returns:
+        写入的行数
+    """
+    if not rows:
+        return 0
+
+    # 先开启事务取得写锁，删除触发器与写入同属一个事务，之后读取的最大ID也不会被其他连接的写入穿插
+    _begin_immediate(conn)
+    for name in SUSPENDED_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    after_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM transactions")).scalar()
+
+    # 直接以DBAPI executemany写入，省去逐行的参数编译；各字段值按列类型转换为存储格式
+    table = Transaction.__table__
+    columns = list(rows[0])
+    processors = [table.c[name].type.bind_processor(conn.dialect) for name in columns]
+    conn.exec_driver_sql(
+        f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [
+            tuple(row[name] if process is None else process(row[name]) for name, process in zip(columns, processors))
+            for row in rows
+        ]
+    )
+
+    index_rows(conn, "transaction", after_id)
+    add_rollup_rows(conn, after_id)
+    bump_data_version(conn)
+    log_changed_rows(conn, table.name, after_id)
+    link_tags(conn, "transaction", conn.execute(
+        select(table.c.id, table.c.tags).where(table.c.id > after_id, table.c.tags.isnot(None))
+    ).all())
+
+    create_search_index(conn, "transaction", rebuild=False)
+    create_rollup_triggers(conn, rebuild=False)
+    create_version_triggers(conn)
+    create_change_triggers(conn)
+    return len(rows)
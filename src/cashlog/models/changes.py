@@ -0,0 +1,161 @@
+"""变更追踪
+
+新增和修改的记录由触发器写入 changed_rows 变更日志，每条记录只保留最近一次变更；
+删除的记录则由触发器写入 deleted_rows 墓碑表，两者合起来即可从上一次备份推出当前数据。
+两张表都按自增序号 seq 排序，备份链记录已捕获的最大序号。SQLite同一时刻只有一个写事务，
+序号的先后就是提交的先后，不受时钟回拨（如夏令时结束）和写事务提交延迟的影响。
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, String, event, text
+from sqlalchemy.engine import Connection
+from cashlog.models.db import Base
+from cashlog.models.todo import Todo
+from cashlog.models.transaction import Transaction
+
+
+class DeletedRow(Base):
+    """已删除记录的墓碑表模型"""
+    __tablename__ = "deleted_rows"
+    # 序号只增不减，保证删除墓碑后也不会复用已被备份链记录的序号
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
+
+
+class ChangedRow(Base):
+    """新增或修改记录的变更日志表模型"""
+    __tablename__ = "changed_rows"
+    __table_args__ = (
+        Index("ux_changed_rows_table_row", "table_name", "row_id", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=False)
+
+
+# 追踪变更的表
+TRACKED_TABLES = ("transactions", "todos")
+
+# 写入墓碑的触发器名称
+TOMBSTONE_TRIGGERS = [f"{table_name}_tombstone_ad" for table_name in TRACKED_TABLES]
+
+# 写入变更日志的触发器：触发器名称 -> (表名, 触发事件)
+CHANGE_TRIGGERS = {
+    f"{table_name}_changes_{suffix}": (table_name, timing)
+    for table_name in TRACKED_TABLES
+    for suffix, timing in (("ai", "AFTER INSERT"), ("au", "AFTER UPDATE"))
+}
+
+
+def _create_trigger(conn: Connection, table_name: str) -> None:
+    """为指定表创建删除时写入墓碑的触发器"""
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {table_name}_tombstone_ad AFTER DELETE ON {table_name} "
+        f"BEGIN INSERT INTO deleted_rows (table_name, row_id, deleted_at) "
+        f"VALUES ('{table_name}', old.id, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')); END"
+    ))
+
+
+def create_tombstone_triggers(conn: Connection) -> None:
+    """
+    为交易和待办事项表创建写入删除墓碑的触发器，可重复执行
+
+    Args:
+        conn: 数据库连接
+    """
+    for table_name in TRACKED_TABLES:
+        _create_trigger(conn, table_name)
+
+
+def _create_change_triggers(conn: Connection, table_name: str) -> None:
+    """为指定表创建新增、修改时写入变更日志的触发器"""
+    for name, (trigger_table, timing) in CHANGE_TRIGGERS.items():
+        if trigger_table != table_name:
+            continue
+        # 先删除再插入，使该记录取得新的序号；不使用 INSERT OR REPLACE，避免外层语句的冲突处理方式覆盖触发器内的
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {timing} ON {table_name} BEGIN "
+            f"DELETE FROM changed_rows WHERE table_name = '{table_name}' AND row_id = new.id; "
+            f"INSERT INTO changed_rows (table_name, row_id) VALUES ('{table_name}', new.id); END"
+        ))
+
+
+def create_change_triggers(conn: Connection) -> None:
+    """
+    为交易和待办事项表创建写入变更日志的触发器，可重复执行
+
+    Args:
+        conn: 数据库连接
+    """
+    for table_name in TRACKED_TABLES:
+        _create_change_triggers(conn, table_name)
+
+
+def log_changed_rows(conn: Connection, table_name: str, after_id: int) -> None:
+    """
+    将ID大于after_id的记录写入变更日志，批量写入时代替逐行触发器
+
+    Args:
+        conn: 数据库连接
+        table_name: 表名
+        after_id: 批量写入前的最大ID
+    """
+    params = {"table_name": table_name, "after_id": after_id}
+    conn.execute(text(
+        "DELETE FROM changed_rows WHERE table_name = :table_name AND row_id > :after_id"
+    ), params)
+    conn.execute(text(
+        f"INSERT INTO changed_rows (table_name, row_id) "
+        f"SELECT :table_name, id FROM {table_name} WHERE id > :after_id ORDER BY id"
+    ), params)
+
+
+def prune_tombstones(conn, up_to_seq: int) -> int:
+    """
+    删除序号不大于up_to_seq的墓碑，新的基础备份已包含这些删除
+
+    Args:
+        conn: sqlite3连接
+        up_to_seq: 基础备份开始前的最大墓碑序号
+
+    Returns:
+        删除的墓碑数
+    """
+    return conn.execute("DELETE FROM deleted_rows WHERE seq <= ?", (up_to_seq,)).rowcount
+
+
+def tombstones_complete(conn, after_seq: int) -> bool:
+    """
+    检查序号大于after_seq的墓碑是否都还在
+
+    墓碑序号连续分配，只有 prune_tombstones 会造成缺口；缺口说明另一条备份链建立基础备份时已清理了这些墓碑。
+
+    Args:
+        conn: sqlite3连接
+        after_seq: 上一个恢复点的墓碑序号
+
+    Returns:
+        墓碑没有缺失时返回True
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'deleted_rows'").fetchone()
+    last_seq = row[0] if row else 0
+    present = conn.execute("SELECT COUNT(*) FROM deleted_rows WHERE seq > ?", (after_seq,)).fetchone()[0]
+    return present == max(last_seq - after_seq, 0)
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_transaction_trigger(target, connection, **kw):
+    """新建交易表时一并创建墓碑和变更日志触发器"""
+    _create_trigger(connection, "transactions")
+    _create_change_triggers(connection, "transactions")
+
+
+@event.listens_for(Todo.__table__, "after_create")
+def _create_todo_trigger(target, connection, **kw):
+    """新建待办事项表时一并创建墓碑和变更日志触发器"""
+    _create_trigger(connection, "todos")
+    _create_change_triggers(connection, "todos")
@@ -1,21 +1,196 @@
-"""数据库连接和基类定义"""
+"""数据库连接和基类定义
+
+导入本模块不会创建数据目录或数据库引擎：引擎和会话工厂在首次使用时创建，
+不访问数据库的命令（如 --help）因此不受影响。
+"""
 import os
-from pathlib import Path
-from sqlalchemy import create_engine
+import threading
+import warnings
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
+from cashlog.config import DATA_DIR, get_setting
 
-# 确保数据库目录存在
-DB_DIR = Path(__file__).parent.parent.parent.parent / "data"
-DB_DIR.mkdir(exist_ok=True)
+# 数据库目录，创建引擎时确保其存在
+DB_DIR = DATA_DIR
 
 # 数据库路径
 DB_PATH = DB_DIR / "cashlog.db"
 
-# 创建数据库引擎
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+# SQLite性能配置档位，按顺序在每个新连接上执行
+# safe: 完全同步，不设置日志模式：新建的数据库使用SQLite默认的回滚日志，
+#       已由其他档位切换为WAL的数据库保持WAL，避免与使用WAL档位的进程（如API服务）来回切换
+# balanced: WAL模式，读写互不阻塞，提交时不再每次fsync数据库文件
+# throughput: 在balanced基础上增大页缓存并启用内存映射读取
+# 各档位都为新建的数据库启用增量空间回收（data optimize 按页数回收空闲页），
+# auto_vacuum 必须在切换WAL之前设置；对已有的非增量模式数据库不起作用
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "safe": {
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "throughput": {
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+        "busy_timeout": 10000,
+    },
+}
+
+DEFAULT_PROFILE = "safe"
+
+# 配置的档位无效时改用的档位
+FALLBACK_PROFILE = "balanced"
+
+
+def get_profile_name() -> str:
+    """
+    获取当前配置的数据库性能档位
+
+    优先读取环境变量 CASHLOG_DB_PROFILE，其次读取配置文件中的 db_profile。
+
+    Returns:
+        档位名称
+
+    Raises:
+        ValueError: 当档位名称无效时
+    """
+    profile = str(get_setting("db_profile", "CASHLOG_DB_PROFILE", DEFAULT_PROFILE)).strip().lower()
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的数据库性能档位: {profile}，可选值: {', '.join(PRAGMA_PROFILES)}")
+    return profile
+
+
+def resolve_profile_name() -> str:
+    """
+    获取创建引擎时使用的性能档位，配置无效时改用 FALLBACK_PROFILE 并给出警告
+
+    配置错误不应让所有命令都无法运行（包括用来修正配置的命令），因此这里不抛出异常。
+
+    Returns:
+        档位名称
+    """
+    try:
+        return get_profile_name()
+    except ValueError as e:
+        warnings.warn(f"{e}，已改用 {FALLBACK_PROFILE} 档位", RuntimeWarning, stacklevel=2)
+        return FALLBACK_PROFILE
+
+
+def apply_pragma_profile(dbapi_connection, profile: str) -> None:
+    """
+    在DBAPI连接上执行指定档位的PRAGMA
+
+    Args:
+        dbapi_connection: sqlite3连接对象
+        profile: 档位名称
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in PRAGMA_PROFILES[profile].items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def register_pragma_profile(target_engine, profile: str) -> None:
+    """
+    为引擎注册连接事件，使每个新连接都应用指定档位
+
+    Args:
+        target_engine: SQLAlchemy引擎
+        profile: 档位名称
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的数据库性能档位: {profile}，可选值: {', '.join(PRAGMA_PROFILES)}")
+
+    @event.listens_for(target_engine, "connect")
+    def _apply_profile(dbapi_connection, connection_record):
+        apply_pragma_profile(dbapi_connection, profile)
+
+
+# 引擎和会话工厂在首次使用时创建，性能档位在创建引擎时读取
+_engine = None
+_engine_profile = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    获取数据库引擎，首次调用时创建数据目录和引擎
+
+    Returns:
+        SQLAlchemy引擎
+    """
+    global _engine, _engine_profile
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                DB_DIR.mkdir(exist_ok=True)
+                profile = resolve_profile_name()
+                new_engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+                register_pragma_profile(new_engine, profile)
+                _engine_profile = profile
+                _engine = new_engine
+    return _engine
+
+
+def get_active_profile() -> str:
+    """
+    获取当前生效的性能档位
+
+    Returns:
+        已创建引擎所用的档位；引擎尚未创建时返回按当前配置将要使用的档位
+    """
+    return _engine_profile if _engine is not None else resolve_profile_name()
+
+
+def get_session_factory():
+    """
+    获取会话工厂，首次调用时创建
+
+    Returns:
+        绑定到数据库引擎的会话工厂
+    """
+    global _session_factory
+    if _session_factory is None:
+        bind = get_engine()
+        with _engine_lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+    return _session_factory
+
+
+def dispose_engine() -> None:
+    """关闭连接池中的全部连接，之后的查询重新连接；引擎尚未创建时不做任何事"""
+    if _engine is not None:
+        _engine.dispose()
+
+
+def __getattr__(name: str):
+    """兼容以模块属性方式访问 engine、SessionLocal 和 PRAGMA_PROFILE，访问时才创建或读取"""
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    if name == "PRAGMA_PROFILE":
+        return get_active_profile()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # 创建基类
 Base = declarative_base()
@@ -23,7 +198,7 @@ Base = declarative_base()
 
 def get_db():
     """获取数据库会话"""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -31,8 +206,17 @@ def get_db():
 
 
 def init_db(engine=None):
-    """初始化数据库，创建所有表"""
-    from cashlog.models import transaction, todo  # noqa: F401
+    """
+    初始化数据库，创建所有表并升级已有数据库的结构
+
+    结构版本已是最新且触发器、索引齐全时只读取 PRAGMA user_version 和 sqlite_master，不执行 create_all 和升级步骤。
+    """
+    from cashlog.models import transaction, todo, tag, search, rollup, version, changes  # noqa: F401
+    from cashlog.models.migrations import is_schema_current, upgrade_schema
     if engine is None:
-        engine = globals()['engine']
+        engine = get_engine()
+    with engine.connect() as conn:
+        if is_schema_current(conn):
+            return
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
@@ -0,0 +1,250 @@
+"""数据库结构升级
+
+create_all 只会创建缺失的表，不会为已有的表补建索引等结构。
+这里的每个升级步骤都是幂等的，可以重复执行。
+
+升级完成后将 SCHEMA_VERSION 写入 PRAGMA user_version；之后初始化数据库时只需读取该值，
+再以一条 sqlite_master 查询确认全文索引的分词器、各触发器和模型声明的索引，即可确认结构是最新的，
+不必再执行 create_all 和各升级步骤。
+"""
+import warnings
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# 数据库结构版本，修改模型的表、索引、触发器或增加升级步骤时递增
+SCHEMA_VERSION = 3
+
+# 唯一索引因历史数据重复而无法建立时，改建的非唯一索引名称后缀
+FALLBACK_INDEX_SUFFIX = "_nonunique"
+
+
+def _convert_amount_to_minor_units(conn: Connection) -> None:
+    """将浮点金额列amount转换为整数最小货币单位列amount_minor"""
+    from cashlog.utils.money import to_minor
+
+    columns = {column["name"] for column in inspect(conn).get_columns("transactions")}
+    if "amount" not in columns:
+        return
+    if "amount_minor" not in columns:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN amount_minor INTEGER NOT NULL DEFAULT 0"))
+
+    # 与写入时使用相同的换算规则，分批换算历史金额
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, amount FROM transactions WHERE id > :last_id ORDER BY id LIMIT 1000"
+        ), {"last_id": last_id}).all()
+        if not rows:
+            break
+        conn.execute(
+            text("UPDATE transactions SET amount_minor = :amount_minor WHERE id = :id"),
+            [{"id": row_id, "amount_minor": to_minor(amount)} for row_id, amount in rows]
+        )
+        last_id = rows[-1][0]
+    conn.execute(text("ALTER TABLE transactions DROP COLUMN amount"))
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """为已有的表补建模型中声明的索引"""
+    from cashlog.models.db import Base
+
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            column_names = [column.name for column in index.columns]
+            fallback_name = f"{index.name}{FALLBACK_INDEX_SUFFIX}"
+            if index.unique and _has_duplicates(conn, table.name, column_names):
+                # 历史数据存在重复值时无法建立唯一索引：保留数据，改建非唯一索引使查询仍走索引；
+                # 唯一索引缺失时 is_schema_current 返回False，下次初始化数据库时重试
+                warnings.warn(
+                    f"{table.name}.{', '.join(column_names)} 存在重复值，无法建立唯一索引 {index.name}，"
+                    f"已改建非唯一索引 {fallback_name}；清理重复数据后将自动建立唯一索引",
+                    RuntimeWarning
+                )
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {fallback_name} ON {table.name} ({', '.join(column_names)})"
+                ))
+                continue
+            index.create(bind=conn)
+            if index.unique:
+                conn.execute(text(f"DROP INDEX IF EXISTS {fallback_name}"))
+
+
+def _has_duplicates(conn: Connection, table_name: str, column_names: list) -> bool:
+    """检查非空列组合是否存在重复值"""
+    columns = ", ".join(column_names)
+    not_null = " AND ".join(f"{name} IS NOT NULL" for name in column_names)
+    row = conn.execute(text(
+        f"SELECT 1 FROM {table_name} WHERE {not_null} GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1"
+    )).first()
+    return row is not None
+
+
+def _backfill_tag_links(conn: Connection) -> None:
+    """为尚未建立标签关联的历史记录回填规范化标签"""
+    from cashlog.models.tag import link_tags
+
+    for kind, table_name, link_table, owner_column in (
+        ("transaction", "transactions", "transaction_tags", "transaction_id"),
+        ("todo", "todos", "todo_tags", "todo_id"),
+    ):
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                f"SELECT id, tags FROM {table_name} "
+                f"WHERE id > :last_id AND tags IS NOT NULL AND tags != '' "
+                f"AND NOT EXISTS (SELECT 1 FROM {link_table} WHERE {owner_column} = {table_name}.id) "
+                f"ORDER BY id LIMIT 1000"
+            ), {"last_id": last_id}).all()
+            if not rows:
+                break
+            link_tags(conn, kind, rows)
+            last_id = rows[-1][0]
+
+
+def _create_search_indexes(conn: Connection) -> None:
+    """创建全文索引和同步触发器，分词器配置变更时重建索引"""
+    from cashlog.models.search import FTS_INDEXES, create_search_index
+
+    for kind in FTS_INDEXES:
+        create_search_index(conn, kind)
+
+
+def _create_rollup_triggers(conn: Connection) -> None:
+    """创建按日分类汇总的维护触发器，并为已有交易生成汇总"""
+    from cashlog.models.rollup import create_rollup_triggers
+
+    create_rollup_triggers(conn)
+
+
+def _create_version_triggers(conn: Connection) -> None:
+    """初始化数据版本并创建变更计数触发器"""
+    from cashlog.models.version import create_version_triggers
+
+    create_version_triggers(conn)
+
+
+def _create_tombstone_triggers(conn: Connection) -> None:
+    """创建记录删除墓碑的触发器，供增量备份捕获删除"""
+    from cashlog.models.changes import create_tombstone_triggers
+
+    create_tombstone_triggers(conn)
+
+
+def _create_change_triggers(conn: Connection) -> None:
+    """创建记录新增、修改的变更日志触发器，供增量备份捕获变更"""
+    from cashlog.models.changes import create_change_triggers
+
+    create_change_triggers(conn)
+
+
+def _create_link_cleanup_triggers(conn: Connection) -> None:
+    """创建删除记录时清理标签关联的触发器，并清理已有的孤立关联"""
+    from cashlog.models.tag import create_link_cleanup_triggers
+
+    create_link_cleanup_triggers(conn)
+
+
+# 升级步骤，按顺序执行
+UPGRADE_STEPS = [
+    _convert_amount_to_minor_units,
+    _create_missing_indexes,
+    _backfill_tag_links,
+    _create_search_indexes,
+    _create_rollup_triggers,
+    _create_version_triggers,
+    _create_tombstone_triggers,
+    _create_change_triggers,
+    _create_link_cleanup_triggers,
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    """
+    读取数据库中记录的结构版本
+
+    Args:
+        conn: 数据库连接
+
+    Returns:
+        PRAGMA user_version 的值，从未升级过的数据库为0
+    """
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def expected_triggers() -> List[str]:
+    """
+    升级步骤维护的全部触发器名称
+
+    Returns:
+        全文索引、按日汇总、数据版本、删除墓碑、变更日志和标签关联清理的触发器名称列表
+    """
+    from cashlog.models.changes import CHANGE_TRIGGERS, TOMBSTONE_TRIGGERS
+    from cashlog.models.rollup import ROLLUP_TRIGGERS
+    from cashlog.models.search import SEARCH_TRIGGERS
+    from cashlog.models.tag import LINK_CLEANUP_TRIGGERS
+    from cashlog.models.version import VERSION_TRIGGERS
+
+    return [*SEARCH_TRIGGERS, *ROLLUP_TRIGGERS, *VERSION_TRIGGERS, *TOMBSTONE_TRIGGERS, *CHANGE_TRIGGERS,
+            *LINK_CLEANUP_TRIGGERS]
+
+
+def expected_indexes() -> List[str]:
+    """
+    模型中声明的全部索引名称
+
+    Returns:
+        各表索引名称列表
+    """
+    from cashlog.models.db import Base
+
+    return [index.name for table in Base.metadata.sorted_tables for index in table.indexes]
+
+
+def is_schema_current(conn: Connection) -> bool:
+    """
+    检查数据库结构是否为最新，无需执行 create_all 和升级步骤
+
+    Args:
+        conn: 数据库连接
+
+    Returns:
+        结构版本与 SCHEMA_VERSION 一致、全文索引使用当前分词器，且维护派生数据的触发器和模型声明的索引齐全时返回True
+    """
+    from cashlog.models.search import search_table_sql
+
+    if get_schema_version(conn) != SCHEMA_VERSION:
+        return False
+    search_tables = search_table_sql()
+    names = ", ".join(f"'{name}'" for name in search_tables)
+    tables, objects = {}, set()
+    for kind, name, sql in conn.execute(text(
+        f"SELECT type, name, sql FROM sqlite_master "
+        f"WHERE type IN ('trigger', 'index') OR (type = 'table' AND name IN ({names}))"
+    )):
+        if kind == "table":
+            tables[name] = sql
+        else:
+            objects.add(name)
+    # 触发器或索引被删除（例如手工修改数据库文件），或唯一索引因重复数据未能建立时，重新执行升级步骤补建
+    return tables == search_tables and set(expected_triggers()) | set(expected_indexes()) <= objects
+
+
+def upgrade_schema(engine) -> None:
+    """
+    对已有数据库执行全部升级步骤，并记录结构版本
+
+    Args:
+        engine: SQLAlchemy引擎
+    """
+    with engine.begin() as conn:
+        for step in UPGRADE_STEPS:
+            step(conn)
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
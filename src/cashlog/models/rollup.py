@@ -0,0 +1,134 @@
+"""按日分类汇总数据模型
+
+daily_category_rollup 按(日期, 分类)保存收入、支出（分）和交易笔数，
+由交易表上的触发器在每次写入时增量维护，报表按天读取汇总行而不是逐条扫描交易。
+"""
+from typing import List
+from sqlalchemy import Column, Date, Integer, String, event, text
+from sqlalchemy.engine import Connection
+from cashlog.models.db import Base
+from cashlog.models.transaction import Transaction
+
+
+class DailyCategoryRollup(Base):
+    """按日分类汇总表模型"""
+    __tablename__ = "daily_category_rollup"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    income = Column(Integer, nullable=False, default=0)
+    expense = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# 维护汇总表的触发器名称
+ROLLUP_TRIGGERS = ["transactions_rollup_ai", "transactions_rollup_ad", "transactions_rollup_au"]
+
+
+def _add_sql(row: str) -> str:
+    """将一条交易计入汇总的语句，row为new或old"""
+    return (
+        "INSERT INTO daily_category_rollup (day, category, income, expense, count) VALUES ("
+        f"date({row}.created_at), {row}.category, "
+        f"CASE WHEN {row}.amount_minor > 0 THEN {row}.amount_minor ELSE 0 END, "
+        f"CASE WHEN {row}.amount_minor < 0 THEN -{row}.amount_minor ELSE 0 END, 1) "
+        "ON CONFLICT (day, category) DO UPDATE SET "
+        "income = income + excluded.income, expense = expense + excluded.expense, count = count + 1;"
+    )
+
+
+def _subtract_sql(row: str) -> str:
+    """将一条交易从汇总中扣除的语句，笔数归零的汇总行随之删除"""
+    where = f"day = date({row}.created_at) AND category = {row}.category"
+    return (
+        "UPDATE daily_category_rollup SET "
+        f"income = income - CASE WHEN {row}.amount_minor > 0 THEN {row}.amount_minor ELSE 0 END, "
+        f"expense = expense - CASE WHEN {row}.amount_minor < 0 THEN -{row}.amount_minor ELSE 0 END, "
+        f"count = count - 1 WHERE {where}; "
+        f"DELETE FROM daily_category_rollup WHERE {where} AND count <= 0;"
+    )
+
+
+def _trigger_sql() -> List[str]:
+    """生成维护汇总表的触发器语句"""
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS transactions_rollup_ai AFTER INSERT ON transactions "
+        f"BEGIN {_add_sql('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS transactions_rollup_ad AFTER DELETE ON transactions "
+        f"BEGIN {_subtract_sql('old')} END",
+        f"CREATE TRIGGER IF NOT EXISTS transactions_rollup_au AFTER UPDATE OF amount_minor, category, created_at "
+        f"ON transactions BEGIN {_subtract_sql('old')} {_add_sql('new')} END",
+    ]
+
+
+def create_rollup_triggers(conn: Connection, rebuild: bool = True) -> bool:
+    """
+    创建维护汇总表的触发器
+
+    触发器缺失期间写入的交易未计入汇总，因此新建触发器时默认同时重建汇总表。
+
+    Args:
+        conn: 数据库连接
+        rebuild: 新建触发器时是否重建汇总表；批量写入已自行补齐汇总时传入False
+
+    Returns:
+        是否新建了触发器
+    """
+    existing = set(conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'transactions'"
+    )).scalars())
+    if set(ROLLUP_TRIGGERS) <= existing:
+        return False
+
+    for statement in _trigger_sql():
+        conn.execute(text(statement))
+    if rebuild:
+        rebuild_rollups(conn)
+    return True
+
+
+def rebuild_rollups(conn: Connection) -> int:
+    """
+    根据交易表全量重建汇总表
+
+    Args:
+        conn: 数据库连接
+
+    Returns:
+        重建后的汇总行数
+    """
+    conn.execute(text("DELETE FROM daily_category_rollup"))
+    conn.execute(text(
+        "INSERT INTO daily_category_rollup (day, category, income, expense, count) "
+        "SELECT date(created_at), category, "
+        "SUM(CASE WHEN amount_minor > 0 THEN amount_minor ELSE 0 END), "
+        "SUM(CASE WHEN amount_minor < 0 THEN -amount_minor ELSE 0 END), "
+        "COUNT(*) FROM transactions GROUP BY date(created_at), category"
+    ))
+    return conn.execute(text("SELECT COUNT(*) FROM daily_category_rollup")).scalar()
+
+
+def add_rollup_rows(conn: Connection, after_id: int) -> None:
+    """
+    将ID大于after_id的交易计入汇总，批量写入时代替逐行触发器
+
+    Args:
+        conn: 数据库连接
+        after_id: 起始ID（不含）
+    """
+    conn.execute(text(
+        "INSERT INTO daily_category_rollup (day, category, income, expense, count) "
+        "SELECT date(created_at), category, "
+        "SUM(CASE WHEN amount_minor > 0 THEN amount_minor ELSE 0 END), "
+        "SUM(CASE WHEN amount_minor < 0 THEN -amount_minor ELSE 0 END), "
+        "COUNT(*) FROM transactions WHERE id > :after_id GROUP BY date(created_at), category "
+        "ON CONFLICT (day, category) DO UPDATE SET "
+        "income = income + excluded.income, expense = expense + excluded.expense, count = count + excluded.count"
+    ), {"after_id": after_id})
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_triggers_with_table(target, connection, **kw):
+    """新建交易表时一并创建汇总触发器"""
+    for statement in _trigger_sql():
+        connection.execute(text(statement))
@@ -1,9 +1,11 @@
 """API响应模型定义"""
 from datetime import datetime
-from typing import Optional
+from typing import Generic, List, Optional, TypeVar
 from pydantic import BaseModel
 from cashlog.models.todo import TodoStatus
 
+T = TypeVar("T")
+
 
 class TodoBase(BaseModel):
     """待办事项基础模型"""
@@ -66,3 +68,21 @@ class Transaction(TransactionBase):
     class Config:
         """配置类"""
         from_attributes = True
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """游标分页响应模型"""
+    items: List[T]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    """全文检索结果模型"""
+    kind: str
+    id: int
+    category: str
+    text: Optional[str] = None
+    snippet: Optional[str] = None
+    score: float
+    created_at: datetime
@@ -0,0 +1,202 @@
+"""全文检索索引
+
+使用SQLite FTS5外部内容表为交易的分类、备注和待办事项的分类、内容建立全文索引。
+索引只保存分词结果，原文仍从业务表读取；业务表上的触发器在每次写入时同步索引，
+因此无论通过ORM、批量SQL还是数据恢复写入，索引都保持一致。
+"""
+import warnings
+from typing import Dict, List
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from cashlog.config import get_setting
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+
+# 可选分词器
+# trigram: 按三字符切分，支持中文等无空格分隔的文本，查询词至少需要3个字符
+# unicode61: 按空白和标点切分，适合英文等以空格分词的文本
+FTS_TOKENIZERS: Dict[str, str] = {
+    "trigram": "trigram",
+    "unicode61": "unicode61 remove_diacritics 2",
+}
+
+DEFAULT_TOKENIZER = "trigram"
+
+# trigram分词器能够匹配的最短查询词长度
+TRIGRAM_MIN_LENGTH = 3
+
+# 全文索引定义：记录类型 -> (业务表, 索引表, 索引列)
+FTS_INDEXES: Dict[str, tuple] = {
+    "transaction": ("transactions", "transactions_fts", ["category", "notes"]),
+    "todo": ("todos", "todos_fts", ["category", "content"]),
+}
+
+
+# 同步全文索引的触发器名称
+SEARCH_TRIGGERS: List[str] = [
+    f"{fts_name}_{suffix}" for _, fts_name, _ in FTS_INDEXES.values() for suffix in ("ai", "ad", "au")
+]
+
+
+def get_fts_tokenizer() -> str:
+    """
+    获取当前配置的全文检索分词器
+
+    优先读取环境变量 CASHLOG_FTS_TOKENIZER，其次读取配置文件中的 fts_tokenizer。
+
+    Returns:
+        分词器名称
+
+    Raises:
+        ValueError: 当分词器名称无效时
+    """
+    tokenizer = str(get_setting("fts_tokenizer", "CASHLOG_FTS_TOKENIZER", DEFAULT_TOKENIZER)).strip().lower()
+    if tokenizer not in FTS_TOKENIZERS:
+        raise ValueError(f"未知的全文检索分词器: {tokenizer}，可选值: {', '.join(FTS_TOKENIZERS)}")
+    return tokenizer
+
+
+def resolve_fts_tokenizer() -> str:
+    """
+    获取建立和查询全文索引时使用的分词器，配置无效时改用 DEFAULT_TOKENIZER 并给出警告
+
+    初始化数据库时即会读取分词器，配置错误不应让所有命令都无法运行，因此这里不抛出异常。
+
+    Returns:
+        分词器名称
+    """
+    try:
+        return get_fts_tokenizer()
+    except ValueError as e:
+        warnings.warn(f"{e}，已改用 {DEFAULT_TOKENIZER} 分词器", RuntimeWarning, stacklevel=2)
+        return DEFAULT_TOKENIZER
+
+
+def _create_table_sql(kind: str, tokenizer: str) -> str:
+    """生成全文索引表的建表语句"""
+    table_name, fts_name, columns = FTS_INDEXES[kind]
+    return (
+        f"CREATE VIRTUAL TABLE {fts_name} USING fts5("
+        f"{', '.join(columns)}, content='{table_name}', content_rowid='id', "
+        f"tokenize='{FTS_TOKENIZERS[tokenizer]}')"
+    )
+
+
+def _trigger_sql(kind: str) -> List[str]:
+    """生成同步全文索引的触发器语句"""
+    table_name, fts_name, columns = FTS_INDEXES[kind]
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts_name}(rowid, {names}) VALUES (new.id, {new_values});"
+    delete = f"INSERT INTO {fts_name}({fts_name}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {table_name} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {table_name} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE OF {names} ON {table_name} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def create_search_index(conn: Connection, kind: str, tokenizer: str = None, rebuild: bool = True) -> bool:
+    """
+    创建全文索引表和同步触发器，已存在且分词器一致时不做修改
+
+    分词器变更后会删除旧索引表并按新分词器重建；同步触发器有缺失时补建触发器并默认重建索引。
+
+    Args:
+        conn: 数据库连接
+        kind: 记录类型，transaction 或 todo
+        tokenizer: 分词器名称，默认使用当前配置
+        rebuild: 补建触发器时是否重建索引；批量写入已自行补齐索引时传入False
+
+    Returns:
+        是否新建或重建了索引表
+    """
+    tokenizer = tokenizer or resolve_fts_tokenizer()
+    _, fts_name, _ = FTS_INDEXES[kind]
+    create_sql = _create_table_sql(kind, tokenizer)
+
+    existing_sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts_name}
+    ).scalar()
+    created = existing_sql != create_sql
+    if created:
+        if existing_sql is not None:
+            conn.execute(text(f"DROP TABLE {fts_name}"))
+        conn.execute(text(create_sql))
+
+    # 触发器缺失期间的写入没有同步到索引，补建触发器时一并重建索引
+    trigger_names = [name for name in SEARCH_TRIGGERS if name.startswith(f"{fts_name}_")]
+    missing = rebuild and not created and _missing_triggers(conn, trigger_names)
+    for statement in _trigger_sql(kind):
+        conn.execute(text(statement))
+    if created or missing:
+        rebuild_search_index(conn, kind)
+    return created
+
+
+def _missing_triggers(conn: Connection, names: List[str]) -> bool:
+    """检查指定的触发器是否有缺失"""
+    existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    return not set(names) <= existing
+
+
+def search_table_sql(tokenizer: str = None) -> Dict[str, str]:
+    """
+    生成各全文索引表按当前分词器应有的建表语句
+
+    Args:
+        tokenizer: 分词器名称，默认使用当前配置
+
+    Returns:
+        {索引表名: 建表语句}
+    """
+    tokenizer = tokenizer or resolve_fts_tokenizer()
+    return {FTS_INDEXES[kind][1]: _create_table_sql(kind, tokenizer) for kind in FTS_INDEXES}
+
+
+def rebuild_search_index(conn: Connection, kind: str) -> None:
+    """
+    根据业务表全量重建全文索引
+
+    Args:
+        conn: 数据库连接
+        kind: 记录类型，transaction 或 todo
+    """
+    _, fts_name, _ = FTS_INDEXES[kind]
+    conn.execute(text(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"))
+
+
+def index_rows(conn: Connection, kind: str, after_id: int) -> None:
+    """
+    将ID大于after_id的记录加入全文索引，批量写入时代替逐行触发器
+
+    Args:
+        conn: 数据库连接
+        kind: 记录类型，transaction 或 todo
+        after_id: 起始ID（不含）
+    """
+    table_name, fts_name, columns = FTS_INDEXES[kind]
+    names = ", ".join(columns)
+    conn.execute(
+        text(f"INSERT INTO {fts_name}(rowid, {names}) SELECT id, {names} FROM {table_name} WHERE id > :after_id"),
+        {"after_id": after_id}
+    )
+
+
+def _register_ddl_events(model, kind: str) -> None:
+    """随业务表一起创建和删除全文索引"""
+    fts_name = FTS_INDEXES[kind][1]
+
+    @event.listens_for(model.__table__, "after_create")
+    def _after_create(target, connection, **kw):
+        create_search_index(connection, kind)
+
+    @event.listens_for(model.__table__, "after_drop")
+    def _after_drop(target, connection, **kw):
+        connection.execute(text(f"DROP TABLE IF EXISTS {fts_name}"))
+
+
+_register_ddl_events(Transaction, "transaction")
+_register_ddl_events(Todo, "todo")
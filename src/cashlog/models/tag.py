@@ -0,0 +1,162 @@
+"""标签数据模型
+
+交易和待办事项的 tags 字段仍保存原始的逗号分隔字符串用于展示，
+同时在 tags 表和关联表中维护规范化的标签，供按标签筛选时走索引连接。
+"""
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table, event, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+from cashlog.models.db import Base
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+
+
+class Tag(Base):
+    """标签表模型"""
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), nullable=False, unique=True)
+
+    @staticmethod
+    def parse(tags: Optional[str]) -> List[str]:
+        """
+        解析逗号分隔的标签字符串
+
+        Args:
+            tags: 标签字符串
+
+        Returns:
+            去除空白、去重后的标签列表，保持原有顺序
+        """
+        if not tags:
+            return []
+        names = []
+        for name in tags.split(","):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
+
+# 交易-标签关联表
+transaction_tags = Table(
+    "transaction_tags",
+    Base.metadata,
+    Column("transaction_id", Integer, ForeignKey("transactions.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_transaction_tags_tag_id", "tag_id", "transaction_id"),
+)
+
+# 待办事项-标签关联表
+todo_tags = Table(
+    "todo_tags",
+    Base.metadata,
+    Column("todo_id", Integer, ForeignKey("todos.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_todo_tags_tag_id", "tag_id", "todo_id"),
+)
+
+# 关联表与所属记录ID列
+LINK_TABLES = {
+    "transaction": (transaction_tags, transaction_tags.c.transaction_id),
+    "todo": (todo_tags, todo_tags.c.todo_id),
+}
+
+
+# 删除记录时清理标签关联的触发器：触发器名称 -> (所属表, 关联表, 关联列)
+# SQLite默认不启用外键约束，关联表上的 ON DELETE CASCADE 不会生效；交易与待办事项互相引用，
+# 启用外键约束会让删除和恢复受写入顺序限制，因此与汇总、墓碑一样由触发器维护
+LINK_CLEANUP_TRIGGERS = {
+    "transactions_tags_ad": ("transactions", "transaction_tags", "transaction_id"),
+    "todos_tags_ad": ("todos", "todo_tags", "todo_id"),
+}
+
+
+def _create_cleanup_trigger(conn: Connection, name: str) -> None:
+    """创建删除记录时清理其标签关联的触发器"""
+    table_name, link_table, owner_column = LINK_CLEANUP_TRIGGERS[name]
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {name} AFTER DELETE ON {table_name} "
+        f"BEGIN DELETE FROM {link_table} WHERE {owner_column} = old.id; END"
+    ))
+
+
+def create_link_cleanup_triggers(conn: Connection) -> None:
+    """
+    创建清理标签关联的触发器，并删除所属记录已不存在的关联，可重复执行
+
+    Args:
+        conn: 数据库连接
+    """
+    for name, (table_name, link_table, owner_column) in LINK_CLEANUP_TRIGGERS.items():
+        _create_cleanup_trigger(conn, name)
+        conn.execute(text(
+            f"DELETE FROM {link_table} WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {table_name} WHERE {table_name}.id = {link_table}.{owner_column})"
+        ))
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_transaction_cleanup_trigger(target, connection, **kw):
+    """新建交易表时一并创建清理标签关联的触发器"""
+    _create_cleanup_trigger(connection, "transactions_tags_ad")
+
+
+@event.listens_for(Todo.__table__, "after_create")
+def _create_todo_cleanup_trigger(target, connection, **kw):
+    """新建待办事项表时一并创建清理标签关联的触发器"""
+    _create_cleanup_trigger(connection, "todos_tags_ad")
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_tag_links(session, flush_context, instances):
+    """在flush前根据tags字段同步标签关联，覆盖所有通过ORM写入的路径"""
+    pending_tags = {obj.name: obj for obj in session.new if isinstance(obj, Tag)}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, (Transaction, Todo)):
+            continue
+        if obj not in session.new and not attributes.get_history(obj, "tags").has_changes():
+            continue
+
+        tag_objects = []
+        with session.no_autoflush:
+            for name in Tag.parse(obj.tags):
+                tag = pending_tags.get(name)
+                if tag is None:
+                    tag = session.query(Tag).filter(Tag.name == name).first()
+                if tag is None:
+                    tag = Tag(name=name)
+                    session.add(tag)
+                pending_tags[name] = tag
+                tag_objects.append(tag)
+        obj.tag_objects = tag_objects
+
+
+def link_tags(conn: Connection, kind: str, rows: Iterable[Tuple[int, Optional[str]]]) -> None:
+    """
+    批量为记录建立标签关联（不经过ORM，用于数据迁移和批量导入）
+
+    Args:
+        conn: 数据库连接
+        kind: 记录类型，transaction 或 todo
+        rows: (记录ID, 标签字符串) 列表
+    """
+    link_table, owner_column = LINK_TABLES[kind]
+    pairs = [(owner_id, name) for owner_id, tags in rows for name in Tag.parse(tags)]
+    if not pairs:
+        return
+
+    names = sorted({name for _, name in pairs})
+    conn.execute(text("INSERT OR IGNORE INTO tags (name) VALUES (:name)"), [{"name": name} for name in names])
+    tag_ids = {}
+    # 分批查询，避免超出SQLite变量数量限制
+    for start in range(0, len(names), 500):
+        batch = names[start:start + 500]
+        tag_ids.update(conn.execute(select(Tag.name, Tag.id).where(Tag.name.in_(batch))).all())
+
+    conn.execute(
+        link_table.insert().prefix_with("OR IGNORE"),
+        [{owner_column.name: owner_id, "tag_id": tag_ids[name]} for owner_id, name in pairs]
+    )
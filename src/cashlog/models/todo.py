@@ -1,6 +1,6 @@
 """待办事项数据模型"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy import Enum as SQLEnum
 import enum
@@ -17,6 +17,16 @@ class TodoStatus(str, enum.Enum):
 class Todo(Base):
     """待办事项表模型"""
     __tablename__ = "todos"
+    __table_args__ = (
+        # 按状态筛选并按截止时间范围筛选
+        Index("ix_todos_status_deadline", "status", "deadline"),
+        # 列表按创建时间排序
+        Index("ix_todos_created_at", "created_at"),
+        # 一个交易最多关联一个待办事项，同时加速按交易ID反查待办
+        Index("ux_todos_transaction_id", "transaction_id", unique=True),
+        # 增量备份按修改时间找出变更的记录
+        Index("ix_todos_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -30,6 +40,8 @@ class Todo(Base):
     
     # 关联关系
     transaction = relationship("Transaction", back_populates="todo")
+    # 规范化标签，由tags字段在flush前自动同步
+    tag_objects = relationship("Tag", secondary="todo_tags")
 
     @property
     def status_text(self):
@@ -1,16 +1,27 @@
 """交易数据模型"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from cashlog.models.db import Base
+from cashlog.utils.money import MINOR_UNITS, from_minor, to_minor
 
 
 class Transaction(Base):
     """交易记录表模型"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # 列表、月份筛选和报表均按时间范围扫描
+        Index("ix_transactions_created_at", "created_at"),
+        # 报表分类筛选：分类等值 + 时间范围
+        Index("ix_transactions_category_created_at", "category", "created_at"),
+        # 增量备份按修改时间找出变更的记录
+        Index("ix_transactions_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    # 金额以整数最小货币单位（分）保存，通过amount属性按元读写
+    amount_minor = Column(Integer, nullable=False)
     category = Column(String(50), nullable=False)
     tags = Column(String(200), nullable=True)
     notes = Column(Text, nullable=True)
@@ -19,11 +30,26 @@ class Transaction(Base):
     
     # 关联关系
     todo = relationship("Todo", back_populates="transaction", uselist=False, primaryjoin="Transaction.id == Todo.transaction_id")
+    # 规范化标签，由tags字段在flush前自动同步
+    tag_objects = relationship("Tag", secondary="transaction_tags")
+
+    @hybrid_property
+    def amount(self):
+        """金额（元）"""
+        return from_minor(self.amount_minor)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_minor = to_minor(value)
+
+    @amount.expression
+    def amount(cls):
+        return cls.amount_minor / MINOR_UNITS
 
     @property
     def transaction_type(self):
         """根据金额判断交易类型"""
-        return "收入" if self.amount > 0 else "支出"
+        return "收入" if self.amount_minor > 0 else "支出"
 
     @property
     def month(self):
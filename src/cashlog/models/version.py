@@ -0,0 +1,105 @@
+"""数据版本
+
+data_version 表只有一行，保存数据库实例令牌和交易数据的变更计数。
+交易表上的触发器在每次写入时递增计数，报表缓存以(令牌, 计数)判断结果是否仍然有效；
+令牌在建表和恢复备份时重新生成，保证不同数据库文件、恢复前后的计数不会混用。
+"""
+import uuid
+from typing import Optional, Tuple
+from sqlalchemy import Column, Integer, String, event, text
+from sqlalchemy.engine import Connection
+from cashlog.models.db import Base
+from cashlog.models.transaction import Transaction
+
+
+class DataVersion(Base):
+    """数据版本表模型"""
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    token = Column(String(32), nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# 递增变更计数的触发器：触发器名称 -> 触发事件
+VERSION_TRIGGERS = {
+    "transactions_version_ai": "AFTER INSERT",
+    "transactions_version_ad": "AFTER DELETE",
+    "transactions_version_au": "AFTER UPDATE",
+}
+
+
+def new_token() -> str:
+    """生成新的实例令牌"""
+    return uuid.uuid4().hex
+
+
+def _insert_version_row(conn: Connection) -> None:
+    """写入初始数据版本行，已存在时不做修改"""
+    conn.execute(
+        text("INSERT OR IGNORE INTO data_version (id, token, version) VALUES (1, :token, 0)"),
+        {"token": new_token()}
+    )
+
+
+def _create_triggers(conn: Connection) -> None:
+    """创建交易写入时递增变更计数的触发器"""
+    for name, timing in VERSION_TRIGGERS.items():
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {timing} ON transactions "
+            f"BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END"
+        ))
+
+
+def create_version_triggers(conn: Connection) -> None:
+    """
+    初始化数据版本行并创建递增计数的触发器，可重复执行；补建缺失的触发器时递增一次变更计数
+
+    Args:
+        conn: 数据库连接
+    """
+    _insert_version_row(conn)
+    existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    _create_triggers(conn)
+    if not set(VERSION_TRIGGERS) <= existing:
+        # 触发器缺失期间的写入没有递增计数，补建时递增一次使已有的报表缓存失效
+        bump_data_version(conn)
+
+
+def bump_data_version(conn: Connection) -> None:
+    """
+    递增变更计数，批量写入时代替逐行触发器
+
+    Args:
+        conn: 数据库连接
+    """
+    conn.execute(text("UPDATE data_version SET version = version + 1 WHERE id = 1"))
+
+
+def get_data_version(conn) -> Tuple[Optional[str], int]:
+    """
+    读取当前数据版本
+
+    Args:
+        conn: 数据库连接或会话
+
+    Returns:
+        (实例令牌, 变更计数)，尚未初始化时返回(None, 0)
+    """
+    row = conn.execute(text("SELECT token, version FROM data_version WHERE id = 1")).first()
+    if row is None:
+        return None, 0
+    return row[0], row[1]
+
+
+# 两张表的创建顺序不固定，分别在各自建表后完成初始化
+@event.listens_for(DataVersion.__table__, "after_create")
+def _init_with_table(target, connection, **kw):
+    """新建数据版本表时写入初始行"""
+    _insert_version_row(connection)
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_triggers_with_table(target, connection, **kw):
+    """新建交易表时一并创建变更计数触发器"""
+    _create_triggers(connection)
@@ -1,6 +1,20 @@
-"""业务逻辑服务包"""
-from cashlog.services.transaction_service import TransactionService
-from cashlog.services.todo_service import TodoService
-from cashlog.services.report_service import ReportService
+"""业务逻辑服务包
 
-__all__ = ["TransactionService", "TodoService", "ReportService"]
+各服务类在首次访问时才导入对应模块。
+"""
+import importlib
+
+_EXPORTS = {
+    "TransactionService": "cashlog.services.transaction_service",
+    "TodoService": "cashlog.services.todo_service",
+    "ReportService": "cashlog.services.report_service",
+    "SearchService": "cashlog.services.search_service",
+}
+
+__all__ = ["TransactionService", "TodoService", "ReportService", "SearchService"]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,22 +3,52 @@ import os
 import shutil
 import sqlite3
 import datetime
+import gzip
+import lzma
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Tuple
+from cashlog.config import get_setting
 from cashlog.models.db import DB_PATH
 
+# 在线备份默认每步复制的页数
+DEFAULT_BACKUP_PAGES_PER_STEP = 1024
+# 在线备份默认每步之间的休眠时间（毫秒）
+DEFAULT_BACKUP_SLEEP_MS = 10
+# 备份压缩格式: 格式名 -> (文件后缀, 文件头魔数)
+COMPRESSION_FORMATS = {
+    "gzip": (".gz", b"\x1f\x8b"),
+    "xz": (".xz", b"\xfd7zXZ\x00"),
+    "zstd": (".zst", b"\x28\xb5\x2f\xfd"),
+}
+# 流式压缩/解压时每次读写的字节数
+COMPRESSION_CHUNK_SIZE = 1024 * 1024
+
 
 class DataService:
     """数据服务类，处理备份和恢复操作"""
     
     @staticmethod
-    def create_backup(output_path: Optional[str] = None, overwrite: bool = False) -> str:
+    def create_backup(output_path: Optional[str] = None, overwrite: bool = False,
+                      pages_per_step: Optional[int] = None, sleep_ms: Optional[int] = None,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      compress: Optional[str] = None) -> str:
         """
         创建数据库备份
+
+        使用SQLite在线备份接口分批复制页面，每批之间休眠以限制备份I/O，
+        备份期间其他连接可以继续读写。先写入临时文件，校验通过后再替换目标文件。
+        指定压缩格式时，在线备份接口只能写入数据库文件，因此先在目标目录生成未压缩的临时副本，
+        按块流式写入压缩器后立即删除：目标目录的峰值占用约为数据库大小加压缩后的大小，
+        开始前检查可用空间是否足够。
         
         Args:
             output_path: 备份文件路径，如果为None则使用默认路径
             overwrite: 是否覆盖已有文件
+            pages_per_step: 每步复制的页数，默认读取配置 backup_pages_per_step
+            sleep_ms: 每步之间休眠的毫秒数，默认读取配置 backup_sleep_ms
+            progress: 每步完成后调用，参数为(已复制页数, 总页数)
+            compress: 压缩格式，可选gzip、xz、zstd（需安装zstandard），为None时不压缩
             
         Returns:
             备份文件的绝对路径
@@ -31,6 +61,12 @@ class DataService:
         # 确保原数据库文件存在
         if not os.path.exists(DB_PATH):
             raise IOError(f"原数据库文件不存在: {DB_PATH}")
+
+        if compress and compress not in COMPRESSION_FORMATS:
+            raise ValueError(f"不支持的压缩格式: {compress}，可选: {', '.join(COMPRESSION_FORMATS)}")
+        if compress == "zstd":
+            DataService._require_zstandard()
+        suffix = ".db" + (COMPRESSION_FORMATS[compress][0] if compress else "")
         
         # 确定备份文件路径
         if not output_path:
@@ -39,7 +75,7 @@ class DataService:
             os.makedirs(backup_dir, exist_ok=True)
             
             today = datetime.datetime.now().strftime("%Y%m%d")
-            output_path = os.path.join(backup_dir, f"backup_{today}.db")
+            output_path = os.path.join(backup_dir, f"backup_{today}{suffix}")
         else:
             # 验证输出路径
             output_path = os.path.expanduser(output_path)
@@ -50,37 +86,198 @@ class DataService:
                 raise ValueError(f"输出目录不存在: {output_dir}")
             
             # 验证文件后缀
-            if not output_path.endswith(".db"):
-                raise ValueError("备份文件必须以.db为后缀")
+            if not output_path.endswith(suffix):
+                raise ValueError(f"备份文件必须以{suffix}为后缀")
         
         # 检查文件是否已存在
         if os.path.exists(output_path) and not overwrite:
             raise FileExistsError(f"备份文件已存在: {output_path}，使用-f参数覆盖")
         
+        default_pages, default_sleep = DataService._get_backup_throttle()
+        pages_per_step = default_pages if pages_per_step is None else pages_per_step
+        sleep_ms = default_sleep if sleep_ms is None else sleep_ms
+        if pages_per_step < 1 or sleep_ms < 0:
+            raise ValueError("每步页数必须为正整数，休眠时间不能为负数")
+
+        # 临时副本放在目标目录，与最终备份位于同一文件系统，os.replace 不跨文件系统复制
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        packed_path = f"{tmp_path}{COMPRESSION_FORMATS[compress][0]}" if compress else tmp_path
+        DataService._check_free_space(os.path.dirname(os.path.abspath(output_path)))
         try:
             # 执行备份
-            shutil.copy2(DB_PATH, output_path)
+            DataService._online_backup(str(DB_PATH), tmp_path, pages_per_step, sleep_ms, progress)
+            # 备份文件是独立的单文件副本，不沿用源数据库的WAL模式
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                conn.close()
             
             # 验证备份文件是否为有效的SQLite数据库
-            if not DataService._is_valid_sqlite_db(output_path):
-                os.remove(output_path)  # 删除无效的备份文件
+            if not DataService._is_valid_sqlite_db(tmp_path):
                 raise IOError("创建的备份文件无效")
+
+            if compress:
+                with open(tmp_path, "rb") as src, DataService._open_compressed(packed_path, compress, "wb") as dst:
+                    shutil.copyfileobj(src, dst, COMPRESSION_CHUNK_SIZE)
+                # 压缩完成后立即释放未压缩副本占用的空间
+                os.remove(tmp_path)
             
+            os.replace(packed_path, output_path)
             return os.path.abspath(output_path)
         except Exception as e:
             if isinstance(e, (FileExistsError, ValueError, IOError)):
                 raise
             raise IOError(f"备份失败: {str(e)}")
+        finally:
+            for path in {tmp_path, packed_path}:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _check_free_space(directory: str) -> None:
+        """
+        检查目录所在文件系统能否容纳一份未压缩的数据库副本
+
+        Raises:
+            IOError: 当可用空间不足时
+        """
+        required = os.path.getsize(DB_PATH)
+        wal_path = f"{DB_PATH}-wal"
+        if os.path.exists(wal_path):
+            required += os.path.getsize(wal_path)
+        free = shutil.disk_usage(directory).free
+        if free < required:
+            raise IOError(f"备份目录可用空间不足: 需要约 {required / 1024 / 1024:.1f} MB，"
+                          f"可用 {free / 1024 / 1024:.1f} MB")
+
+    @staticmethod
+    def _require_zstandard():
+        """导入zstandard，未安装时给出安装提示"""
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd压缩需要安装zstandard: pip install zstandard")
+        return zstandard
+
+    @staticmethod
+    def _open_compressed(path: str, compression: str, mode: str):
+        """
+        以流的方式打开压缩文件
+
+        Args:
+            path: 文件路径
+            compression: 压缩格式，gzip、xz或zstd
+            mode: "rb"或"wb"
+
+        Returns:
+            可按块读写的文件对象
+        """
+        if compression == "gzip":
+            return gzip.open(path, mode, compresslevel=6)
+        if compression == "xz":
+            return lzma.open(path, mode)
+        zstandard = DataService._require_zstandard()
+        raw = open(path, mode)
+        if mode == "wb":
+            return zstandard.ZstdCompressor().stream_writer(raw)
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+
+    @staticmethod
+    def _detect_compression(path: str) -> Optional[str]:
+        """
+        根据文件头魔数识别备份文件的压缩格式
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            压缩格式名，未压缩时返回None
+        """
+        with open(path, "rb") as f:
+            header = f.read(8)
+        for name, (_, magic) in COMPRESSION_FORMATS.items():
+            if header.startswith(magic):
+                return name
+        return None
+
+    @staticmethod
+    def _get_backup_throttle() -> Tuple[int, int]:
+        """
+        读取在线备份的限速配置
+
+        配置项：
+        - backup_pages_per_step / CASHLOG_BACKUP_PAGES_PER_STEP：每步复制的页数，默认1024
+        - backup_sleep_ms / CASHLOG_BACKUP_SLEEP_MS：每步之间休眠的毫秒数，默认10
+
+        Returns:
+            (每步页数, 休眠毫秒数)
+
+        Raises:
+            ValueError: 当配置不是有效整数时
+        """
+        raw_pages = get_setting("backup_pages_per_step", "CASHLOG_BACKUP_PAGES_PER_STEP", DEFAULT_BACKUP_PAGES_PER_STEP)
+        raw_sleep = get_setting("backup_sleep_ms", "CASHLOG_BACKUP_SLEEP_MS", DEFAULT_BACKUP_SLEEP_MS)
+        try:
+            pages, sleep_ms = int(raw_pages), int(raw_sleep)
+        except (TypeError, ValueError):
+            raise ValueError(f"备份限速配置无效: backup_pages_per_step={raw_pages}, backup_sleep_ms={raw_sleep}")
+        return pages, sleep_ms
+
+    @staticmethod
+    def _online_backup(source_path: str, target_path: str, pages_per_step: int, sleep_ms: int,
+                       progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        使用SQLite在线备份接口复制数据库
+
+        目标在整个复制过程中处于同一个写事务内，复制完成才提交；中途失败或进程崩溃时目标保持原样。
+
+        WAL模式下在源连接上保持一个读事务，各步都读取同一快照：其他连接的写入不会使备份重新开始，
+        也不会被备份阻塞。回滚日志模式下不保持读事务，避免长时间阻塞写入，
+        期间有写入时SQLite会自动从头重新复制，保证结果一致。
+
+        Args:
+            source_path: 源数据库路径
+            target_path: 目标文件路径
+            pages_per_step: 每步复制的页数
+            sleep_ms: 每步之间休眠的毫秒数
+            progress: 每步完成后调用，参数为(已复制页数, 总页数)
+        """
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def on_step(status, remaining, total):
+                if progress:
+                    progress(total - remaining, total)
+                if remaining and sleep_ms:
+                    time.sleep(sleep_ms / 1000)
+
+            source.backup(target, pages=pages_per_step, progress=on_step)
+        finally:
+            target.close()
+            source.close()
     
     @staticmethod
-    def restore_backup(input_path: str, backup_current: bool = True, confirm: bool = True) -> dict:
+    def restore_backup(input_path: str, backup_current: bool = True, confirm: bool = True,
+                       until: Optional[str] = None, progress: Optional[Callable[[int, int], None]] = None) -> dict:
         """
         从备份文件恢复数据库
+
+        按文件头自动识别gzip、xz、zstd压缩的备份，先流式解压再恢复。
+        input_path为增量备份链目录时，先重放备份链重建数据库再恢复。
+        数据通过SQLite在线备份接口在一个事务内写入当前数据库，恢复中途失败不会留下写了一半的数据库，
+        其他进程已打开的连接在下次读取时即可看到恢复后的数据。
         
         Args:
-            input_path: 备份文件路径
+            input_path: 备份文件路径或增量备份链目录
             backup_current: 是否先备份当前数据库
             confirm: 是否需要确认
+            until: 增量备份链的恢复时间点，默认恢复到最新
+            progress: 每步写入后调用，参数为(已复制页数, 总页数)
             
         Returns:
             恢复结果信息
@@ -96,9 +293,65 @@ class DataService:
         # 检查备份文件是否存在
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"备份文件不存在: {input_path}")
-        
+
+        is_chain = os.path.isdir(input_path)
+        if until and not is_chain:
+            raise ValueError("只有增量备份链支持指定恢复时间点")
+
+        # 压缩的备份先流式解压到数据库目录下的临时文件
+        compression = None if is_chain else DataService._detect_compression(input_path)
+        if not is_chain and not compression:
+            return DataService._restore_file(input_path, input_path, backup_current, progress)
+
+        source_path = os.path.join(os.path.dirname(DB_PATH), f".restore_{os.getpid()}.tmp")
+        try:
+            if not is_chain:
+                DataService._decompress_file(input_path, source_path, compression)
+                return DataService._restore_file(input_path, source_path, backup_current, progress)
+
+            from cashlog.services.incremental_service import IncrementalBackupService
+
+            chain = IncrementalBackupService.materialize(input_path, source_path, until)
+            result = DataService._restore_file(input_path, source_path, backup_current, progress)
+            result["restored_point"] = chain["point"]
+            return result
+        finally:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+
+    @staticmethod
+    def _decompress_file(input_path: str, output_path: str, compression: str) -> None:
+        """
+        将压缩的备份文件流式解压到指定路径
+
+        Raises:
+            ValueError: 当文件损坏无法解压时
+        """
+        try:
+            with DataService._open_compressed(input_path, compression, "rb") as src, open(output_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, COMPRESSION_CHUNK_SIZE)
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            raise ValueError(f"无法解压{compression}备份文件: {str(e)}")
+
+    @staticmethod
+    def _restore_file(input_path: str, source_path: str, backup_current: bool,
+                      progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        用未压缩的数据库文件替换当前数据库
+
+        Args:
+            input_path: 用户指定的备份文件路径，用于结果展示
+            source_path: 实际用于恢复的SQLite文件路径
+            backup_current: 是否先备份当前数据库
+            progress: 每步写入后调用，参数为(已复制页数, 总页数)
+
+        Returns:
+            恢复结果信息
+        """
+        from cashlog.models.db import dispose_engine
+
         # 验证备份文件是否为有效的SQLite数据库
-        if not DataService._is_valid_sqlite_db(input_path):
+        if not DataService._is_valid_sqlite_db(source_path):
             raise ValueError("无效的SQLite数据库文件")
         
         # 如果需要，先备份当前数据库
@@ -108,15 +361,20 @@ class DataService:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_dir = os.path.join(os.path.dirname(DB_PATH), "backups")
             os.makedirs(backup_dir, exist_ok=True)
-            current_backup_path = os.path.join(backup_dir, f"pre_restore_{timestamp}.db")
-            shutil.copy2(DB_PATH, current_backup_path)
+            current_backup_path = DataService.create_backup(
+                output_path=os.path.join(backup_dir, f"pre_restore_{timestamp}.db"), overwrite=True
+            )
         
         try:
             # 获取恢复前的数据统计
             before_stats = DataService._get_database_stats() if os.path.exists(DB_PATH) else {}
             
-            # 执行恢复
-            shutil.copy2(input_path, DB_PATH)
+            # 执行恢复：整个复制在当前数据库的一个写事务内完成，不需要休眠让出I/O
+            pages_per_step, _ = DataService._get_backup_throttle()
+            DataService._online_backup(source_path, str(DB_PATH), pages_per_step, 0, progress)
+            DataService._rotate_data_token()
+            # 丢弃连接池中的连接，本进程之后的查询重新打开数据库
+            dispose_engine()
             
             # 获取恢复后的数据统计
             after_stats = DataService._get_database_stats()
@@ -128,17 +386,64 @@ class DataService:
                 "after_stats": after_stats
             }
         except Exception as e:
-            # 如果发生错误，尝试恢复原来的数据库
-            if current_backup_path and os.path.exists(current_backup_path):
-                try:
-                    shutil.copy2(current_backup_path, DB_PATH)
-                except:
-                    pass  # 忽略恢复失败的错误
-            
             if isinstance(e, (FileNotFoundError, ValueError)):
                 raise
             raise IOError(f"恢复失败: {str(e)}")
     
+    @staticmethod
+    def get_database_info() -> dict:
+        """
+        获取数据库运行信息，包括当前性能档位和实际生效的PRAGMA
+
+        Returns:
+            数据库路径、文件大小、性能档位及PRAGMA取值
+        """
+        from cashlog.models.db import get_active_profile, get_engine
+
+        pragmas = {}
+        with get_engine().connect() as conn:
+            for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout", "temp_store"):
+                pragmas[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+        return {
+            "db_path": os.path.abspath(DB_PATH),
+            "file_size": os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0,
+            "profile": get_active_profile(),
+            "pragmas": pragmas
+        }
+
+    @staticmethod
+    def rebuild_rollups() -> int:
+        """
+        根据交易表全量重建按日分类汇总
+
+        Returns:
+            重建后的汇总行数
+        """
+        from cashlog.models.db import get_engine
+        from cashlog.models.rollup import rebuild_rollups
+
+        with get_engine().begin() as conn:
+            return rebuild_rollups(conn)
+
+    @staticmethod
+    def _rotate_data_token() -> None:
+        """为恢复后的数据库生成新的实例令牌，使基于恢复前数据的报表缓存失效"""
+        from cashlog.models.version import new_token
+
+        if not os.path.exists(DB_PATH):
+            return
+        try:
+            conn = sqlite3.connect(str(DB_PATH))
+            try:
+                with conn:
+                    conn.execute("UPDATE data_version SET token = ? WHERE id = 1", (new_token(),))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            # 旧版本备份没有数据版本表，下次初始化数据库时会自动创建
+            pass
+
     @staticmethod
     def _is_valid_sqlite_db(db_path: str) -> bool:
         """
@@ -168,30 +473,21 @@ class DataService:
             return False
     
     @staticmethod
-    def _get_database_stats() -> dict:
+    def _get_database_stats(exact: bool = False) -> dict:
         """
         获取数据库统计信息
+
+        默认返回估算的行数，不扫描表数据，详见 StatsService.get_row_counts。
         
+        Args:
+            exact: 是否统计准确行数
+
         Returns:
             数据库统计信息
         """
+        from cashlog.services.stats_service import StatsService
+
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            # 获取表信息
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            
-            stats = {"tables": {}}
-            for table in tables:
-                table_name = table[0]
-                # 获取表中的记录数
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = cursor.fetchone()[0]
-                stats["tables"][table_name] = count
-            
-            conn.close()
-            return stats
+            return StatsService.get_row_counts(str(DB_PATH), exact)
         except:
             return {}
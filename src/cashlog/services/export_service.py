@@ -0,0 +1,220 @@
+"""数据导出服务
+
+将交易或待办事项按筛选条件导出为 CSV、JSON Lines 等文本格式或 Parquet 文件，供分析工具读取。
+查询只选取导出所需的列并按批次从数据库游标读取，记录逐条写出，内存占用与导出行数无关；
+Parquet 按行组缓冲和写出，内存占用以行组大小为上限。Parquet 导出依赖可选的 pyarrow。
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy.orm import Session
+from cashlog.models.todo import Todo
+from cashlog.models.transaction import Transaction
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import STREAM_BATCH_SIZE, TransactionService
+from cashlog.utils.money import CURRENCY_DECIMALS
+from cashlog.utils.writers import (
+    OUTPUT_FORMATS, TODO_FIELDS, TRANSACTION_FIELDS, todo_record, transaction_record, write_records
+)
+
+# 可导出的表：表名 -> (模型, 查询列, 记录转换函数, 输出字段)
+EXPORT_TABLES: Dict[str, tuple] = {
+    "transactions": (
+        Transaction,
+        ["id", "amount_minor", "category", "tags", "notes", "created_at", "updated_at"],
+        transaction_record,
+        TRANSACTION_FIELDS,
+    ),
+    "todos": (
+        Todo,
+        ["id", "content", "category", "status", "tags", "deadline", "transaction_id", "created_at", "updated_at"],
+        todo_record,
+        TODO_FIELDS,
+    ),
+}
+
+# 支持的导出格式
+EXPORT_FORMATS = OUTPUT_FORMATS + ["parquet"]
+
+# Parquet 默认每个行组的行数
+DEFAULT_ROW_GROUP_SIZE = 100000
+
+
+class ExportService:
+    """数据导出服务类"""
+
+    @staticmethod
+    def iter_records(db: Session, table: str, start: Optional[str] = None, end: Optional[str] = None,
+                     batch_size: int = STREAM_BATCH_SIZE, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        按筛选条件流式读取导出记录
+
+        Args:
+            db: 数据库会话
+            table: 表名，transactions 或 todos
+            start: 创建时间起始日期（含），格式YYYY-MM-DD
+            end: 创建时间结束日期（含），格式YYYY-MM-DD
+            batch_size: 每批读取的行数
+            filters: 查询条件，transactions 同 get_transactions，todos 同 get_todos
+
+        Returns:
+            记录迭代器
+
+        Raises:
+            ValueError: 当表名或日期无效时
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"不支持导出的表: {table}，可选值: {', '.join(EXPORT_TABLES)}")
+        model, columns, to_record, _ = EXPORT_TABLES[table]
+
+        if model is Transaction:
+            query = TransactionService.get_transactions_query(db, **filters)
+        else:
+            query = TodoService.get_todos_query(db, **filters)
+
+        start_date = ExportService._parse_date(start, "开始日期")
+        end_date = ExportService._parse_date(end, "结束日期")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("开始日期不能晚于结束日期")
+        if start_date:
+            query = query.filter(model.created_at >= start_date)
+        if end_date:
+            query = query.filter(model.created_at < end_date + timedelta(days=1))
+
+        # 只查询导出所需的列，并在连接上直接执行，结果行按属性访问即可转换为记录，省去ORM加载开销
+        statement = query.with_entities(*[getattr(model, name) for name in columns]).statement
+        result = db.connection().execution_options(yield_per=batch_size).execute(statement)
+        return (to_record(row) for row in result)
+
+    @staticmethod
+    def export(db: Session, table: str, file_format: str, output_path: Optional[str] = None,
+               start: Optional[str] = None, end: Optional[str] = None,
+               row_group_size: int = DEFAULT_ROW_GROUP_SIZE, **filters) -> Dict[str, Any]:
+        """
+        导出数据
+
+        写入文件时先写临时文件，完成后再替换目标文件，中途失败不会留下不完整的导出文件。
+
+        Args:
+            db: 数据库会话
+            table: 表名，transactions 或 todos
+            file_format: 导出格式，见EXPORT_FORMATS
+            output_path: 输出文件路径，为None时写到标准输出（Parquet必须指定）
+            start: 创建时间起始日期（含），格式YYYY-MM-DD
+            end: 创建时间结束日期（含），格式YYYY-MM-DD
+            row_group_size: Parquet 每个行组的行数
+            filters: 查询条件
+
+        Returns:
+            导出统计，包含rows、path和elapsed
+
+        Raises:
+            ValueError: 当参数无效、输出目录不存在或缺少pyarrow时
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {file_format}，可选值: {', '.join(EXPORT_FORMATS)}")
+        if file_format == "parquet":
+            if not output_path:
+                raise ValueError("Parquet格式需要指定输出文件")
+            if row_group_size < 1:
+                raise ValueError("行组大小必须为正整数")
+            ExportService._require_pyarrow()
+        if output_path:
+            output_path = os.path.expanduser(output_path)
+            output_dir = os.path.dirname(output_path)
+            if output_dir and not os.path.isdir(output_dir):
+                raise ValueError(f"输出目录不存在: {output_dir}")
+
+        started = time.perf_counter()
+        records = ExportService.iter_records(db, table, start, end, **filters)
+        fields = EXPORT_TABLES[table][3]
+
+        if not output_path:
+            rows = write_records(records, fields, file_format, sys.stdout)
+            return {"rows": rows, "path": None, "elapsed": time.perf_counter() - started}
+
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            if file_format == "parquet":
+                rows = ExportService._write_parquet(records, table, tmp_path, row_group_size)
+            else:
+                with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                    rows = write_records(records, fields, file_format, f)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return {"rows": rows, "path": os.path.abspath(output_path), "elapsed": time.perf_counter() - started}
+
+    @staticmethod
+    def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+        """解析YYYY-MM-DD格式的日期"""
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"{name}格式应为YYYY-MM-DD")
+
+    @staticmethod
+    def _require_pyarrow():
+        """导入pyarrow，未安装时给出安装提示"""
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("导出Parquet需要安装pyarrow: pip install pyarrow")
+        return pyarrow
+
+    @staticmethod
+    def _parquet_schema(table: str):
+        """生成导出表的Parquet结构，金额为定点小数，时间为微秒精度时间戳"""
+        pa = ExportService._require_pyarrow()
+        if table == "transactions":
+            return pa.schema([
+                ("id", pa.int64()),
+                ("amount", pa.decimal128(18, CURRENCY_DECIMALS)),
+                ("type", pa.string()),
+                ("category", pa.string()),
+                ("tags", pa.string()),
+                ("notes", pa.string()),
+                ("created_at", pa.timestamp("us")),
+                ("updated_at", pa.timestamp("us")),
+            ])
+        return pa.schema([
+            ("id", pa.int64()),
+            ("content", pa.string()),
+            ("category", pa.string()),
+            ("status", pa.string()),
+            ("tags", pa.string()),
+            ("deadline", pa.timestamp("us")),
+            ("transaction_id", pa.int64()),
+            ("created_at", pa.timestamp("us")),
+            ("updated_at", pa.timestamp("us")),
+        ])
+
+    @staticmethod
+    def _write_parquet(records: Iterator[Dict[str, Any]], table: str, path: str, row_group_size: int) -> int:
+        """按行组写出Parquet文件，每次只缓冲一个行组"""
+        pa = ExportService._require_pyarrow()
+        import pyarrow.parquet as pq
+
+        schema = ExportService._parquet_schema(table)
+        names: List[str] = schema.names
+        rows = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            columns: Dict[str, List[Any]] = {name: [] for name in names}
+            for record in records:
+                for name in names:
+                    columns[name].append(record[name])
+                rows += 1
+                if rows % row_group_size == 0:
+                    writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                    columns = {name: [] for name in names}
+            if rows % row_group_size:
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        return rows
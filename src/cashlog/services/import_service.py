@@ -0,0 +1,213 @@
+"""批量导入服务
+
+逐行读取CSV或JSON Lines文件，按create_transaction的规则校验每一行，
+有效行按批次以一条executemany语句写入，每批一个事务，全文索引、汇总等派生数据按批次集合维护；
+无效行记录行号和原因后跳过。某一批因个别行写入失败时，回滚后逐行重试该批，
+只跳过写入失败的行，其余行照常导入。
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from cashlog.models.bulk import bulk_insert_transactions
+from cashlog.services.transaction_service import TransactionService
+
+# 支持的导入格式
+IMPORT_FORMATS = ["csv", "jsonl"]
+
+# 可导入的交易字段
+IMPORT_FIELDS = ["amount", "category", "tags", "notes", "created_at"]
+
+# 默认每批写入的行数
+DEFAULT_BATCH_SIZE = 10000
+
+# 导入结果中最多保留的错误明细条数
+MAX_ERROR_DETAILS = 100
+
+# 由单行数据引起的写入错误，遇到时逐行重试该批；其他错误（如磁盘已满、数据库被锁定）终止导入
+ROW_ERRORS = (IntegrityError, DataError, OverflowError, ValueError, TypeError)
+
+
+class ImportService:
+    """批量导入服务类"""
+
+    @staticmethod
+    def parse_mapping(mapping: Optional[str]) -> Dict[str, str]:
+        """
+        解析列映射
+
+        Args:
+            mapping: 形如 "amount=金额,created_at=日期" 的映射，字段=文件中的列名
+
+        Returns:
+            字段到列名的映射，未指定的字段使用同名列
+
+        Raises:
+            ValueError: 当映射格式无效或字段不支持时
+        """
+        columns = {field: field for field in IMPORT_FIELDS}
+        if not mapping:
+            return columns
+        for item in mapping.split(","):
+            field, sep, column = item.partition("=")
+            field, column = field.strip(), column.strip()
+            if not sep or not field or not column:
+                raise ValueError(f"列映射格式无效: {item}，应为 字段=列名")
+            if field not in IMPORT_FIELDS:
+                raise ValueError(f"不支持导入的字段: {field}，可选值: {', '.join(IMPORT_FIELDS)}")
+            columns[field] = column
+        return columns
+
+    @staticmethod
+    def read_rows(path: str, file_format: str = "csv") -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        逐行读取导入文件
+
+        Args:
+            path: 文件路径
+            file_format: 文件格式，csv 或 jsonl
+
+        Returns:
+            (行号, 行数据) 迭代器；JSON Lines中无法解析的行，行数据为解析错误信息字符串
+
+        Raises:
+            ValueError: 当文件格式不支持时
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"不支持的导入格式: {file_format}，可选值: {', '.join(IMPORT_FORMATS)}")
+
+        # utf-8-sig 兼容Excel导出的带BOM文件
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            if file_format == "csv":
+                reader = csv.DictReader(f)
+                for row in reader:
+                    yield reader.line_num, row
+                return
+
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, f"JSON格式错误: {e}"
+                    continue
+                yield line_no, row if isinstance(row, dict) else "每行应为一个JSON对象"
+
+    @staticmethod
+    def import_transactions(db: Session, path: str, file_format: str = "csv", mapping: Optional[Dict[str, str]] = None,
+                            batch_size: int = DEFAULT_BATCH_SIZE,
+                            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        从文件批量导入交易
+
+        Args:
+            db: 数据库会话
+            path: 文件路径
+            file_format: 文件格式，csv 或 jsonl
+            mapping: 字段到列名的映射，见parse_mapping
+            batch_size: 每批写入的行数
+            progress: 每写入一批后调用，参数为当前统计
+
+        Returns:
+            导入统计，包含total、imported、failed、errors（(行号, 原因)列表）、elapsed和rate
+
+        Raises:
+            ValueError: 当文件不存在、格式不支持或缺少映射的列时
+        """
+        if not os.path.isfile(path):
+            raise ValueError(f"导入文件不存在: {path}")
+        if batch_size < 1:
+            raise ValueError("批次大小必须为正整数")
+        columns = mapping or ImportService.parse_mapping(None)
+
+        stats = {"total": 0, "imported": 0, "failed": 0, "errors": [], "elapsed": 0.0, "rate": 0.0}
+        started = time.perf_counter()
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        checked_columns = False
+
+        for line_no, row in ImportService.read_rows(path, file_format):
+            stats["total"] += 1
+            if isinstance(row, dict) and file_format == "csv" and not checked_columns:
+                missing = [columns[field] for field in ("amount", "category") if columns[field] not in row]
+                if missing:
+                    raise ValueError(f"导入文件缺少列: {', '.join(missing)}")
+                checked_columns = True
+
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError(row)
+                data = {
+                    field: ImportService._cell(row.get(column))
+                    for field, column in columns.items()
+                }
+                batch.append((line_no, TransactionService.validate_transaction_data(data)))
+            except ValueError as e:
+                ImportService._add_error(stats, line_no, str(e))
+                continue
+
+            if len(batch) >= batch_size:
+                ImportService._write_batch(db, batch, stats, started, progress)
+                batch = []
+
+        if batch:
+            ImportService._write_batch(db, batch, stats, started, progress)
+        ImportService._update_timing(stats, started)
+        return stats
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        """统一单元格的值：金额保留原始类型，其余转为字符串，空字符串视为未提供"""
+        if value is None or value == "":
+            return None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return str(value)
+
+    @staticmethod
+    def _write_batch(db: Session, batch: List[Tuple[int, Dict[str, Any]]], stats: Dict[str, Any], started: float,
+                     progress: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """在一个事务中写入一批交易并建立标签关联，个别行写入失败时逐行重试"""
+        # 各行字段一致才能合并为一条executemany语句，未提供时间的行使用当前时间
+        now = datetime.now()
+        rows = [(line_no, {"created_at": now, "updated_at": now, **values}) for line_no, values in batch]
+        try:
+            ImportService._insert(db, [row for _, row in rows])
+            stats["imported"] += len(rows)
+        except ROW_ERRORS:
+            for line_no, row in rows:
+                try:
+                    ImportService._insert(db, [row])
+                    stats["imported"] += 1
+                except ROW_ERRORS as e:
+                    ImportService._add_error(stats, line_no, f"写入失败: {e}")
+        ImportService._update_timing(stats, started)
+        if progress:
+            progress(stats)
+
+    @staticmethod
+    def _insert(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """在一个事务中写入交易，失败时回滚并抛出原异常"""
+        try:
+            bulk_insert_transactions(db.connection(), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def _add_error(stats: Dict[str, Any], line_no: int, reason: str) -> None:
+        """记录失败的行，明细最多保留MAX_ERROR_DETAILS条"""
+        stats["failed"] += 1
+        if len(stats["errors"]) < MAX_ERROR_DETAILS:
+            stats["errors"].append((line_no, reason))
+
+    @staticmethod
+    def _update_timing(stats: Dict[str, Any], started: float) -> None:
+        """更新耗时和每秒导入行数"""
+        stats["elapsed"] = time.perf_counter() - started
+        stats["rate"] = stats["imported"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
@@ -0,0 +1,353 @@
+"""增量备份服务
+
+备份链保存在一个目录中，由一个基础备份和若干变更集组成，chain.json 记录链上的每个恢复点。
+基础备份是完整的数据库副本；变更集是gzip压缩的JSON Lines，
+包含上一个恢复点以来新增或修改的交易、待办事项整行数据（按变更日志 changed_rows 的序号查找）和删除墓碑。
+恢复时复制基础备份并依次重放变更集，可以停在任意一个恢复点。
+每次创建基础备份后清理已包含在其中的墓碑。
+"""
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+from typing import Callable, Dict, Iterator, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from cashlog.models.changes import TRACKED_TABLES, prune_tombstones, tombstones_complete
+from cashlog.models.db import DB_PATH
+from cashlog.models.tag import LINK_TABLES, link_tags
+from cashlog.services.data_service import COMPRESSION_FORMATS, DataService
+
+# 备份链清单文件名
+MANIFEST_NAME = "chain.json"
+# 重放变更集时每批写入的行数
+REPLAY_BATCH_SIZE = 1000
+# 表名 -> 标签关联的记录类型
+TAG_KINDS = {"transactions": "transaction", "todos": "todo"}
+
+
+class IncrementalBackupService:
+    """增量备份服务类，维护备份链并按恢复点重建数据库"""
+
+    @staticmethod
+    def default_chain_dir() -> str:
+        """默认备份链目录：数据库所在目录下的 backups/chain"""
+        return os.path.join(os.path.dirname(DB_PATH), "backups", "chain")
+
+    @staticmethod
+    def backup(chain_dir: Optional[str] = None, new_chain: bool = False, compress: Optional[str] = None,
+               pages_per_step: Optional[int] = None, sleep_ms: Optional[int] = None,
+               progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        向备份链追加一个恢复点
+
+        目录中还没有备份链（或指定new_chain）时创建基础备份，否则写入上一个恢复点以来的变更集；
+        没有任何变更时不写文件。
+
+        Args:
+            chain_dir: 备份链目录，默认为 default_chain_dir()
+            new_chain: 是否丢弃目录中已有的备份链，重新创建基础备份
+            compress: 基础备份的压缩格式，变更集总是gzip压缩
+            pages_per_step: 基础备份每步复制的页数
+            sleep_ms: 基础备份每步之间休眠的毫秒数
+            progress: 基础备份的进度回调，参数为(已复制页数, 总页数)
+
+        Returns:
+            包含 kind（base、changes，无变更时为None）、path、rows、deleted、chain_dir 的字典
+
+        Raises:
+            ValueError: 当备份链与当前数据库不匹配时
+            IOError: 当数据库文件不存在时
+        """
+        if not os.path.exists(DB_PATH):
+            raise IOError(f"原数据库文件不存在: {DB_PATH}")
+        chain_dir = os.path.expanduser(chain_dir) if chain_dir else IncrementalBackupService.default_chain_dir()
+        os.makedirs(chain_dir, exist_ok=True)
+
+        manifest = IncrementalBackupService._load_manifest(chain_dir)
+        if manifest and not new_chain:
+            return IncrementalBackupService._write_changeset(chain_dir, manifest)
+
+        if manifest:
+            for name in [manifest["base"]["file"]] + [c["file"] for c in manifest["changesets"]]:
+                path = os.path.join(chain_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        return IncrementalBackupService._write_base(chain_dir, compress, pages_per_step, sleep_ms, progress)
+
+    @staticmethod
+    def describe(chain_dir: str) -> List[dict]:
+        """
+        列出备份链上的恢复点
+
+        Args:
+            chain_dir: 备份链目录
+
+        Returns:
+            恢复点列表，每项包含 kind、created_at、file、rows、deleted、size
+
+        Raises:
+            ValueError: 当目录不是备份链时
+        """
+        chain_dir = os.path.expanduser(chain_dir)
+        manifest = IncrementalBackupService._require_manifest(chain_dir)
+        points = [{"kind": "base", "rows": None, "deleted": None, **manifest["base"]}]
+        points += [{"kind": "changes", **changeset} for changeset in manifest["changesets"]]
+        for point in points:
+            path = os.path.join(chain_dir, point["file"])
+            point["size"] = os.path.getsize(path) if os.path.exists(path) else None
+        return points
+
+    @staticmethod
+    def materialize(chain_dir: str, target_path: str, until: Optional[str] = None) -> dict:
+        """
+        将备份链重建为一个完整的数据库文件
+
+        Args:
+            chain_dir: 备份链目录
+            target_path: 输出的数据库文件路径
+            until: 恢复时间点，格式 YYYY-MM-DD[ HH:MM[:SS]]，只重放此时间及之前的变更集，默认重放全部
+
+        Returns:
+            包含 point（实际恢复到的时间点）和 applied（重放的变更集数）的字典
+
+        Raises:
+            ValueError: 当目录不是备份链、时间点无效或早于基础备份时
+        """
+        chain_dir = os.path.expanduser(chain_dir)
+        manifest = IncrementalBackupService._require_manifest(chain_dir)
+        base = manifest["base"]
+        changesets = manifest["changesets"]
+        if until:
+            until_time = IncrementalBackupService._parse_point(until)
+            if until_time < datetime.datetime.fromisoformat(base["created_at"]):
+                raise ValueError(f"恢复时间点早于基础备份: {base['created_at']}")
+            changesets = [c for c in changesets if datetime.datetime.fromisoformat(c["created_at"]) <= until_time]
+
+        base_path = os.path.join(chain_dir, base["file"])
+        compression = DataService._detect_compression(base_path)
+        if compression:
+            DataService._decompress_file(base_path, target_path, compression)
+        else:
+            shutil.copyfile(base_path, target_path)
+
+        engine = create_engine(f"sqlite:///{target_path}")
+        try:
+            for changeset in changesets:
+                with engine.begin() as conn:
+                    IncrementalBackupService._apply_changeset(conn, os.path.join(chain_dir, changeset["file"]))
+        finally:
+            engine.dispose()
+
+        point = changesets[-1]["created_at"] if changesets else base["created_at"]
+        return {"point": point, "applied": len(changesets)}
+
+    @staticmethod
+    def _write_base(chain_dir: str, compress: Optional[str], pages_per_step: Optional[int],
+                    sleep_ms: Optional[int], progress: Optional[Callable[[int, int], None]]) -> dict:
+        """创建基础备份并写入新的清单"""
+        now = datetime.datetime.now()
+        # 先记录变更标记再复制：标记之后的变更即使已包含在基础备份中，
+        # 下一个变更集也会再次捕获，重放时按主键覆盖，结果一致
+        source = sqlite3.connect(str(DB_PATH))
+        try:
+            token = source.execute("SELECT token FROM data_version WHERE id = 1").fetchone()[0]
+            marks = IncrementalBackupService._read_marks(source)
+        finally:
+            source.close()
+
+        suffix = ".db" + (COMPRESSION_FORMATS[compress][0] if compress else "")
+        path = os.path.join(chain_dir, f"base_{now:%Y%m%d_%H%M%S}{suffix}")
+        DataService.create_backup(output_path=path, overwrite=True, pages_per_step=pages_per_step,
+                                  sleep_ms=sleep_ms, progress=progress, compress=compress)
+
+        manifest = {
+            "token": token,
+            "base": {"file": os.path.basename(path), "created_at": now.isoformat(sep=" ", timespec="seconds"), **marks},
+            "changesets": [],
+        }
+        IncrementalBackupService._save_manifest(chain_dir, manifest)
+
+        # 标记之前的删除已包含在基础备份中；落后于此的其他备份链会在下次写入变更集时发现墓碑缺失
+        source = sqlite3.connect(str(DB_PATH), timeout=5)
+        try:
+            with source:
+                prune_tombstones(source, marks["tombstone_seq"])
+        finally:
+            source.close()
+        return {"kind": "base", "path": os.path.abspath(path), "rows": None, "deleted": None, "chain_dir": chain_dir}
+
+    @staticmethod
+    def _write_changeset(chain_dir: str, manifest: dict) -> dict:
+        """在一个读快照内捕获上一个恢复点以来的变更，写入变更集并追加到清单"""
+        last = manifest["changesets"][-1] if manifest["changesets"] else manifest["base"]
+        now = datetime.datetime.now()
+        result = {"kind": None, "path": None, "rows": 0, "deleted": 0, "chain_dir": chain_dir}
+
+        source = sqlite3.connect(str(DB_PATH))
+        try:
+            source.execute("BEGIN")
+            token = source.execute("SELECT token FROM data_version WHERE id = 1").fetchone()[0]
+            if token != manifest["token"]:
+                raise ValueError("备份链与当前数据库不匹配（数据库已恢复或更换），请使用 --new-chain 建立新的备份链")
+
+            if "change_seq" not in last:
+                raise ValueError("备份链由旧版本创建，按修改时间捕获变更可能遗漏记录，请使用 --new-chain 建立新的备份链")
+            if not tombstones_complete(source, last["tombstone_seq"]):
+                raise ValueError("备份链落后于其他备份链清理过的删除记录，请使用 --new-chain 建立新的备份链")
+
+            marks = IncrementalBackupService._read_marks(source)
+            if not IncrementalBackupService._has_changes(source, last):
+                return result
+
+            name = f"changes_{len(manifest['changesets']) + 1:04d}_{now:%Y%m%d_%H%M%S}.jsonl.gz"
+            path = os.path.join(chain_dir, name)
+            tmp_path = f"{path}.tmp"
+            try:
+                with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                    for entry in IncrementalBackupService._iter_changes(source, last):
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                        result["deleted" if entry["op"] == "delete" else "rows"] += 1
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        finally:
+            source.close()
+
+        manifest["changesets"].append({
+            "file": name,
+            "created_at": now.isoformat(sep=" ", timespec="seconds"),
+            **marks,
+            "rows": result["rows"],
+            "deleted": result["deleted"],
+        })
+        IncrementalBackupService._save_manifest(chain_dir, manifest)
+        result.update(kind="changes", path=os.path.abspath(path))
+        return result
+
+    @staticmethod
+    def _read_marks(conn: sqlite3.Connection) -> dict:
+        """读取变更日志和墓碑的最大序号，作为下一次捕获变更的起点"""
+        change_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changed_rows").fetchone()[0]
+        tombstone_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM deleted_rows").fetchone()[0]
+        return {"change_seq": change_seq, "tombstone_seq": tombstone_seq}
+
+    @staticmethod
+    def _has_changes(conn: sqlite3.Connection, last: dict) -> bool:
+        """判断上一个恢复点之后是否有新的修改或删除"""
+        return bool(
+            conn.execute("SELECT 1 FROM deleted_rows WHERE seq > ? LIMIT 1", (last["tombstone_seq"],)).fetchone()
+            or conn.execute("SELECT 1 FROM changed_rows WHERE seq > ? LIMIT 1", (last["change_seq"],)).fetchone()
+        )
+
+    @staticmethod
+    def _iter_changes(conn: sqlite3.Connection, last: dict) -> Iterator[dict]:
+        """生成变更条目：先是删除墓碑，再是新增或修改的整行数据"""
+        for table in TRACKED_TABLES:
+            rows = conn.execute(
+                "SELECT DISTINCT row_id FROM deleted_rows WHERE table_name = ? AND seq > ? ORDER BY row_id",
+                (table, last["tombstone_seq"])
+            )
+            for (row_id,) in rows:
+                yield {"op": "delete", "table": table, "id": row_id}
+
+        for table in TRACKED_TABLES:
+            # 之后又被删除的记录不在业务表中，由上面的墓碑处理
+            cursor = conn.execute(
+                f"SELECT {table}.* FROM changed_rows JOIN {table} ON {table}.id = changed_rows.row_id "
+                f"WHERE changed_rows.table_name = ? AND changed_rows.seq > ? ORDER BY {table}.id",
+                (table, last["change_seq"])
+            )
+            names = [column[0] for column in cursor.description]
+            for row in cursor:
+                yield {"op": "upsert", "table": table, "row": dict(zip(names, row))}
+
+    @staticmethod
+    def _apply_changeset(conn: Connection, path: str) -> None:
+        """按顺序重放一个变更集，连续的同类条目分批执行"""
+        columns = {
+            table: {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+            for table in TRACKED_TABLES
+        }
+        batch: List[dict] = []
+        batch_key = None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["table"] not in columns:
+                    raise ValueError(f"变更集包含未知的表: {entry['table']}")
+                key = (entry["op"], entry["table"])
+                if key != batch_key or len(batch) >= REPLAY_BATCH_SIZE:
+                    IncrementalBackupService._apply_batch(conn, batch_key, batch, columns)
+                    batch, batch_key = [], key
+                batch.append(entry)
+        IncrementalBackupService._apply_batch(conn, batch_key, batch, columns)
+
+    @staticmethod
+    def _apply_batch(conn: Connection, key, batch: List[dict], columns: Dict[str, set]) -> None:
+        """执行一批删除或写入，并同步标签关联"""
+        if not batch:
+            return
+        op, table = key
+        kind = TAG_KINDS[table]
+        link_table, owner_column = LINK_TABLES[kind]
+        unlink = text(f"DELETE FROM {link_table.name} WHERE {owner_column.name} = :id")
+
+        if op == "delete":
+            ids = [{"id": entry["id"]} for entry in batch]
+            conn.execute(text(f"DELETE FROM {table} WHERE id = :id"), ids)
+            conn.execute(unlink, ids)
+            return
+
+        # 只写入目标库中存在的列，兼容新旧版本之间的结构差异
+        names = [name for name in batch[0]["row"] if name in columns[table]]
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names if name != "id")
+        conn.execute(
+            text(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(':' + n for n in names)}) "
+                 f"ON CONFLICT (id) DO UPDATE SET {updates}"),
+            [{name: entry["row"].get(name) for name in names} for entry in batch]
+        )
+        conn.execute(unlink, [{"id": entry["row"]["id"]} for entry in batch])
+        link_tags(conn, kind, [(entry["row"]["id"], entry["row"].get("tags")) for entry in batch])
+
+    @staticmethod
+    def _parse_point(value: str) -> datetime.datetime:
+        """解析恢复时间点，只给日期时取当天结束"""
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                point = datetime.datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if fmt == "%Y-%m-%d":
+                point = point.replace(hour=23, minute=59, second=59)
+            return point
+        raise ValueError(f"无效的恢复时间点: {value}，格式为 YYYY-MM-DD[ HH:MM[:SS]]")
+
+    @staticmethod
+    def _load_manifest(chain_dir: str) -> Optional[dict]:
+        """读取备份链清单，不存在时返回None"""
+        path = os.path.join(chain_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _require_manifest(chain_dir: str) -> dict:
+        """读取备份链清单，不存在时报错"""
+        manifest = IncrementalBackupService._load_manifest(chain_dir)
+        if manifest is None:
+            raise ValueError(f"不是增量备份链目录: {chain_dir}")
+        return manifest
+
+    @staticmethod
+    def _save_manifest(chain_dir: str, manifest: dict) -> None:
+        """原子地写入备份链清单"""
+        path = os.path.join(chain_dir, MANIFEST_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
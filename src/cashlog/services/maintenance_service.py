@@ -0,0 +1,178 @@
+"""数据库维护服务
+
+data optimize 依次执行以下步骤，并报告每一步的耗时和回收的空间：
+1. analyze：在采样上限内执行 ANALYZE 和 PRAGMA optimize，更新查询规划器使用的统计信息
+2. vacuum：按页数上限执行 incremental_vacuum，把空闲页归还给文件系统（需要 auto_vacuum=INCREMENTAL）
+3. checkpoint：执行 wal_checkpoint(TRUNCATE)，把WAL写回数据库文件并截断WAL
+4. quick_check：检查数据库结构是否完整
+
+计划任务模式下连接不等待锁：遇到其他连接正在写入时短暂让出并重试，仍然繁忙则跳过该步骤；
+空间回收分小批执行，每批之间让出锁，适合在运行API服务的主机上定时执行。
+"""
+import os
+import sqlite3
+import time
+from typing import Callable, List, Optional, Tuple
+from cashlog.models.db import PRAGMA_PROFILES, get_active_profile
+
+# ANALYZE 每个索引最多采样的行数，避免大表上分析耗时过长
+ANALYSIS_LIMIT = 1000
+# 默认每次最多回收的空闲页数，0表示回收全部
+DEFAULT_VACUUM_PAGES = 2000
+# 计划任务模式下每批回收的页数
+VACUUM_CHUNK_PAGES = 100
+# 计划任务模式下遇到锁时每次让出的时间（秒）和重试次数
+YIELD_SECONDS = 0.05
+YIELD_RETRIES = 20
+
+
+class MaintenanceService:
+    """数据库维护服务类"""
+
+    @staticmethod
+    def optimize(db_path: str, vacuum_pages: int = DEFAULT_VACUUM_PAGES, schedule: bool = False,
+                 enable_incremental_vacuum: bool = False) -> List[dict]:
+        """
+        执行数据库维护
+
+        Args:
+            db_path: 数据库文件路径
+            vacuum_pages: 最多回收的空闲页数，0表示回收全部
+            schedule: 计划任务模式，不等待锁，遇到写入时让出
+            enable_incremental_vacuum: 数据库尚未启用增量回收时，执行一次完整VACUUM切换为增量模式
+
+        Returns:
+            每个步骤的结果列表，每项包含 step、status（ok、skipped、busy、error）、seconds、reclaimed（字节）、detail
+
+        Raises:
+            ValueError: 当参数无效时
+        """
+        if vacuum_pages < 0:
+            raise ValueError("回收页数不能为负数")
+        if schedule and enable_incremental_vacuum:
+            raise ValueError("计划任务模式不能执行完整VACUUM")
+
+        timeout = 0 if schedule else PRAGMA_PROFILES[get_active_profile()]["busy_timeout"] / 1000
+        conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+        try:
+            steps = [
+                ("analyze", MaintenanceService._analyze),
+                ("vacuum", lambda c: MaintenanceService._vacuum(c, vacuum_pages, schedule, enable_incremental_vacuum)),
+                ("checkpoint", lambda c: MaintenanceService._checkpoint(c, schedule)),
+                ("quick_check", MaintenanceService._quick_check),
+            ]
+            return [MaintenanceService._run_step(conn, db_path, name, func, schedule) for name, func in steps]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _run_step(conn: sqlite3.Connection, db_path: str, name: str,
+                  func: Callable[[sqlite3.Connection], Tuple[str, str, Optional[int]]], schedule: bool) -> dict:
+        """执行单个步骤并计时；步骤未给出回收字节数时按数据库文件和WAL的大小变化计算"""
+        before = MaintenanceService._disk_usage(db_path)
+        started = time.perf_counter()
+        try:
+            status, detail, reclaimed = MaintenanceService._retry(lambda: func(conn), schedule)
+        except sqlite3.OperationalError as e:
+            if not MaintenanceService._is_busy(e):
+                raise
+            status, detail, reclaimed = "busy", "其他连接正在写入，已跳过", 0
+        if reclaimed is None:
+            reclaimed = before - MaintenanceService._disk_usage(db_path)
+        return {
+            "step": name,
+            "status": status,
+            "seconds": time.perf_counter() - started,
+            "reclaimed": reclaimed,
+            "detail": detail,
+        }
+
+    @staticmethod
+    def _analyze(conn: sqlite3.Connection) -> Tuple[str, str, Optional[int]]:
+        """在采样上限内更新统计信息"""
+        conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        entries = conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+        return "ok", f"更新了 {entries} 条统计信息", None
+
+    @staticmethod
+    def _vacuum(conn: sqlite3.Connection, vacuum_pages: int, schedule: bool,
+                enable_incremental_vacuum: bool) -> Tuple[str, str, Optional[int]]:
+        """按页数上限回收空闲页，回收字节数按数据库逻辑页数的变化计算（WAL模式下检查点后才体现在文件大小上）"""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+        if mode != 2:
+            if not enable_incremental_vacuum:
+                return "skipped", "数据库未启用增量回收，可使用 --enable-incremental-vacuum 切换（执行一次完整VACUUM）", 0
+            # 切换 auto_vacuum 模式需要重建数据库文件
+            conn.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+        elif schedule:
+            freed = 0
+            while vacuum_pages == 0 or freed < vacuum_pages:
+                free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free_pages:
+                    break
+                chunk = min(VACUUM_CHUNK_PAGES, free_pages)
+                if vacuum_pages:
+                    chunk = min(chunk, vacuum_pages - freed)
+                # incremental_vacuum 每执行一步回收一页，executescript 才会执行到底
+                MaintenanceService._retry(lambda: conn.executescript(f"PRAGMA incremental_vacuum({chunk});"), schedule)
+                freed += chunk
+                # 每批之间让出锁，等待中的写入可以先提交
+                time.sleep(YIELD_SECONDS)
+        else:
+            conn.executescript(f"PRAGMA incremental_vacuum({vacuum_pages});" if vacuum_pages
+                               else "PRAGMA incremental_vacuum;")
+
+        pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        freed = pages_before - pages_after
+        return "ok", f"回收 {freed} 页，剩余空闲页 {remaining}", freed * page_size
+
+    @staticmethod
+    def _checkpoint(conn: sqlite3.Connection, schedule: bool) -> Tuple[str, str, Optional[int]]:
+        """把WAL写回数据库文件并截断WAL"""
+        if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+            return "skipped", "未使用WAL模式", 0
+
+        for _ in range(YIELD_RETRIES if schedule else 1):
+            busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if not busy:
+                return "ok", f"写回 {checkpointed} 帧", None
+            time.sleep(YIELD_SECONDS)
+        return "busy", f"有其他连接正在读写，已写回 {checkpointed}/{log_frames} 帧", None
+
+    @staticmethod
+    def _quick_check(conn: sqlite3.Connection) -> Tuple[str, str, Optional[int]]:
+        """检查数据库结构完整性"""
+        messages = [row[0] for row in conn.execute("PRAGMA quick_check")]
+        if messages == ["ok"]:
+            return "ok", "ok", 0
+        return "error", "; ".join(messages[:5]), 0
+
+    @staticmethod
+    def _retry(func: Callable, schedule: bool):
+        """计划任务模式下遇到锁时让出并重试，超过重试次数后抛出原异常"""
+        attempts = YIELD_RETRIES if schedule else 1
+        for attempt in range(attempts):
+            try:
+                return func()
+            except sqlite3.OperationalError as e:
+                if not MaintenanceService._is_busy(e) or attempt == attempts - 1:
+                    raise
+                time.sleep(YIELD_SECONDS)
+
+    @staticmethod
+    def _is_busy(error: sqlite3.OperationalError) -> bool:
+        """判断是否为数据库被锁定的错误"""
+        message = str(error).lower()
+        return "locked" in message or "busy" in message
+
+    @staticmethod
+    def _disk_usage(db_path: str) -> int:
+        """数据库文件与WAL文件的总大小"""
+        wal_path = f"{db_path}-wal"
+        return os.path.getsize(db_path) + (os.path.getsize(wal_path) if os.path.exists(wal_path) else 0)
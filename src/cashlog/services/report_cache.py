@@ -0,0 +1,289 @@
+"""报表结果缓存
+
+缓存键由报表参数（时间维度、解析后的起止时间、分类）和数据版本（实例令牌、变更计数）组成，
+交易数据任何写入都会递增变更计数，旧结果自然不再命中，无需主动失效。
+内存层为进程内LRU；磁盘层可选，以JSON文件保存，在多次CLI调用之间共享。
+启用磁盘层时命中统计同时累计在磁盘层目录中，report cache 命令可以看到各进程（包括API服务）的累计统计；
+未启用磁盘层时统计只在进程内，API服务的统计通过 GET /api/reports/cache 查看。
+"""
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import warnings
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from cashlog.config import get_setting
+
+# 默认内存层容量（条）
+DEFAULT_MEMORY_SIZE = 128
+# 默认磁盘层容量（文件数）
+DEFAULT_DISK_SIZE = 512
+# 磁盘层中累计命中统计的文件，多个进程以原子递增共享
+STATS_FILE = "stats.db"
+
+
+class ReportCache:
+    """报表结果缓存类"""
+
+    def __init__(self, memory_size: int = DEFAULT_MEMORY_SIZE, disk_dir: Optional[str] = None,
+                 disk_size: int = DEFAULT_DISK_SIZE):
+        """
+        Args:
+            memory_size: 内存层容量，为0时不使用内存层
+            disk_dir: 磁盘层目录，为None时不使用磁盘层
+            disk_size: 磁盘层最多保留的文件数
+        """
+        self.memory_size = memory_size
+        self.disk_dir = Path(disk_dir).expanduser() if disk_dir else None
+        self.disk_size = disk_size
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(token: Optional[str], version: int, time_dimension: str, start_date: datetime,
+                 end_date: datetime, categories: Optional[List[str]] = None) -> str:
+        """
+        生成缓存键
+
+        Args:
+            token: 数据库实例令牌
+            version: 数据变更计数
+            time_dimension: 时间维度
+            start_date: 解析后的开始时间
+            end_date: 解析后的结束时间
+            categories: 筛选分类列表
+
+        Returns:
+            缓存键字符串
+        """
+        payload = json.dumps([
+            token, version, time_dimension, start_date.isoformat(), end_date.isoformat(),
+            sorted(categories) if categories else None
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存，依次查找内存层和磁盘层
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            报表数据副本，未命中时返回None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                value = copy.deepcopy(self._memory[key])
+            else:
+                value = None
+        if value is not None:
+            self._count_disk(hits=1)
+            return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += 1
+                self._put_memory(key, value)
+        if value is None:
+            self._count_disk(misses=1)
+            return None
+        self._count_disk(hits=1, disk_hits=1)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 报表数据
+        """
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def clear(self) -> int:
+        """
+        清空内存层和磁盘层
+
+        Returns:
+            删除的磁盘缓存文件数
+        """
+        with self._lock:
+            self._memory.clear()
+        removed = 0
+        for path in self._disk_files():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            命中数、未命中数、命中率及各层条目数；shared 为True时命中统计为磁盘层中各进程的累计值，否则为本进程的统计
+        """
+        shared = self._read_disk_counters()
+        with self._lock:
+            counters = shared or {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+            lookups = counters["hits"] + counters["misses"]
+            return {
+                **counters,
+                "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+                "shared": shared is not None,
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "disk_entries": len(self._disk_files()),
+            }
+
+    def _put_memory(self, key: str, value: Dict[str, Any]) -> None:
+        """写入内存层并淘汰最久未使用的条目，调用方需持有锁"""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _disk_files(self) -> List[Path]:
+        """列出磁盘层缓存文件"""
+        if self.disk_dir is None or not self.disk_dir.exists():
+            return []
+        return list(self.disk_dir.glob("*.json"))
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取磁盘层，文件损坏时视为未命中"""
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 更新访问时间，淘汰时按最近使用顺序保留
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def _write_disk(self, key: str, value: Dict[str, Any]) -> None:
+        """写入磁盘层，写入失败不影响报表生成"""
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            path = self.disk_dir / f"{key}.json"
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _count_disk(self, hits: int = 0, disk_hits: int = 0, misses: int = 0) -> None:
+        """在磁盘层累计命中统计，写入失败不影响报表生成"""
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.disk_dir / STATS_FILE, timeout=1, isolation_level=None)
+            try:
+                # 统计丢失无碍，不等待落盘
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS counters (id INTEGER PRIMARY KEY CHECK (id = 1), "
+                    "hits INTEGER NOT NULL, disk_hits INTEGER NOT NULL, misses INTEGER NOT NULL)"
+                )
+                conn.execute(
+                    "INSERT INTO counters (id, hits, disk_hits, misses) VALUES (1, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET hits = hits + excluded.hits, "
+                    "disk_hits = disk_hits + excluded.disk_hits, misses = misses + excluded.misses",
+                    (hits, disk_hits, misses)
+                )
+            finally:
+                conn.close()
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _read_disk_counters(self) -> Optional[Dict[str, int]]:
+        """读取磁盘层累计的命中统计，未启用磁盘层或读取失败时返回None"""
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / STATS_FILE
+        if not path.exists():
+            return {"hits": 0, "disk_hits": 0, "misses": 0}
+        try:
+            conn = sqlite3.connect(path, timeout=1)
+            try:
+                row = conn.execute("SELECT hits, disk_hits, misses FROM counters WHERE id = 1").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        hits, disk_hits, misses = row or (0, 0, 0)
+        return {"hits": hits, "disk_hits": disk_hits, "misses": misses}
+
+    def _prune_disk(self) -> None:
+        """磁盘层超出容量时删除最久未使用的文件"""
+        files = self._disk_files()
+        if len(files) <= self.disk_size:
+            return
+        files.sort(key=lambda path: path.stat().st_mtime)
+        for path in files[:len(files) - self.disk_size]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def create_report_cache() -> ReportCache:
+    """
+    根据配置创建报表缓存
+
+    配置项：
+    - report_cache_size / CASHLOG_REPORT_CACHE_SIZE：内存层容量，默认128，0表示关闭
+    - report_cache_dir / CASHLOG_REPORT_CACHE_DIR：磁盘层目录，默认不启用
+
+    容量配置不是非负整数时给出警告并使用默认容量，不影响其他命令运行。
+
+    Returns:
+        报表缓存对象
+    """
+    raw_size = get_setting("report_cache_size", "CASHLOG_REPORT_CACHE_SIZE", DEFAULT_MEMORY_SIZE)
+    try:
+        size = int(raw_size)
+    except (TypeError, ValueError):
+        size = -1
+    if size < 0:
+        warnings.warn(f"报表缓存容量配置无效: {raw_size}，已改用默认容量 {DEFAULT_MEMORY_SIZE}", RuntimeWarning, stacklevel=2)
+        size = DEFAULT_MEMORY_SIZE
+    disk_dir = get_setting("report_cache_dir", "CASHLOG_REPORT_CACHE_DIR")
+    return ReportCache(memory_size=size, disk_dir=disk_dir)
+
+
+# 进程内共享的报表缓存
+report_cache = create_report_cache()
@@ -1,9 +1,39 @@
 """报表业务逻辑服务"""
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case, cast, literal, Integer, String
 from cashlog.models.transaction import Transaction
+from cashlog.models.rollup import DailyCategoryRollup
+from cashlog.models.version import get_data_version
+from cashlog.services.report_cache import report_cache
+from cashlog.utils.formatter import Formatter
+from cashlog.utils.money import from_minor
+
+# 时间序列支持的时间维度及显示名称
+SERIES_DIMENSIONS = {"daily": "按日", "weekly": "按周", "monthly": "按月", "quarterly": "按季度"}
+
+# 时间序列最多周期数
+MAX_SERIES_PERIODS = 400
+
+
+# 交叉报表的列维度：名称 -> (显示名称, Python日期格式)
+PIVOT_COLUMNS = {
+    "day": ("日", "%Y-%m-%d"),
+    "week": ("周", "%Y-%W"),
+    "month": ("月", "%Y-%m"),
+    "quarter": ("季度", None),
+    "year": ("年", "%Y"),
+}
+
+# 交叉报表的统计值
+PIVOT_VALUES = {"income": "收入", "expense": "支出", "net": "净额", "count": "笔数"}
+
+# 交叉报表最多列数
+MAX_PIVOT_COLUMNS = 400
 
 
 class ReportService:
@@ -159,19 +189,115 @@ class ReportService:
         
         return (base_start, base_end)
     
+    @staticmethod
+    def _is_day_aligned(start_date: datetime, end_date: datetime) -> bool:
+        """判断区间是否由完整的自然日组成（开始于0点，结束于当天最后一刻）"""
+        return start_date.time() == time.min and end_date.time() == time.max
+
+    @staticmethod
+    def _aggregate_by_category(db: Session, start_date: datetime, end_date: datetime,
+                               categories: Optional[List[str]] = None) -> Tuple[Dict[str, Dict[str, Any]], int, int, int]:
+        """
+        使用单条GROUP BY查询按分类聚合指定区间内的收支
+
+        Args:
+            db: 数据库会话
+            start_date: 区间开始时间
+            end_date: 区间结束时间
+            categories: 筛选分类列表
+
+        Returns:
+            分类统计（金额单位为元）、总收入（分）、总支出（分）、交易笔数
+        """
+        return ReportService._aggregate_periods(db, [(start_date, end_date)], categories)[0]
+
+    @staticmethod
+    def _aggregate_periods(db: Session, periods: List[Tuple[datetime, datetime]],
+                           categories: Optional[List[str]] = None) -> List[Tuple[Dict[str, Dict[str, Any]], int, int, int]]:
+        """
+        使用单条GROUP BY查询同时聚合多个区间的分类收支
+
+        各区间分别使用条件聚合求和，分类筛选只应用一次；区间之间允许重叠。
+        全部区间由完整的自然日组成时读取按日分类汇总表，否则直接聚合交易表。
+
+        Args:
+            db: 数据库会话
+            periods: (开始时间, 结束时间) 列表
+            categories: 筛选分类列表
+
+        Returns:
+            与periods顺序一致的列表，每项为分类统计（金额单位为元）、总收入（分）、总支出（分）、交易笔数
+        """
+        if all(ReportService._is_day_aligned(start, end) for start, end in periods):
+            # 整天区间直接读取按日分类汇总，扫描行数与天数×分类数成正比
+            category_column = DailyCategoryRollup.category
+            conditions = [DailyCategoryRollup.day.between(start.date(), end.date()) for start, end in periods]
+            income = DailyCategoryRollup.income
+            expense = DailyCategoryRollup.expense
+            count = DailyCategoryRollup.count
+        else:
+            # 以整数分求和，结果精确，仅在返回前换算为元
+            category_column = Transaction.category
+            conditions = [
+                and_(Transaction.created_at >= start, Transaction.created_at <= end) for start, end in periods
+            ]
+            income = case((Transaction.amount_minor > 0, Transaction.amount_minor), else_=0)
+            expense = case((Transaction.amount_minor < 0, -Transaction.amount_minor), else_=0)
+            count = literal(1)
+
+        columns = []
+        for condition in conditions:
+            if len(conditions) == 1:
+                columns += [func.sum(income), func.sum(expense), func.sum(count)]
+            else:
+                columns += [func.sum(case((condition, value), else_=0)) for value in (income, expense, count)]
+
+        query = db.query(category_column, *columns).filter(or_(*conditions))
+        if categories:
+            query = query.filter(category_column.in_(categories))
+        rows = query.group_by(category_column).all()
+
+        results = []
+        for i in range(len(periods)):
+            period_rows = [
+                (row[0], row[1 + i * 3] or 0, row[2 + i * 3] or 0, row[3 + i * 3] or 0) for row in rows
+            ]
+            # 只统计在该区间内有交易的分类
+            period_rows = [row for row in period_rows if row[3] > 0]
+            total_income_minor = sum(row[1] for row in period_rows)
+            total_expense_minor = sum(row[2] for row in period_rows)
+
+            category_stats = {}
+            transaction_count = 0
+            for category, category_income, category_expense, category_count in period_rows:
+                category_stats[category] = {
+                    "income": from_minor(category_income),
+                    "expense": from_minor(category_expense),
+                    "count": category_count,
+                    # 计算分类占比
+                    "income_percentage": category_income / total_income_minor * 100 if total_income_minor > 0 else 0,
+                    "expense_percentage": category_expense / total_expense_minor * 100 if total_expense_minor > 0 else 0,
+                }
+                transaction_count += category_count
+            results.append((category_stats, total_income_minor, total_expense_minor, transaction_count))
+        return results
+
     @staticmethod
     def generate_report(db: Session, time_dimension: str = "monthly", 
                        start: Optional[str] = None, end: Optional[str] = None,
-                       categories: Optional[List[str]] = None) -> Dict[str, Any]:
+                       categories: Optional[List[str]] = None, use_cache: bool = True) -> Dict[str, Any]:
         """
         生成多维度收支报表
 
+        结果按报表参数和数据版本缓存，交易数据变更后自动重新计算。
+
         Args:
             db: 数据库会话
             time_dimension: 时间维度，可选值：daily, weekly, monthly, quarterly, custom
             start: 自定义开始日期，格式YYYY-MM-DD
             end: 自定义结束日期，格式YYYY-MM-DD
             categories: 筛选分类列表
+            use_cache: 是否使用报表缓存
 
         Returns:
             报表数据，包含收入、支出、结余、分类统计等
@@ -179,76 +305,44 @@ class ReportService:
         # 获取日期范围
         start_date, end_date, desc = ReportService._get_date_range(time_dimension, start, end)
 
-        # 查询交易
-        query = db.query(Transaction).filter(
-            and_(Transaction.created_at >= start_date, Transaction.created_at <= end_date)
-        )
-        
         # 分类筛选
+        valid_categories = None
         if categories:
-            valid_categories = [c.strip() for c in categories if c.strip()]
-            if valid_categories:
-                query = query.filter(Transaction.category.in_(valid_categories))
-
-        transactions = query.all()
-
-        # 计算总收入和支出
-        total_income = sum(t.amount for t in transactions if t.amount > 0)
-        total_expense = -sum(t.amount for t in transactions if t.amount < 0)
-        balance = total_income - total_expense
+            valid_categories = [c.strip() for c in categories if c.strip()] or None
 
-        # 按分类统计
-        category_stats = {}
-        for transaction in transactions:
-            if transaction.category not in category_stats:
-                category_stats[transaction.category] = {
-                    "income": 0,
-                    "expense": 0,
-                    "count": 0
-                }
-            
-            if transaction.amount > 0:
-                category_stats[transaction.category]["income"] += transaction.amount
-            else:
-                category_stats[transaction.category]["expense"] += -transaction.amount
-            category_stats[transaction.category]["count"] += 1
+        # 相对时间维度按解析后的起止时间作为缓存键，跨周期时不会命中旧结果
+        cache_key = None
+        if use_cache:
+            token, version = get_data_version(db)
+            if token is not None:
+                cache_key = report_cache.make_key(token, version, time_dimension, start_date, end_date, valid_categories)
+                cached = report_cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
-        # 计算分类占比
-        for category, stats in category_stats.items():
-            if total_income > 0:
-                stats["income_percentage"] = (stats["income"] / total_income) * 100
-            else:
-                stats["income_percentage"] = 0
-            if total_expense > 0:
-                stats["expense_percentage"] = (stats["expense"] / total_expense) * 100
-            else:
-                stats["expense_percentage"] = 0
-
-        # 计算环比数据
+        # 计算环比基准周期
         base_start, base_end = ReportService.get_base_period(time_dimension, start_date, end_date)
-        base_income = 0
-        base_expense = 0
-        base_balance = 0
-        comparison_data = None
-        
+        periods = [(start_date, end_date)]
         if base_start and base_end:
             # 基准周期确保为datetime对象
             from datetime import date
             if isinstance(base_start, date):
                 base_start = datetime.combine(base_start, datetime.min.time())
                 base_end = datetime.combine(base_end, datetime.max.time())
-            base_transactions = db.query(Transaction).filter(
-                and_(Transaction.created_at >= base_start, Transaction.created_at <= base_end)
-            )
-            
-            if categories:
-                valid_categories = [c.strip() for c in categories if c.strip()]
-                if valid_categories:
-                    base_transactions = base_transactions.filter(Transaction.category.in_(valid_categories))
-                    
-            base_transactions = base_transactions.all()
-            base_income = sum(t.amount for t in base_transactions if t.amount > 0)
-            base_expense = -sum(t.amount for t in base_transactions if t.amount < 0)
+            periods.append((base_start, base_end))
+
+        # 在数据库端一次查询同时聚合当前周期和基准周期
+        period_results = ReportService._aggregate_periods(db, periods, valid_categories)
+        category_stats, total_income, total_expense, transaction_count = period_results[0]
+        # 以下收支金额均为整数分，构建结果时再换算为元
+        balance = total_income - total_expense
+
+        base_income = 0
+        base_expense = 0
+        base_balance = 0
+        comparison_data = None
+        if len(period_results) > 1:
+            _, base_income, base_expense, _ = period_results[1]
             base_balance = base_income - base_expense
 
         # 计算环比变化率
@@ -263,9 +357,9 @@ class ReportService:
             
             comparison_data = {
                 "period": f"{base_start.strftime('%Y-%m-%d')} ~ {base_end.strftime('%Y-%m-%d')}" if time_dimension == "custom" else base_start.strftime("%Y-%m" if time_dimension == "monthly" else "%Y-%W" if time_dimension == "weekly" else "%Y-%m-%d"),
-                "total_income": round(base_income, 2),
-                "total_expense": round(base_expense, 2),
-                "balance": round(base_balance, 2),
+                "total_income": from_minor(base_income),
+                "total_expense": from_minor(base_expense),
+                "balance": from_minor(base_balance),
                 "income_change": income_change,
                 "expense_change": expense_change,
                 "balance_change": balance_change
@@ -275,18 +369,20 @@ class ReportService:
         result = {
             "period": f"{start_date.strftime('%Y-%m-%d')}" if time_dimension == "daily" else f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}" if time_dimension == "custom" else start_date.strftime("%Y-%m" if time_dimension == "monthly" else "%Y-%W" if time_dimension == "weekly" else "%Y-Q%q" if time_dimension == "quarterly" else desc),
             "time_dimension": time_dimension,
-            "total_income": round(total_income, 2),
-            "total_expense": round(total_expense, 2),
-            "balance": round(balance, 2),
-            "transaction_count": len(transactions),
+            "total_income": from_minor(total_income),
+            "total_expense": from_minor(total_expense),
+            "balance": from_minor(balance),
+            "transaction_count": transaction_count,
             "category_stats": category_stats,
-            "has_data": len(transactions) > 0
+            "has_data": transaction_count > 0
         }
         
         # 添加环比数据（如果有基准周期）
         if 'comparison_data' in locals() and comparison_data:
             result["comparison"] = comparison_data
-            
+
+        if cache_key is not None:
+            report_cache.put(cache_key, result)
         return result
     
     @staticmethod
@@ -457,3 +553,387 @@ class ReportService:
             lines.append("| " + " | ".join(row) + " |")
 
         return "\n".join(lines)
+
+    @staticmethod
+    def _period_label(time_dimension: str, start_date: datetime) -> str:
+        """生成时间序列中单个周期的显示名称"""
+        if time_dimension == "daily":
+            return start_date.strftime("%Y-%m-%d")
+        if time_dimension == "weekly":
+            return start_date.strftime("%Y-%W")
+        if time_dimension == "quarterly":
+            return f"{start_date.year}-Q{(start_date.month - 1) // 3 + 1}"
+        return start_date.strftime("%Y-%m")
+
+    @staticmethod
+    def _series_buckets(time_dimension: str, periods: int, until: Optional[str] = None) -> List[Tuple[datetime, datetime]]:
+        """
+        计算时间序列的各周期起止时间，按时间从早到晚排列
+
+        最后一个周期为当前周期（或包含until的周期），其余周期按get_base_period逐个向前推算，
+        与单次报表及其环比的周期划分完全一致。
+        """
+        start_date, end_date, _ = ReportService._get_date_range(time_dimension)
+        if until:
+            try:
+                until_date = datetime.strptime(until, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("日期格式应为YYYY-MM-DD")
+            if until_date > end_date:
+                raise ValueError("截止日期不能晚于当前周期")
+            while start_date > until_date:
+                start_date, end_date = ReportService.get_base_period(time_dimension, start_date, end_date)
+
+        buckets = [(start_date, end_date)]
+        while len(buckets) < periods:
+            start_date, end_date = ReportService.get_base_period(time_dimension, start_date, end_date)
+            buckets.append((start_date, end_date))
+        return list(reversed(buckets))
+
+    @staticmethod
+    def generate_series(db: Session, time_dimension: str = "monthly", periods: int = 12,
+                        categories: Optional[List[str]] = None, by_category: bool = False,
+                        until: Optional[str] = None) -> Dict[str, Any]:
+        """
+        生成最近N个周期的收支时间序列
+
+        各周期的起止时间与 generate_report 相同，全部周期通过一条按周期键分组的查询聚合。
+
+        Args:
+            db: 数据库会话
+            time_dimension: 时间维度，可选值：daily, weekly, monthly, quarterly
+            periods: 周期数量
+            categories: 筛选分类列表
+            by_category: 是否按分类拆分每个周期的收支
+            until: 截止日期，格式YYYY-MM-DD，最后一个周期为包含该日期的周期，默认为当前周期
+
+        Returns:
+            时间序列数据，periods按时间从早到晚排列
+
+        Raises:
+            ValueError: 当时间维度、周期数量或日期无效时
+        """
+        if time_dimension not in SERIES_DIMENSIONS:
+            raise ValueError(f"时间序列不支持的时间维度: {time_dimension}，可选值: {', '.join(SERIES_DIMENSIONS)}")
+        if not 1 <= periods <= MAX_SERIES_PERIODS:
+            raise ValueError(f"周期数量应在1到{MAX_SERIES_PERIODS}之间")
+
+        valid_categories = None
+        if categories:
+            valid_categories = [c.strip() for c in categories if c.strip()] or None
+
+        buckets = ReportService._series_buckets(time_dimension, periods, until)
+
+        # 按各周期的起止日期映射周期键，一次GROUP BY完成全部周期的聚合
+        period_key = case(
+            *[
+                (DailyCategoryRollup.day.between(start.date(), end.date()), index)
+                for index, (start, end) in enumerate(buckets)
+            ],
+            else_=None
+        ).label("period_key")
+        group_columns = [period_key]
+        if by_category:
+            group_columns.append(DailyCategoryRollup.category)
+
+        query = db.query(
+            *group_columns,
+            func.sum(DailyCategoryRollup.income),
+            func.sum(DailyCategoryRollup.expense),
+            func.sum(DailyCategoryRollup.count)
+        ).filter(
+            DailyCategoryRollup.day.between(buckets[0][0].date(), buckets[-1][1].date())
+        )
+        if valid_categories:
+            query = query.filter(DailyCategoryRollup.category.in_(valid_categories))
+
+        totals: Dict[int, List[int]] = {}
+        category_totals: Dict[int, Dict[str, List[int]]] = {}
+        for row in query.group_by(*group_columns).all():
+            index = row[0]
+            if index is None:
+                continue
+            income, expense, count = (value or 0 for value in row[-3:])
+            bucket_total = totals.setdefault(index, [0, 0, 0])
+            bucket_total[0] += income
+            bucket_total[1] += expense
+            bucket_total[2] += count
+            if by_category:
+                category_totals.setdefault(index, {})[row[1]] = [income, expense, count]
+
+        series = []
+        for index, (start, end) in enumerate(buckets):
+            income, expense, count = totals.get(index, [0, 0, 0])
+            item = {
+                "period": ReportService._period_label(time_dimension, start),
+                "start": start.strftime("%Y-%m-%d"),
+                "end": end.strftime("%Y-%m-%d"),
+                "total_income": from_minor(income),
+                "total_expense": from_minor(expense),
+                "balance": from_minor(income - expense),
+                "transaction_count": count
+            }
+            if by_category:
+                item["category_stats"] = {
+                    category: {
+                        "income": from_minor(values[0]),
+                        "expense": from_minor(values[1]),
+                        "count": values[2]
+                    }
+                    for category, values in sorted(category_totals.get(index, {}).items())
+                }
+            series.append(item)
+
+        return {
+            "time_dimension": time_dimension,
+            "categories": valid_categories,
+            "by_category": by_category,
+            "periods": series
+        }
+
+    @staticmethod
+    def _series_rows(series_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """将时间序列展开为表格行，按分类拆分时每个周期的每个分类一行"""
+        rows = []
+        for item in series_data["periods"]:
+            base = {"period": item["period"], "start": item["start"], "end": item["end"]}
+            if series_data.get("by_category"):
+                for category, stats in item["category_stats"].items():
+                    rows.append({
+                        **base,
+                        "category": category,
+                        "income": stats["income"],
+                        "expense": stats["expense"],
+                        "balance": stats["income"] - stats["expense"],
+                        "count": stats["count"]
+                    })
+            else:
+                rows.append({
+                    **base,
+                    "income": item["total_income"],
+                    "expense": item["total_expense"],
+                    "balance": item["balance"],
+                    "count": item["transaction_count"]
+                })
+        return rows
+
+    @staticmethod
+    def format_series(series_data: Dict[str, Any], format_type: str = "text") -> str:
+        """
+        格式化时间序列输出
+
+        Args:
+            series_data: generate_series 返回的时间序列数据
+            format_type: 输出格式，text、markdown、csv 或 json
+
+        Returns:
+            格式化后的字符串
+        """
+        if format_type == "json":
+            return json.dumps(series_data, ensure_ascii=False, indent=2)
+
+        rows = ReportService._series_rows(series_data)
+        columns = ["period", "start", "end"]
+        if series_data.get("by_category"):
+            columns.append("category")
+        columns += ["income", "expense", "balance", "count"]
+
+        if format_type == "csv":
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=columns, lineterminator="\n")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({key: f"{row[key]:.2f}" if isinstance(row[key], float) else row[key] for key in columns})
+            return output.getvalue()
+
+        headers = {
+            "period": "周期", "start": "开始日期", "end": "结束日期", "category": "分类",
+            "income": "收入", "expense": "支出", "balance": "结余", "count": "笔数"
+        }
+        cells = [
+            [f"{row[key]:.2f}" if isinstance(row[key], float) else str(row[key]) for key in columns]
+            for row in rows
+        ]
+        title = f"{SERIES_DIMENSIONS[series_data['time_dimension']]}收支趋势（最近{len(series_data['periods'])}期）"
+
+        if format_type == "markdown":
+            lines = [f"# {title}", ""]
+            lines.append("| " + " | ".join(headers[key] for key in columns) + " |")
+            lines.append("| " + " | ".join("-----" for _ in columns) + " |")
+            lines.extend("| " + " | ".join(row) + " |" for row in cells)
+            return "\n".join(lines)
+
+        # 按显示宽度对齐，中文字符占两列
+        header_cells = [headers[key] for key in columns]
+        widths = [max(Formatter.display_width(cell) for cell in [header] + [row[i] for row in cells]) for i, header in enumerate(header_cells)]
+
+        def render(row: List[str]) -> str:
+            return "  ".join(Formatter.pad(cell, widths[i]) for i, cell in enumerate(row)).rstrip()
+
+        lines = [title, "=" * 70, render(header_cells), "-" * 70]
+        lines.extend(render(row) for row in cells)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _pivot_key(cols: str, day) -> str:
+        """计算日期在交叉报表中所属列的键"""
+        if cols == "quarter":
+            return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+        return day.strftime(PIVOT_COLUMNS[cols][1])
+
+    @staticmethod
+    def _pivot_key_expression(cols: str):
+        """生成与_pivot_key一致的SQL列键表达式"""
+        day = DailyCategoryRollup.day
+        if cols == "quarter":
+            quarter = (cast(func.strftime("%m", day), Integer) + 2) // 3
+            return func.strftime("%Y", day).concat("-Q").concat(cast(quarter, String))
+        return func.strftime(PIVOT_COLUMNS[cols][1], day)
+
+    @staticmethod
+    def pivot_columns(start: str, end: str, cols: str = "month") -> List[str]:
+        """
+        计算交叉报表在区间内的全部列
+
+        Args:
+            start: 开始日期，格式YYYY-MM-DD
+            end: 结束日期，格式YYYY-MM-DD
+            cols: 列维度，可选值：day, week, month, quarter, year
+
+        Returns:
+            按时间排列的列键列表
+
+        Raises:
+            ValueError: 当日期或列维度无效，或列数过多时
+        """
+        if cols not in PIVOT_COLUMNS:
+            raise ValueError(f"交叉报表不支持的列维度: {cols}，可选值: {', '.join(PIVOT_COLUMNS)}")
+        start_date, end_date, _ = ReportService._get_date_range("custom", start, end)
+
+        keys = []
+        day = start_date.date()
+        while day <= end_date.date():
+            key = ReportService._pivot_key(cols, day)
+            if not keys or keys[-1] != key:
+                keys.append(key)
+                if len(keys) > MAX_PIVOT_COLUMNS:
+                    raise ValueError(f"交叉报表列数超过{MAX_PIVOT_COLUMNS}，请缩小区间或使用更粗的列维度")
+            day += timedelta(days=1)
+        return keys
+
+    @staticmethod
+    def iter_pivot(db: Session, start: str, end: str, cols: str = "month", value: str = "net",
+                   categories: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Any], Any]]:
+        """
+        逐行生成分类 × 周期交叉报表
+
+        整个矩阵由一条按(分类, 列键)分组并排序的查询得到，结果逐行读取；
+        每读完一个分类即产出一行，行合计与列合计在同一次遍历中累加，最后产出合计行。
+
+        Args:
+            db: 数据库会话
+            start: 开始日期，格式YYYY-MM-DD
+            end: 结束日期，格式YYYY-MM-DD
+            cols: 列维度，可选值：day, week, month, quarter, year
+            value: 统计值，可选值：income, expense, net, count
+            categories: 筛选分类列表
+
+        Returns:
+            (分类, 各列数值, 行合计) 迭代器，最后一行为 ("合计", 列合计, 总计)
+
+        Raises:
+            ValueError: 当参数无效时
+        """
+        if value not in PIVOT_VALUES:
+            raise ValueError(f"交叉报表不支持的统计值: {value}，可选值: {', '.join(PIVOT_VALUES)}")
+        columns = ReportService.pivot_columns(start, end, cols)
+        index = {key: i for i, key in enumerate(columns)}
+        start_date, end_date, _ = ReportService._get_date_range("custom", start, end)
+
+        measures = {
+            "income": DailyCategoryRollup.income,
+            "expense": DailyCategoryRollup.expense,
+            "net": DailyCategoryRollup.income - DailyCategoryRollup.expense,
+            "count": DailyCategoryRollup.count,
+        }
+        convert = (lambda amount: amount) if value == "count" else from_minor
+
+        period_key = ReportService._pivot_key_expression(cols).label("period_key")
+        query = db.query(
+            DailyCategoryRollup.category, period_key, func.sum(measures[value])
+        ).filter(
+            DailyCategoryRollup.day.between(start_date.date(), end_date.date())
+        )
+        if categories:
+            query = query.filter(DailyCategoryRollup.category.in_(categories))
+        query = query.group_by(DailyCategoryRollup.category, period_key).order_by(DailyCategoryRollup.category, period_key)
+
+        column_totals = [0] * len(columns)
+        current_category = None
+        current_values = None
+        for category, key, amount in query.yield_per(1000):
+            if category != current_category:
+                if current_category is not None:
+                    yield current_category, [convert(v) for v in current_values], convert(sum(current_values))
+                current_category = category
+                current_values = [0] * len(columns)
+            position = index[key]
+            current_values[position] += amount or 0
+            column_totals[position] += amount or 0
+        if current_category is not None:
+            yield current_category, [convert(v) for v in current_values], convert(sum(current_values))
+
+        yield "合计", [convert(v) for v in column_totals], convert(sum(column_totals))
+
+    @staticmethod
+    def format_pivot(columns: List[str], rows: Iterable[Tuple[str, List[Any], Any]], format_type: str = "text",
+                     title: Optional[str] = None) -> Iterator[str]:
+        """
+        逐行格式化交叉报表
+
+        Args:
+            columns: 列键列表
+            rows: iter_pivot 产出的行
+            format_type: 输出格式，text、markdown 或 csv
+            title: 报表标题，仅text和markdown格式使用
+
+        Returns:
+            输出行迭代器，每项为一行文本（不含换行符）
+        """
+        def cell(number: Any) -> str:
+            return f"{number:.2f}" if isinstance(number, float) else str(number)
+
+        header = ["分类"] + columns + ["合计"]
+
+        if format_type == "csv":
+            output = io.StringIO()
+            writer = csv.writer(output, lineterminator="\n")
+            writer.writerow(header)
+            yield output.getvalue().rstrip("\n")
+            for category, values, total in rows:
+                output.seek(0)
+                output.truncate()
+                writer.writerow([category] + [cell(v) for v in values] + [cell(total)])
+                yield output.getvalue().rstrip("\n")
+            return
+
+        if format_type == "markdown":
+            if title:
+                yield f"# {title}"
+                yield ""
+            yield "| " + " | ".join(header) + " |"
+            yield "| " + " | ".join("-----" for _ in header) + " |"
+            for category, values, total in rows:
+                yield "| " + " | ".join([category] + [cell(v) for v in values] + [cell(total)]) + " |"
+            return
+
+        # 逐行输出无法预知全部内容的宽度，分类列固定宽度，数值列按列名和常见金额宽度对齐
+        widths = [16] + [max(Formatter.display_width(key), 12) for key in columns] + [14]
+        if title:
+            yield title
+            yield "=" * 70
+        yield "  ".join(Formatter.pad(text, widths[i]) for i, text in enumerate(header)).rstrip()
+        yield "-" * 70
+        for category, values, total in rows:
+            cells = [category] + [cell(v) for v in values] + [cell(total)]
+            yield "  ".join(Formatter.pad(text, widths[i]) for i, text in enumerate(cells)).rstrip()
@@ -0,0 +1,135 @@
+"""全文检索业务逻辑服务"""
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from cashlog.models.search import FTS_INDEXES, TRIGRAM_MIN_LENGTH, resolve_fts_tokenizer
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+
+# 摘要中命中词的标记
+SNIPPET_START = "["
+SNIPPET_END = "]"
+
+
+class SearchService:
+    """全文检索服务类"""
+
+    @staticmethod
+    def _parse_terms(query: str) -> List[str]:
+        """将查询字符串按空白切分为查询词"""
+        terms = [term for term in (query or "").split() if term]
+        if not terms:
+            raise ValueError("搜索关键词不能为空")
+        return terms
+
+    @staticmethod
+    def _match_expression(terms: List[str]) -> str:
+        """将查询词转换为FTS5 MATCH表达式，每个词作为短语匹配，多个词之间为AND关系"""
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    @staticmethod
+    def _like_conditions(table_name: str, columns: List[str], terms: List[Tuple[int, str]],
+                         params: Dict[str, Any]) -> List[str]:
+        """为查询词生成业务表上的LIKE条件，每个词需命中任一索引列"""
+        conditions = []
+        for i, term in terms:
+            params[f"term_{i}"] = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append(
+                "(" + " OR ".join(f"{table_name}.{column} LIKE :term_{i} ESCAPE '\\'" for column in columns) + ")"
+            )
+        return conditions
+
+    @staticmethod
+    def _build_select(kind: str, fts_terms: List[Tuple[int, str]], like_terms: List[Tuple[int, str]],
+                      params: Dict[str, Any]) -> str:
+        """构建单类记录的检索语句，返回(类型, ID, 相关度, 摘要)"""
+        table_name, fts_name, columns = FTS_INDEXES[kind]
+        like_conditions = SearchService._like_conditions(table_name, columns, like_terms, params)
+        if fts_terms:
+            # 能由索引匹配的词通过FTS检索并按相关度排序，其余的词在命中的记录上以LIKE过滤
+            params["match"] = SearchService._match_expression([term for _, term in fts_terms])
+            return (
+                f"SELECT '{kind}' AS kind, {fts_name}.rowid AS id, bm25({fts_name}) AS score, "
+                f"snippet({fts_name}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) AS snippet "
+                f"FROM {fts_name} JOIN {table_name} ON {table_name}.id = {fts_name}.rowid "
+                f"WHERE {' AND '.join([f'{fts_name} MATCH :match', *like_conditions])}"
+            )
+
+        # 全部查询词都过短时trigram索引无法匹配，退化为对业务表的LIKE扫描
+        return (
+            f"SELECT '{kind}' AS kind, id, 0.0 AS score, "
+            f"COALESCE({columns[-1]}, {columns[0]}) AS snippet "
+            f"FROM {table_name} WHERE {' AND '.join(like_conditions)}"
+        )
+
+    @staticmethod
+    def search(
+        db: Session,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        全文检索交易和待办事项
+
+        结果按相关度（bm25）排序，相关度相同时新记录在前。
+        使用trigram分词器时，少于3个字符的词以LIKE条件过滤，只由这类词组成的查询没有相关度排序。
+
+        Args:
+            db: 数据库会话
+            query: 搜索关键词，多个关键词用空格分隔，需同时命中
+            kind: 记录类型，transaction 或 todo，默认同时检索两者
+            limit: 返回条数
+            offset: 跳过条数
+
+        Returns:
+            (检索结果列表, 命中总数)，每条结果包含kind、id、score、snippet和record
+
+        Raises:
+            ValueError: 当关键词为空或记录类型无效时
+        """
+        terms = SearchService._parse_terms(query)
+        if kind is None:
+            kinds = list(FTS_INDEXES)
+        elif kind in FTS_INDEXES:
+            kinds = [kind]
+        else:
+            raise ValueError(f"无效的记录类型: {kind}，可选值: {', '.join(FTS_INDEXES)}")
+
+        # trigram索引无法匹配少于3个字符的词，这些词改为LIKE条件，其余的词仍通过索引匹配并排序
+        numbered = list(enumerate(terms))
+        if resolve_fts_tokenizer() == "trigram":
+            fts_terms = [(i, term) for i, term in numbered if len(term) >= TRIGRAM_MIN_LENGTH]
+            like_terms = [(i, term) for i, term in numbered if len(term) < TRIGRAM_MIN_LENGTH]
+        else:
+            fts_terms, like_terms = numbered, []
+        params: Dict[str, Any] = {}
+        union = " UNION ALL ".join(SearchService._build_select(k, fts_terms, like_terms, params) for k in kinds)
+
+        total = db.execute(text(f"SELECT COUNT(*) FROM ({union})"), params).scalar()
+        rows = db.execute(
+            text(f"SELECT kind, id, score, snippet FROM ({union}) ORDER BY score, id DESC LIMIT :limit OFFSET :offset"),
+            {**params, "limit": limit, "offset": offset}
+        ).all()
+
+        # 批量加载命中的记录
+        records = {}
+        for k, model in (("transaction", Transaction), ("todo", Todo)):
+            ids = [row.id for row in rows if row.kind == k]
+            if ids:
+                records.update({(k, record.id): record for record in db.query(model).filter(model.id.in_(ids))})
+
+        results = []
+        for row in rows:
+            record = records.get((row.kind, row.id))
+            if record is None:
+                continue
+            results.append({
+                "kind": row.kind,
+                "id": row.id,
+                "score": row.score,
+                "snippet": row.snippet,
+                "record": record,
+            })
+        return results, total
@@ -0,0 +1,141 @@
+"""数据库统计服务
+
+行数默认为估算值，不扫描表数据：
+- 普通表和虚拟表取最大rowid，按rowid倒序读一条即可得到；只追加的表结果准确，删除过记录的表偏大
+- 全文索引的内部表（rowid不连续）和WITHOUT ROWID表优先使用 ANALYZE 写入 sqlite_stat1 的行数，
+  没有统计信息时累加该表B树叶子页上的记录数
+exact=True 时对每个表执行 COUNT(*)。
+各表和索引占用的空间来自 dbstat 虚拟表，按B树汇总页大小。
+"""
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+
+class StatsService:
+    """数据库统计服务类"""
+
+    @staticmethod
+    def get_row_counts(db_path: str, exact: bool = False) -> dict:
+        """
+        获取各表的行数
+
+        Args:
+            db_path: 数据库文件路径
+            exact: 是否执行 COUNT(*) 统计准确行数
+
+        Returns:
+            {"tables": {表名: 行数}, "estimated": [行数为估算值的表名]}
+        """
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY rowid")]
+            stat1 = {} if exact else StatsService._read_stat1(conn)
+            table_types = StatsService._table_types(conn)
+            counts, estimated = {}, []
+            for table in tables:
+                if exact:
+                    counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                    continue
+                counts[table] = StatsService._estimate_rows(conn, table, table_types.get(table), stat1)
+                estimated.append(table)
+            return {"tables": counts, "estimated": estimated}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def get_object_sizes(db_path: str) -> dict:
+        """
+        获取各表和索引占用的空间
+
+        Args:
+            db_path: 数据库文件路径
+
+        Returns:
+            包含 file_size、page_size、free_bytes 和 objects 的字典；
+            objects 为 {name, type, table, pages, bytes} 列表，按占用空间从大到小排列
+        """
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            owners = {
+                name: (kind, table)
+                for kind, name, table in conn.execute("SELECT type, name, tbl_name FROM sqlite_master")
+            }
+            # 全文索引的内部表计入所属的虚拟表
+            table_types = StatsService._table_types(conn)
+            virtual_tables = [name for name, kind in table_types.items() if kind == "virtual"]
+            for name, kind in table_types.items():
+                if kind == "shadow":
+                    parent = next((v for v in virtual_tables if name.startswith(v + "_")), name)
+                    owners[name] = ("table", parent)
+            objects = []
+            for name, pages, size in conn.execute(
+                "SELECT name, pageno, pgsize FROM dbstat WHERE aggregate = 1 ORDER BY pgsize DESC, name"
+            ):
+                # sqlite_schema 本身不在 sqlite_master 中
+                kind, table = owners.get(name, ("table", name))
+                objects.append({"name": name, "type": kind, "table": table, "pages": pages, "bytes": size})
+            return {
+                "file_size": os.path.getsize(db_path),
+                "page_size": page_size,
+                "free_bytes": free_pages * page_size,
+                "objects": objects,
+            }
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_stat1(conn: sqlite3.Connection) -> Dict[str, int]:
+        """读取 sqlite_stat1 中各表的行数，未执行过 ANALYZE 时返回空字典"""
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return {}
+        counts: Dict[str, int] = {}
+        for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            # stat 的第一个数字是该表（或索引）的近似行数
+            rows = int(str(stat).split()[0])
+            counts[table] = max(counts.get(table, 0), rows)
+        return counts
+
+    @staticmethod
+    def _table_types(conn: sqlite3.Connection) -> Dict[str, str]:
+        """读取各表的类型（table、virtual、shadow），SQLite版本不支持 PRAGMA table_list 时返回空字典"""
+        try:
+            return {row[1]: row[2] for row in conn.execute("PRAGMA table_list") if row[0] == "main"}
+        except sqlite3.OperationalError:
+            return {}
+
+    @staticmethod
+    def _estimate_rows(conn: sqlite3.Connection, table: str, table_type: Optional[str], stat1: Dict[str, int]) -> int:
+        """估算单个表的行数"""
+        if table_type != "shadow":
+            try:
+                row = conn.execute(f'SELECT rowid FROM "{table}" ORDER BY rowid DESC LIMIT 1').fetchone()
+                return row[0] if row else 0
+            except sqlite3.OperationalError:
+                # WITHOUT ROWID 表没有rowid
+                pass
+        if table in stat1:
+            return stat1[table]
+        row = conn.execute(
+            "SELECT COALESCE(SUM(ncell), 0) FROM dbstat WHERE name = ? AND pagetype = 'leaf'", (table,)
+        ).fetchone()
+        return row[0]
+
+    @staticmethod
+    def group_by_table(objects: List[dict]) -> List[dict]:
+        """
+        将表和索引的空间按所属表汇总
+
+        Args:
+            objects: get_object_sizes 返回的 objects
+
+        Returns:
+            {table, table_bytes, index_bytes} 列表，按总空间从大到小排列
+        """
+        totals: Dict[str, dict] = {}
+        for obj in objects:
+            entry = totals.setdefault(obj["table"], {"table": obj["table"], "table_bytes": 0, "index_bytes": 0})
+            entry["index_bytes" if obj["type"] == "index" else "table_bytes"] += obj["bytes"]
+        return sorted(totals.values(), key=lambda e: e["table_bytes"] + e["index_bytes"], reverse=True)
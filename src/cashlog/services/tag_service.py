@@ -0,0 +1,44 @@
+"""标签业务逻辑服务"""
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+from cashlog.models.tag import Tag, LINK_TABLES
+
+
+class TagService:
+    """标签服务类"""
+
+    @staticmethod
+    def tagged_ids(kind: str, tags: str, match: Optional[str] = None) -> Optional[Select]:
+        """
+        构建按标签筛选记录ID的子查询
+
+        Args:
+            kind: 记录类型，transaction 或 todo
+            tags: 逗号分隔的标签字符串
+            match: 匹配方式，any（包含任一标签，默认）或 all（包含全部标签）
+
+        Returns:
+            记录ID子查询，没有有效标签时返回None
+
+        Raises:
+            ValueError: 当匹配方式无效时
+        """
+        match = (match or "any").lower()
+        if match not in ("any", "all"):
+            raise ValueError("标签匹配方式无效，可选值：any, all")
+
+        names = Tag.parse(tags)
+        if not names:
+            return None
+
+        link_table, owner_column = LINK_TABLES[kind]
+        query = (
+            select(owner_column)
+            .join(Tag, Tag.id == link_table.c.tag_id)
+            .where(Tag.name.in_(names))
+        )
+        if match == "all" and len(names) > 1:
+            query = query.group_by(owner_column).having(func.count(link_table.c.tag_id) == len(names))
+        return query
+
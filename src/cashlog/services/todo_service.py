@@ -1,10 +1,13 @@
 """待办事项业务逻辑服务"""
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session, Query, selectinload
 from sqlalchemy import and_, or_
 from cashlog.models.todo import Todo, TodoStatus
 from cashlog.models.transaction import Transaction
+from cashlog.services.tag_service import TagService
+from cashlog.services.transaction_service import STREAM_BATCH_SIZE
+from cashlog.utils.cursor import paginate_by_cursor
 
 
 class TodoService:
@@ -75,11 +78,25 @@ class TodoService:
 
         Args:
             db: 数据库会话
-            filters: 查询条件，包括status、category、deadline等
+            filters: 查询条件，包括status、category、deadline、tags、tag_match等
 
         Returns:
             待办事项列表
         """
+        return TodoService.get_todos_query(db, **filters).all()
+
+    @staticmethod
+    def get_todos_query(db: Session, **filters) -> Query:
+        """
+        构建待办事项列表查询，不执行查询，便于在数据库端分页
+
+        Args:
+            db: 数据库会话
+            filters: 查询条件，包括status、category、deadline、tags、tag_match等
+
+        Returns:
+            按创建时间倒序排列的待办事项查询对象
+        """
         query = db.query(Todo)
 
         # 按状态筛选
@@ -114,17 +131,65 @@ class TodoService:
             except ValueError:
                 raise ValueError("截止时间格式应为YYYY-MM-DD")
 
-        # 按标签筛选（包含任一标签即可）
+        # 按标签筛选，tag_match为any时包含任一标签即可，为all时需包含全部标签
         if filters.get("tags"):
-            tags = filters["tags"].split(",")
-            tag_filters = [Todo.tags.like(f"%{tag.strip()}%") for tag in tags if tag.strip()]
-            if tag_filters:
-                query = query.filter(or_(*tag_filters))
+            tagged_ids = TagService.tagged_ids("todo", filters["tags"], filters.get("tag_match"))
+            if tagged_ids is not None:
+                query = query.filter(Todo.id.in_(tagged_ids))
+
+        # 按创建时间排序，时间相同时按ID排序，保证分页结果稳定
+        return query.order_by(Todo.created_at.desc(), Todo.id.desc())
+
+    @staticmethod
+    def get_todos_page(db: Session, cursor: Optional[str] = None, limit: int = 50,
+                       **filters) -> Tuple[List[Todo], Optional[str]]:
+        """
+        按游标分页查询待办事项列表
+
+        Args:
+            db: 数据库会话
+            cursor: 上一页返回的游标，为None时从第一页开始
+            limit: 每页条数
+            filters: 查询条件，同get_todos
+
+        Returns:
+            当前页待办事项列表和下一页游标
+        """
+        query = TodoService.get_todos_query(db, **filters)
+        return paginate_by_cursor(query, Todo, cursor, limit)
+
+    @staticmethod
+    def iter_todos(db: Session, offset: int = 0, limit: Optional[int] = None, with_transactions: bool = False,
+                   batch_size: int = STREAM_BATCH_SIZE, **filters) -> Iterator[Todo]:
+        """
+        流式查询待办事项列表
+
+        Args:
+            db: 数据库会话
+            offset: 跳过的条数
+            limit: 最多返回的条数，为None时不限制
+            with_transactions: 是否同时加载关联的交易，按批次一次查询
+            batch_size: 每批读取的行数
+            filters: 查询条件，同get_todos
 
-        # 按创建时间排序
-        query = query.order_by(Todo.created_at.desc())
+        Returns:
+            按创建时间倒序排列的待办事项迭代器
+
+        Raises:
+            ValueError: 当offset或limit为负数时
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset和limit不能为负数")
 
-        return query.all()
+        query = TodoService.get_todos_query(db, **filters)
+        if with_transactions:
+            query = query.options(selectinload(Todo.transaction))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        # 立即执行查询，参数错误在开始输出前抛出
+        return iter(query.yield_per(batch_size))
 
     @staticmethod
     def update_todo_status(db: Session, todo_id: int, status: str) -> Todo:
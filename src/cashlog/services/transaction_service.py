@@ -1,15 +1,82 @@
 """交易业务逻辑服务"""
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session, Query, selectinload
 from sqlalchemy import and_, or_
 from cashlog.models.transaction import Transaction
 from cashlog.models.todo import Todo
+from cashlog.services.tag_service import TagService
+from cashlog.utils.cursor import paginate_by_cursor
+from cashlog.utils.money import to_minor
+
+# 流式查询每批从数据库读取的行数
+STREAM_BATCH_SIZE = 500
+
+# 交易时间支持的格式，ISO 8601格式（如导出数据中的时间）另由fromisoformat解析
+CREATED_AT_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
 
 
 class TransactionService:
     """交易服务类"""
 
+    @staticmethod
+    def validate_transaction_data(transaction_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        校验交易数据并转换为字段值，单条创建和批量导入共用同一套规则
+
+        Args:
+            transaction_data: 交易数据，包含amount、category、tags、notes、created_at
+
+        Returns:
+            交易表字段值，包含amount_minor、category、tags、notes，提供时间时包含created_at
+
+        Raises:
+            ValueError: 当金额、分类或时间无效时
+        """
+        # 验证金额格式，并换算为最小货币单位
+        amount_minor = to_minor(transaction_data.get("amount"))
+
+        # 验证必填字段
+        category = transaction_data.get("category")
+        if not category or not category.strip():
+            raise ValueError("分类为必填项")
+
+        tags = transaction_data.get("tags", "")
+        if tags:
+            tags = tags.strip()
+        notes = transaction_data.get("notes", "")
+        if notes:
+            notes = notes.strip()
+
+        values = {
+            "amount_minor": amount_minor,
+            "category": category.strip(),
+            "tags": tags or None,
+            "notes": notes or None,
+        }
+
+        # 如果提供了时间，按支持的格式解析
+        if transaction_data.get("created_at"):
+            values["created_at"] = TransactionService._parse_created_at(transaction_data["created_at"])
+
+        return values
+
+    @staticmethod
+    def _parse_created_at(value: str) -> datetime:
+        """解析交易时间，标准格式走fromisoformat快速路径，批量导入时strptime是主要开销"""
+        try:
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is None:
+                return parsed
+        except ValueError:
+            pass
+        for fmt in CREATED_AT_FORMATS:
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        raise ValueError("时间格式不正确，请使用YYYY-MM-DD HH:MM:SS格式")
+
     @staticmethod
     def create_transaction(db: Session, transaction_data: Dict[str, Any]) -> Transaction:
         """
@@ -22,15 +89,7 @@ class TransactionService:
         Returns:
             创建的交易对象
         """
-        # 验证金额格式
-        try:
-            amount = float(transaction_data["amount"])
-        except (ValueError, TypeError):
-            raise ValueError("金额需为数字")
-
-        # 验证必填字段
-        if not transaction_data.get("category"):
-            raise ValueError("分类为必填项")
+        values = TransactionService.validate_transaction_data(transaction_data)
         
         # 验证关联待办事项ID
         todo_id = transaction_data.get("todo_id")
@@ -44,40 +103,12 @@ class TransactionService:
                 raise ValueError(f"待办事项ID {todo_id} 已关联交易ID {todo.transaction_id}")
 
         # 创建交易对象
-        tags = transaction_data.get("tags", "")
-        if tags:
-            tags = tags.strip()
-        notes = transaction_data.get("notes", "")
-        if notes:
-            notes = notes.strip()
-            
-        transaction = Transaction(
-            amount=amount,
-            category=transaction_data["category"].strip(),
-            tags=tags or None,
-            notes=notes or None
-        )
+        transaction = Transaction(**values)
         
         # 如果有待办事项关联，更新待办事项的交易ID
         if todo_id is not None:
             todo.transaction_id = transaction.id
 
-        # 如果提供了时间，设置时间
-        if transaction_data.get("created_at"):
-            try:
-                # 支持多种时间格式
-                formats = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
-                for fmt in formats:
-                    try:
-                        transaction.created_at = datetime.strptime(transaction_data["created_at"], fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    raise ValueError("时间格式不正确，请使用YYYY-MM-DD HH:MM:SS格式")
-            except ValueError as e:
-                raise e
-
         db.add(transaction)
         db.commit()
         db.refresh(transaction)
@@ -90,11 +121,25 @@ class TransactionService:
 
         Args:
             db: 数据库会话
-            filters: 查询条件，包括month、category、tags、transaction_type等
+            filters: 查询条件，包括month、category、tags、tag_match、transaction_type等
 
         Returns:
             交易列表
         """
+        return TransactionService.get_transactions_query(db, **filters).all()
+
+    @staticmethod
+    def get_transactions_query(db: Session, **filters) -> Query:
+        """
+        构建交易列表查询，不执行查询，便于在数据库端分页
+
+        Args:
+            db: 数据库会话
+            filters: 查询条件，包括month、category、tags、tag_match、transaction_type等
+
+        Returns:
+            按时间倒序排列的交易查询对象
+        """
         query = db.query(Transaction)
 
         # 按月份筛选
@@ -121,24 +166,74 @@ class TransactionService:
         if filters.get("category"):
             query = query.filter(Transaction.category == filters["category"])
 
-        # 按标签筛选（包含任一标签即可）
+        # 按标签筛选，tag_match为any时包含任一标签即可，为all时需包含全部标签
         if filters.get("tags"):
-            tags = filters["tags"].split(",")
-            tag_filters = [Transaction.tags.like(f"%{tag.strip()}%") for tag in tags if tag.strip()]
-            if tag_filters:
-                query = query.filter(or_(*tag_filters))
+            tagged_ids = TagService.tagged_ids("transaction", filters["tags"], filters.get("tag_match"))
+            if tagged_ids is not None:
+                query = query.filter(Transaction.id.in_(tagged_ids))
 
         # 按交易类型筛选
         transaction_type = filters.get("transaction_type")
         if transaction_type == "income":
-            query = query.filter(Transaction.amount > 0)
+            query = query.filter(Transaction.amount_minor > 0)
         elif transaction_type == "expense":
-            query = query.filter(Transaction.amount < 0)
+            query = query.filter(Transaction.amount_minor < 0)
+
+        # 按时间排序，时间相同时按ID排序，保证分页结果稳定
+        return query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
 
-        # 按时间排序
-        query = query.order_by(Transaction.created_at.desc())
+    @staticmethod
+    def iter_transactions(db: Session, offset: int = 0, limit: Optional[int] = None, with_todos: bool = False,
+                          batch_size: int = STREAM_BATCH_SIZE, **filters) -> Iterator[Transaction]:
+        """
+        流式查询交易列表
 
-        return query.all()
+        结果按batch_size分批从数据库游标读取，不一次性加载全部交易，内存占用与总行数无关。
+
+        Args:
+            db: 数据库会话
+            offset: 跳过的条数
+            limit: 最多返回的条数，为None时不限制
+            with_todos: 是否同时加载关联的待办事项，按批次一次查询，避免逐条查询
+            batch_size: 每批读取的行数
+            filters: 查询条件，同get_transactions
+
+        Returns:
+            按时间倒序排列的交易迭代器
+
+        Raises:
+            ValueError: 当offset或limit为负数时
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset和limit不能为负数")
+
+        query = TransactionService.get_transactions_query(db, **filters)
+        if with_todos:
+            query = query.options(selectinload(Transaction.todo))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        # 立即执行查询，参数错误在开始输出前抛出
+        return iter(query.yield_per(batch_size))
+
+    @staticmethod
+    def get_transactions_page(db: Session, cursor: Optional[str] = None, limit: int = 50,
+                              **filters) -> Tuple[List[Transaction], Optional[str]]:
+        """
+        按游标分页查询交易列表
+
+        Args:
+            db: 数据库会话
+            cursor: 上一页返回的游标，为None时从第一页开始
+            limit: 每页条数
+            filters: 查询条件，同get_transactions
+
+        Returns:
+            当前页交易列表和下一页游标
+        """
+        query = TransactionService.get_transactions_query(db, **filters)
+        return paginate_by_cursor(query, Transaction, cursor, limit)
 
     @staticmethod
     def get_transaction_by_id(db: Session, transaction_id: int) -> Optional[Transaction]:
@@ -173,10 +268,7 @@ class TransactionService:
             
         # 更新基本信息
         if "amount" in transaction_data:
-            try:
-                transaction.amount = float(transaction_data["amount"])
-            except (ValueError, TypeError):
-                raise ValueError("金额需为数字")
+            transaction.amount_minor = to_minor(transaction_data["amount"])
                 
         if "category" in transaction_data:
             category = transaction_data["category"].strip()
@@ -1,4 +1,13 @@
-"""工具类包"""
-from cashlog.utils.formatter import Formatter
+"""工具类包
+
+Formatter 依赖 rich，首次访问时才导入，只用到 money 等工具模块时不会加载 rich。
+"""
+import importlib
 
 __all__ = ["Formatter"]
+
+
+def __getattr__(name: str):
+    if name == "Formatter":
+        return importlib.import_module("cashlog.utils.formatter").Formatter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,76 @@
+"""游标（keyset）分页工具"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """
+    将(created_at, id)编码为不透明游标
+
+    Args:
+        created_at: 记录创建时间
+        record_id: 记录ID
+
+    Returns:
+        URL安全的游标字符串
+    """
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解析游标
+
+    Args:
+        cursor: 游标字符串
+
+    Returns:
+        创建时间和记录ID
+
+    Raises:
+        ValueError: 当游标格式无效时
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("游标无效")
+
+
+def paginate_by_cursor(query: Query, model: Any, cursor: Optional[str] = None,
+                       limit: int = 50) -> Tuple[List[Any], Optional[str]]:
+    """
+    按(created_at DESC, id DESC)对查询进行游标分页
+
+    查询需已按 created_at、id 倒序排列。每页只读取 limit + 1 行，
+    深分页的开销与页码无关。
+
+    Args:
+        query: 已排序的查询对象
+        model: 查询的模型类，需包含created_at和id列
+        cursor: 上一页返回的游标，为None时从第一页开始
+        limit: 每页条数
+
+    Returns:
+        当前页记录列表和下一页游标（没有更多数据时为None）
+    """
+    if limit < 1:
+        raise ValueError("每页条数必须大于0")
+
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, record_id))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
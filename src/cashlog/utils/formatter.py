@@ -1,5 +1,7 @@
 """格式化工具类"""
-from typing import List, Dict, Any
+import sys
+import unicodedata
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
@@ -29,22 +31,76 @@ class Formatter:
         
         # 添加数据行
         for row in data:
-            values = []
-            for field in headers.keys():
-                value = row.get(field)
-                # 格式化时间
-                if isinstance(value, datetime):
-                    value = value.strftime("%Y-%m-%d %H:%M:%S")
-                # 格式化数字
-                elif isinstance(value, float):
-                    value = f"{value:.2f}"
-                # 空值处理
-                elif value is None:
-                    value = "-"
-                values.append(str(value))
-            table.add_row(*values)
+            table.add_row(*[Formatter.format_value(row.get(field)) for field in headers.keys()])
         
         return table
+
+    @staticmethod
+    def format_value(value: Any) -> str:
+        """
+        格式化单元格的值
+
+        Args:
+            value: 单元格的值
+
+        Returns:
+            时间格式化为YYYY-MM-DD HH:MM:SS，浮点数保留两位小数，空值显示为-
+        """
+        # 格式化时间
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        # 格式化数字
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        # 空值处理
+        if value is None:
+            return "-"
+        return str(value)
+
+    @staticmethod
+    def display_width(text: str) -> int:
+        """计算文本在终端中的显示宽度，中文等全角字符占两列"""
+        return sum(2 if unicodedata.east_asian_width(char) in ("W", "F") else 1 for char in text)
+
+    @staticmethod
+    def pad(text: str, width: int) -> str:
+        """按显示宽度在右侧补齐空格"""
+        return text + " " * max(width - Formatter.display_width(text), 0)
+
+    @staticmethod
+    def stream_table(rows: Iterable[Dict[str, Any]], headers: Dict[str, str],
+                     widths: Optional[Dict[str, int]] = None, flush_every: int = 100) -> int:
+        """
+        逐行打印表格，不缓存全部数据
+
+        与print_table不同，列宽无法根据全部数据计算，按widths给定的显示宽度对齐，
+        超出宽度的内容不截断；每输出flush_every行刷新一次输出缓冲区。
+
+        Args:
+            rows: 数据行迭代器
+            headers: 表头映射
+            widths: 各字段的列宽，未指定的字段按表头宽度
+            flush_every: 刷新输出缓冲区的行数间隔
+
+        Returns:
+            打印的数据行数
+        """
+        widths = widths or {}
+        column_widths = [max(widths.get(field, 0), Formatter.display_width(name)) for field, name in headers.items()]
+
+        def render(cells: List[str]) -> str:
+            return "  ".join(Formatter.pad(cell, column_widths[i]) for i, cell in enumerate(cells)).rstrip()
+
+        sys.stdout.write(render(list(headers.values())) + "\n")
+        sys.stdout.write(render(["-" * width for width in column_widths]) + "\n")
+        count = 0
+        for row in rows:
+            sys.stdout.write(render([Formatter.format_value(row.get(field)) for field in headers.keys()]) + "\n")
+            count += 1
+            if count % flush_every == 0:
+                sys.stdout.flush()
+        sys.stdout.flush()
+        return count
     
     @staticmethod
     def print_table(data: List[Dict[str, Any]], headers: Dict[str, str]) -> None:
@@ -75,26 +131,37 @@ class Formatter:
         Returns:
             格式化后的数据列表
         """
-        formatted = []
-        for t in transactions:
-            item = {
-                "id": t.id,
-                "amount": t.amount,
-                "type": t.transaction_type,
-                "category": t.category,
-                "tags": t.tags or "-",
-                "notes": t.notes or "-",
-                "created_at": t.created_at
-            }
-            
-            if with_todos:
-                item["todo_id"] = t.todo.id if t.todo else "-"
-                if t.todo:
-                    item["todo_info"] = f"{t.todo.content} ({t.todo.status_text})"
-                else:
-                    item["todo_info"] = "-"
-            formatted.append(item)
-        return formatted
+        return [Formatter.format_transaction(t, with_todos=with_todos) for t in transactions]
+
+    @staticmethod
+    def format_transaction(t: Any, with_todos: bool = False) -> Dict[str, Any]:
+        """
+        格式化单条交易数据
+
+        Args:
+            t: 交易对象
+            with_todos: 是否显示关联的待办事项信息
+
+        Returns:
+            格式化后的数据
+        """
+        item = {
+            "id": t.id,
+            "amount": t.amount,
+            "type": t.transaction_type,
+            "category": t.category,
+            "tags": t.tags or "-",
+            "notes": t.notes or "-",
+            "created_at": t.created_at
+        }
+        
+        if with_todos:
+            item["todo_id"] = t.todo.id if t.todo else "-"
+            if t.todo:
+                item["todo_info"] = f"{t.todo.content} ({t.todo.status_text})"
+            else:
+                item["todo_info"] = "-"
+        return item
     
     @staticmethod
     def format_todos(todos: List[Any], with_transactions: bool = False) -> List[Dict[str, Any]]:
@@ -129,6 +196,30 @@ class Formatter:
             formatted.append(item)
         return formatted
     
+    @staticmethod
+    def format_search_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        格式化全文检索结果
+
+        Args:
+            results: SearchService.search 返回的检索结果列表
+
+        Returns:
+            格式化后的数据列表
+        """
+        kind_names = {"transaction": "交易", "todo": "待办"}
+        formatted = []
+        for result in results:
+            record = result["record"]
+            formatted.append({
+                "kind": kind_names.get(result["kind"], result["kind"]),
+                "id": record.id,
+                "category": record.category,
+                "snippet": result["snippet"] or "-",
+                "created_at": record.created_at
+            })
+        return formatted
+
     @staticmethod
     def print_success(message: str) -> None:
         """
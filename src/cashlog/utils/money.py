@@ -0,0 +1,94 @@
+"""金额换算工具
+
+金额在数据库中以整数最小货币单位（分）保存，SQL求和为精确整数运算；
+只在写入和展示的边界处与元（浮点数）相互换算。
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Optional
+
+# 金额保留的小数位数，1元 = 10 ** CURRENCY_DECIMALS 个最小单位
+CURRENCY_DECIMALS = 2
+MINOR_UNITS = 10 ** CURRENCY_DECIMALS
+# 最小单位金额的绝对值上限，SQLite INTEGER 为有符号64位整数
+MAX_MINOR = 2 ** 63 - 1
+
+
+def to_minor(value: Any) -> int:
+    """
+    将元转换为最小货币单位，超出精度的部分四舍五入
+
+    Args:
+        value: 金额，支持字符串、整数、浮点数和Decimal
+
+    Returns:
+        最小货币单位的整数金额
+
+    Raises:
+        ValueError: 当金额不是有效数字或超出可保存的范围时
+    """
+    if isinstance(value, bool):
+        raise ValueError("金额需为数字")
+    try:
+        # 浮点数先转为字符串，按其最短十进制表示换算，避免二进制误差
+        amount = Decimal(str(value).strip()) if not isinstance(value, Decimal) else value
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError("金额需为数字")
+    if not amount.is_finite():
+        raise ValueError("金额需为数字")
+    try:
+        minor = int((amount * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        # 位数超出 Decimal 上下文精度时 quantize 抛出 InvalidOperation
+        raise ValueError("金额超出可保存的范围")
+    if abs(minor) > MAX_MINOR:
+        raise ValueError("金额超出可保存的范围")
+    return minor
+
+
+def from_minor(value: Optional[int]) -> Optional[float]:
+    """
+    将最小货币单位转换为元
+
+    Args:
+        value: 最小货币单位的整数金额
+
+    Returns:
+        以元为单位的金额，输入为None时返回None
+    """
+    if value is None:
+        return None
+    return value / MINOR_UNITS
+
+
+def minor_to_decimal(value: Optional[int]) -> Optional[Decimal]:
+    """
+    将最小货币单位转换为精确的元金额Decimal，不经过浮点数
+
+    Args:
+        value: 最小货币单位的整数金额
+
+    Returns:
+        保留CURRENCY_DECIMALS位小数的Decimal，输入为None时返回None
+    """
+    if value is None:
+        return None
+    return Decimal(value).scaleb(-CURRENCY_DECIMALS)
+
+
+def format_minor(value: Optional[int]) -> Optional[str]:
+    """
+    将最小货币单位格式化为精确的元金额字符串，不经过浮点数
+
+    Args:
+        value: 最小货币单位的整数金额
+
+    Returns:
+        如 "-12.50" 的金额字符串，输入为None时返回None
+    """
+    if value is None:
+        return None
+    sign = "-" if value < 0 else ""
+    units, cents = divmod(abs(value), MINOR_UNITS)
+    if CURRENCY_DECIMALS == 0:
+        return f"{sign}{units}"
+    return f"{sign}{units}.{cents:0{CURRENCY_DECIMALS}d}"
@@ -0,0 +1,142 @@
+"""机器可读的记录输出
+
+将交易、待办事项转换为只含基本类型的记录，并以 json、jsonl、csv、tsv 格式逐条写出，
+不经过rich排版，供脚本和数据导出使用。
+时间统一为ISO 8601格式；金额由整数分精确换算，CSV/TSV中为定点小数字符串。
+"""
+import csv
+import json
+import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+from cashlog.utils.money import minor_to_decimal
+
+# 支持的输出格式
+OUTPUT_FORMATS = ["json", "jsonl", "csv", "tsv"]
+
+# 交易记录字段，with_todos时追加todo_id
+TRANSACTION_FIELDS = ["id", "amount", "type", "category", "tags", "notes", "created_at", "updated_at"]
+
+# 待办事项记录字段
+TODO_FIELDS = ["id", "content", "category", "status", "tags", "deadline", "transaction_id", "created_at", "updated_at"]
+
+
+def transaction_record(t: Any, with_todos: bool = False) -> Dict[str, Any]:
+    """
+    将交易对象转换为记录
+
+    Args:
+        t: 交易对象
+        with_todos: 是否包含关联的待办事项ID
+
+    Returns:
+        记录字典，金额为Decimal
+    """
+    amount_minor = t.amount_minor
+    record = {
+        "id": t.id,
+        "amount": minor_to_decimal(amount_minor),
+        "type": "income" if amount_minor > 0 else "expense",
+        "category": t.category,
+        "tags": t.tags,
+        "notes": t.notes,
+        "created_at": t.created_at,
+        "updated_at": t.updated_at,
+    }
+    if with_todos:
+        record["todo_id"] = t.todo.id if t.todo else None
+    return record
+
+
+def todo_record(t: Any) -> Dict[str, Any]:
+    """
+    将待办事项对象转换为记录
+
+    Args:
+        t: 待办事项对象
+
+    Returns:
+        记录字典
+    """
+    return {
+        "id": t.id,
+        "content": t.content,
+        "category": t.category,
+        "status": t.status.value if hasattr(t.status, "value") else t.status,
+        "tags": t.tags,
+        "deadline": t.deadline,
+        "transaction_id": t.transaction_id,
+        "created_at": t.created_at,
+        "updated_at": t.updated_at,
+    }
+
+
+def _json_default(value: Any) -> Any:
+    """JSON编码无法直接处理的值"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # 金额只有两位小数，转换为浮点数后的最短表示与原值一致
+        return float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _text_value(value: Any) -> str:
+    """CSV/TSV单元格的值，空值为空字符串"""
+    if value is None:
+        return ""
+    # 按具体类型判断，逐单元格调用时比isinstance链更快
+    value_type = type(value)
+    if value_type is str:
+        return value
+    if value_type is datetime:
+        return value.isoformat()
+    return str(value)
+
+
+def write_records(records: Iterable[Dict[str, Any]], fields: List[str], output_format: str,
+                  stream: Optional[TextIO] = None) -> int:
+    """
+    逐条写出记录
+
+    json 输出一个数组，jsonl 每行一个对象，csv/tsv 首行为字段名。
+    记录逐条编码写出，不缓存全部结果。
+
+    Args:
+        records: 记录迭代器
+        fields: 输出字段及顺序
+        output_format: 输出格式，见OUTPUT_FORMATS
+        stream: 输出流，默认为标准输出
+
+    Returns:
+        写出的记录数
+
+    Raises:
+        ValueError: 当输出格式不支持时
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {output_format}，可选值: {', '.join(OUTPUT_FORMATS)}")
+    stream = stream or sys.stdout
+    count = 0
+
+    if output_format in ("csv", "tsv"):
+        writer = csv.writer(stream, delimiter="," if output_format == "csv" else "\t", lineterminator="\n")
+        writer.writerow(fields)
+        for record in records:
+            writer.writerow([_text_value(record.get(field)) for field in fields])
+            count += 1
+        return count
+
+    if output_format == "json":
+        stream.write("[")
+    for record in records:
+        line = json.dumps({field: record.get(field) for field in fields}, ensure_ascii=False, default=_json_default)
+        if output_format == "json":
+            stream.write(("\n" if count == 0 else ",\n") + line)
+        else:
+            stream.write(line + "\n")
+        count += 1
+    if output_format == "json":
+        stream.write("\n]\n" if count else "]\n")
+    return count
@@ -2,7 +2,7 @@
 import pytest
 import os
 import tempfile
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
 from click.testing import CliRunner
 from cashlog.cli.data_cli import data
 from tests.test_cli_utilities import CLITestBase
@@ -31,7 +31,8 @@ class TestDataCLI(CLITestBase):
             assert result.exit_code == 0
             assert '数据库备份成功' in result.output
             assert '备份文件' in result.output
-            mock_backup.assert_called_once_with(output_path=None, overwrite=False)
+            mock_backup.assert_called_once_with(output_path=None, overwrite=False,
+                                                pages_per_step=None, sleep_ms=None, progress=ANY, compress=None)
     
     def test_backup_success_custom_path(self):
         """测试备份成功（自定义路径）"""
@@ -49,7 +50,8 @@ class TestDataCLI(CLITestBase):
             assert result.exit_code == 0
             assert '数据库备份成功' in result.output
             assert '备份文件' in result.output
-            mock_backup.assert_called_once_with(output_path='/custom/path/backup.db', overwrite=False)
+            mock_backup.assert_called_once_with(output_path='/custom/path/backup.db', overwrite=False,
+                                                pages_per_step=None, sleep_ms=None, progress=ANY, compress=None)
     
     def test_backup_success_force_overwrite(self):
         """测试备份成功（强制覆盖）"""
@@ -67,8 +69,105 @@ class TestDataCLI(CLITestBase):
             assert result.exit_code == 0
             assert '数据库备份成功' in result.output
             assert '备份文件' in result.output
-            mock_backup.assert_called_once_with(output_path='/custom/path/backup.db', overwrite=True)
+            mock_backup.assert_called_once_with(output_path='/custom/path/backup.db', overwrite=True,
+                                                pages_per_step=None, sleep_ms=None, progress=ANY, compress=None)
     
+    def test_backup_incremental(self):
+        """测试增量备份写入变更集"""
+        with self.mock_db_dependency() as mock_get_db, \
+             patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.incremental_service.IncrementalBackupService.backup') as mock_backup, \
+             patch('cashlog.cli.data_cli.os.path.getsize', return_value=2048):
+            mock_backup.return_value = {"kind": "changes", "path": "/chain/changes_0001.jsonl.gz",
+                                        "rows": 3, "deleted": 1, "chain_dir": "/chain"}
+
+            result = self.runner.invoke(data, ['backup', '--incremental', '-o', '/chain'])
+
+            assert result.exit_code == 0
+            assert '3 行变更，1 行删除' in result.output
+            mock_backup.assert_called_once_with(chain_dir='/chain', new_chain=False, compress=None,
+                                                pages_per_step=None, sleep_ms=None, progress=ANY)
+
+    def test_backup_incremental_no_changes(self):
+        """测试增量备份没有变更时只提示"""
+        with self.mock_db_dependency() as mock_get_db, \
+             patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.incremental_service.IncrementalBackupService.backup') as mock_backup:
+            mock_backup.return_value = {"kind": None, "path": None, "rows": 0, "deleted": 0, "chain_dir": "/chain"}
+
+            result = self.runner.invoke(data, ['backup', '--incremental'])
+
+            assert result.exit_code == 0
+            assert '没有变更' in result.output
+
+    def test_backup_new_chain_requires_incremental(self):
+        """测试 --new-chain 必须与 --incremental 一起使用"""
+        with self.mock_db_dependency() as mock_get_db, \
+             patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.data_service.DataService.create_backup') as mock_backup:
+            result = self.runner.invoke(data, ['backup', '--new-chain'])
+
+            assert result.exit_code != 0
+            mock_backup.assert_not_called()
+
+    def test_stats(self):
+        """测试查看表行数和空间占用"""
+        with patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.stats_service.StatsService.get_row_counts') as mock_counts, \
+             patch('cashlog.services.stats_service.StatsService.get_object_sizes') as mock_sizes:
+            mock_counts.return_value = {"tables": {"transactions": 1200}, "estimated": ["transactions"]}
+            mock_sizes.return_value = {"file_size": 81920, "page_size": 4096, "free_bytes": 4096, "objects": [
+                {"name": "transactions", "type": "table", "table": "transactions", "pages": 12, "bytes": 49152},
+                {"name": "ix_transactions_created_at", "type": "index", "table": "transactions", "pages": 4, "bytes": 16384},
+            ]}
+
+            result = self.runner.invoke(data, ['stats', '--exact'])
+
+            assert result.exit_code == 0
+            assert '≈1200' in result.output
+            assert 'ix_transactions_created_at' in result.output
+            assert mock_counts.call_args.args[1] is True
+
+    def test_optimize(self):
+        """测试数据库维护报告各步骤结果，完整性检查失败时返回错误"""
+        steps = [
+            {"step": "analyze", "status": "ok", "seconds": 0.01, "reclaimed": 0, "detail": "更新了 3 条统计信息"},
+            {"step": "vacuum", "status": "ok", "seconds": 0.02, "reclaimed": 409600, "detail": "回收 100 页，剩余空闲页 0"},
+            {"step": "checkpoint", "status": "busy", "seconds": 0.5, "reclaimed": 0, "detail": "有其他连接正在读写"},
+            {"step": "quick_check", "status": "ok", "seconds": 0.01, "reclaimed": 0, "detail": "ok"},
+        ]
+        with patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.maintenance_service.MaintenanceService.optimize') as mock_optimize:
+            mock_optimize.return_value = steps
+
+            result = self.runner.invoke(data, ['optimize', '--vacuum-pages', '100', '--schedule'])
+
+            assert result.exit_code == 0
+            assert '400.0 KB' in result.output
+            assert '繁忙' in result.output
+            assert mock_optimize.call_args.kwargs == {"vacuum_pages": 100, "schedule": True, "enable_incremental_vacuum": False}
+
+            mock_optimize.return_value = steps[:3] + [dict(steps[3], status="error", detail="row 5 missing from index")]
+            result = self.runner.invoke(data, ['optimize'])
+
+            assert result.exit_code != 0
+            assert 'row 5 missing from index' in result.output
+
+    def test_chain_lists_points(self):
+        """测试查看备份链恢复点"""
+        with patch('cashlog.services.incremental_service.IncrementalBackupService.describe') as mock_describe:
+            mock_describe.return_value = [
+                {"kind": "base", "created_at": "2024-01-01 02:00:00", "file": "base.db", "rows": None, "deleted": None, "size": 4096},
+                {"kind": "changes", "created_at": "2024-01-02 02:00:00", "file": "c1.jsonl.gz", "rows": 5, "deleted": 0, "size": 512},
+            ]
+
+            result = self.runner.invoke(data, ['chain', '-i', '/chain'])
+
+            assert result.exit_code == 0
+            assert '基础备份' in result.output
+            assert '2024-01-02 02:00:00' in result.output
+            mock_describe.assert_called_once_with('/chain')
+
     def test_backup_failure_invalid_path(self):
         """测试备份时路径无效"""
         with self.mock_db_dependency() as mock_get_db, \
@@ -195,4 +294,66 @@ class TestDataCLI(CLITestBase):
             
             # 验证结果
             assert result.exit_code != 0
-            assert 'Missing option' in result.output and '--input' in result.output
\ No newline at end of file
+            assert 'Missing option' in result.output and '--input' in result.output
+    
+    def test_info_shows_profile(self):
+        """测试查看数据库运行信息"""
+        with patch('cashlog.services.data_service.DataService.get_database_info') as mock_info:
+            
+            # 模拟数据库信息
+            mock_info.return_value = {
+                'db_path': '/path/to/cashlog.db',
+                'file_size': 2048,
+                'profile': 'throughput',
+                'pragmas': {'journal_mode': 'wal', 'mmap_size': 268435456}
+            }
+            
+            # 执行CLI命令
+            result = self.runner.invoke(data, ['info'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert '性能档位: throughput' in result.output
+            assert 'journal_mode: wal' in result.output
+            assert 'mmap_size: 268435456' in result.output
+
+    def test_rebuild_rollups(self):
+        """测试重建按日分类汇总"""
+        with patch('cashlog.services.data_service.DataService.rebuild_rollups') as mock_rebuild:
+            mock_rebuild.return_value = 42
+
+            result = self.runner.invoke(data, ['rebuild-rollups'])
+
+            assert result.exit_code == 0
+            assert '共 42 条按日分类汇总' in result.output
+            mock_rebuild.assert_called_once_with()
+
+    def test_export_to_file(self):
+        """测试导出数据到文件"""
+        with self.mock_db_dependency() as mock_get_db, \
+             patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.export_service.ExportService.export') as mock_export:
+
+            mock_export.return_value = {"rows": 42, "path": "/path/to/ledger.parquet", "elapsed": 0.5}
+
+            result = self.runner.invoke(data, [
+                'export', '--format', 'parquet', '-o', 'ledger.parquet', '--start', '2023-01-01', '-c', '餐饮', '--type', 'expense'
+            ])
+
+            assert result.exit_code == 0
+            assert '导出完成，共 42 行' in result.output
+            args, kwargs = mock_export.call_args
+            assert args[1:6] == ('transactions', 'parquet', 'ledger.parquet', '2023-01-01', None)
+            assert kwargs == {"category": "餐饮", "transaction_type": "expense"}
+
+    def test_export_invalid_filter_for_table(self):
+        """测试导出待办事项时使用交易专属筛选条件"""
+        with self.mock_db_dependency() as mock_get_db, \
+             patch('cashlog.models.db.init_db') as mock_init_db, \
+             patch('cashlog.services.export_service.ExportService.export') as mock_export:
+
+            result = self.runner.invoke(data, ['export', '--table', 'todos', '--type', 'income'])
+
+            assert result.exit_code != 0
+            assert '仅适用于交易表' in result.output
+            mock_export.assert_not_called()
@@ -133,6 +133,152 @@ def test_create_backup_invalid_extension(db_session, test_db_dir):
         DataService.create_backup(output_path=invalid_path)
 
 
+def test_create_backup_online_in_steps(db_session, test_db_dir):
+    """测试在线备份按页分批复制并报告进度"""
+    import sqlite3
+    test_db_path, test_data_dir = test_db_dir
+    conn = sqlite3.connect(test_db_path)
+    conn.executemany("INSERT INTO test (name) VALUES (?)", [("x" * 200,) for _ in range(200)])
+    conn.commit()
+    conn.close()
+    backup_path = os.path.join(test_data_dir, "online_backup.db")
+
+    steps = []
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.time.sleep') as mock_sleep:
+        DataService.create_backup(output_path=backup_path, pages_per_step=2, sleep_ms=5,
+                                  progress=lambda copied, total: steps.append((copied, total)))
+
+    # 多步完成，最后一步复制全部页面，除最后一步外每步之间都休眠
+    assert len(steps) > 2
+    assert steps[-1][0] == steps[-1][1]
+    assert mock_sleep.call_count == len(steps) - 1
+    mock_sleep.assert_called_with(0.005)
+
+    conn = sqlite3.connect(backup_path)
+    assert conn.execute("SELECT COUNT(*) FROM test").fetchone()[0] == 201
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    conn.close()
+    # 临时文件已清理
+    assert not [name for name in os.listdir(test_data_dir) if name.endswith(".tmp")]
+
+
+def test_create_backup_while_writing_wal(db_session, test_db_dir):
+    """测试WAL模式下备份期间的写入既不被阻塞，也不进入备份快照"""
+    import sqlite3
+    test_db_path, test_data_dir = test_db_dir
+    writer = sqlite3.connect(test_db_path)
+    writer.execute("PRAGMA journal_mode=WAL")
+    writer.executemany("INSERT INTO test (name) VALUES (?)", [("x" * 200,) for _ in range(200)])
+    writer.commit()
+    backup_path = os.path.join(test_data_dir, "wal_backup.db")
+
+    def write_during_backup(copied, total):
+        writer.execute("INSERT INTO test (name) VALUES ('during')")
+        writer.commit()
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path):
+        DataService.create_backup(output_path=backup_path, pages_per_step=2, sleep_ms=0,
+                                  progress=write_during_backup)
+
+    assert writer.execute("SELECT COUNT(*) FROM test WHERE name = 'during'").fetchone()[0] > 0
+    writer.close()
+    conn = sqlite3.connect(backup_path)
+    assert conn.execute("SELECT COUNT(*) FROM test").fetchone()[0] == 201
+    conn.close()
+
+
+def test_create_backup_invalid_throttle_setting(db_session, test_db_dir, monkeypatch):
+    """测试限速配置无效时报错"""
+    test_db_path, test_data_dir = test_db_dir
+    monkeypatch.setenv("CASHLOG_BACKUP_PAGES_PER_STEP", "abc")
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path):
+        with pytest.raises(ValueError, match="备份限速配置无效"):
+            DataService.create_backup(output_path=os.path.join(test_data_dir, "b.db"))
+        with pytest.raises(ValueError):
+            DataService.create_backup(output_path=os.path.join(test_data_dir, "b.db"), pages_per_step=1, sleep_ms=-1)
+
+
+@pytest.mark.parametrize("compress, suffix", [("gzip", ".db.gz"), ("xz", ".db.xz")])
+def test_create_and_restore_compressed_backup(db_session, test_db_dir, compress, suffix):
+    """测试压缩备份及其恢复"""
+    import sqlite3
+    test_db_path, test_data_dir = test_db_dir
+    backup_path = os.path.join(test_data_dir, f"compressed{suffix}")
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path):
+        DataService.create_backup(output_path=backup_path, compress=compress)
+    assert DataService._detect_compression(backup_path) == compress
+    assert os.path.getsize(backup_path) < os.path.getsize(test_db_path)
+
+    # 恢复到另一个数据库文件
+    target_db = os.path.join(test_data_dir, "target.db")
+    conn = sqlite3.connect(target_db)
+    conn.execute("CREATE TABLE other (id INTEGER PRIMARY KEY)")
+    conn.close()
+    with patch('cashlog.services.data_service.DB_PATH', target_db), \
+         patch('cashlog.services.data_service.DataService._rotate_data_token'), \
+         patch('cashlog.services.data_service.DataService._get_database_stats', return_value={}):
+        result = DataService.restore_backup(input_path=backup_path, backup_current=False)
+
+    assert result["restored_from"] == os.path.abspath(backup_path)
+    conn = sqlite3.connect(target_db)
+    assert conn.execute("SELECT name FROM test").fetchall() == [("test",)]
+    conn.close()
+    # 解压用的临时文件已清理
+    assert not [name for name in os.listdir(test_data_dir) if name.endswith(".tmp")]
+
+
+def test_create_compressed_backup_suffix(db_session, test_db_dir):
+    """测试压缩备份的后缀校验和默认文件名"""
+    test_db_path, test_data_dir = test_db_dir
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path):
+        with pytest.raises(ValueError, match=r"\.db\.gz"):
+            DataService.create_backup(output_path=os.path.join(test_data_dir, "b.db"), compress="gzip")
+        with pytest.raises(ValueError, match="不支持的压缩格式"):
+            DataService.create_backup(output_path=os.path.join(test_data_dir, "b.db.bz2"), compress="bzip2")
+        backup_path = DataService.create_backup(compress="gzip")
+    assert backup_path.endswith(".db.gz")
+
+
+def test_compressed_backup_releases_temporary_copy(db_session, test_db_dir):
+    """测试未压缩的临时副本位于目标目录，并在压缩完成、替换目标文件之前删除；空间不足时不开始备份"""
+    test_db_path, test_data_dir = test_db_dir
+    backup_path = os.path.join(test_data_dir, "compressed.db.gz")
+    leftovers = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        leftovers.extend(name for name in os.listdir(test_data_dir) if name.endswith(".tmp"))
+        real_replace(src, dst)
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.os.replace', side_effect=replace):
+        DataService.create_backup(output_path=backup_path, compress="gzip")
+    assert leftovers == []
+    assert os.path.exists(backup_path)
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.shutil.disk_usage') as mock_usage, \
+         patch('cashlog.services.data_service.DataService._online_backup') as mock_backup:
+        mock_usage.return_value.free = 0
+        with pytest.raises(IOError, match="可用空间不足"):
+            DataService.create_backup(output_path=backup_path, overwrite=True, compress="gzip")
+    mock_backup.assert_not_called()
+
+
+def test_restore_corrupt_compressed_backup(db_session, test_db_dir):
+    """测试损坏的压缩备份无法恢复"""
+    test_db_path, test_data_dir = test_db_dir
+    broken = os.path.join(test_data_dir, "broken.db.gz")
+    with open(broken, "wb") as f:
+        f.write(b"\x1f\x8b" + b"garbage" * 10)
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path):
+        with pytest.raises(ValueError, match="无法解压gzip备份文件"):
+            DataService.restore_backup(input_path=broken, backup_current=False)
+
+
 @patch('cashlog.services.data_service.sqlite3.connect')
 def test_is_valid_sqlite_db(mock_connect, test_db_dir):
     """测试SQLite数据库文件验证"""
@@ -181,48 +327,107 @@ def test_restore_backup_invalid_db(db_session, test_db_dir):
         DataService.restore_backup(input_path=invalid_db_path)
 
 
-@patch('cashlog.services.data_service.shutil.copy2')
+@patch('cashlog.services.data_service.DataService._rotate_data_token')
+@patch('cashlog.services.data_service.DataService._online_backup')
+@patch('cashlog.services.data_service.DataService.create_backup', return_value="/backups/pre_restore.db")
 @patch('cashlog.services.data_service.DataService._is_valid_sqlite_db', return_value=True)
-def test_restore_backup_with_current_backup(mock_is_valid, mock_copy2, db_session, test_db_dir):
+def test_restore_backup_with_current_backup(mock_is_valid, mock_backup, mock_online_backup, mock_rotate, db_session, test_db_dir):
     """测试恢复时备份当前数据库"""
-    _, test_data_dir = test_db_dir
+    test_db_path, test_data_dir = test_db_dir
     
     # 创建另一个测试数据库作为备份源
     backup_source = os.path.join(test_data_dir, "backup_source.db")
     open(backup_source, 'w').close()
     
     # 模拟_get_database_stats返回
-    with patch('cashlog.services.data_service.DataService._get_database_stats', return_value={"tables": {"test_table": 10}}):
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.DataService._get_database_stats', return_value={"tables": {"test_table": 10}}):
         result = DataService.restore_backup(input_path=backup_source, backup_current=True)
     
-    # 验证copy2被调用了两次：一次备份当前数据，一次恢复
-    assert mock_copy2.call_count == 2
+    # 验证先备份当前数据，再通过在线备份接口写入当前数据库
+    assert mock_backup.call_count == 1
+    assert os.path.basename(mock_backup.call_args.kwargs["output_path"]).startswith("pre_restore_")
+    mock_online_backup.assert_called_once()
+    assert mock_online_backup.call_args.args[:2] == (backup_source, test_db_path)
     # 验证结果包含当前备份路径
     assert 'current_backup_path' in result
-    assert result['current_backup_path'] is not None
+    assert result['current_backup_path'] == "/backups/pre_restore.db"
 
 
-@patch('cashlog.services.data_service.shutil.copy2')
+@patch('cashlog.services.data_service.DataService._rotate_data_token')
+@patch('cashlog.services.data_service.DataService._online_backup')
+@patch('cashlog.services.data_service.DataService.create_backup')
 @patch('cashlog.services.data_service.DataService._is_valid_sqlite_db', return_value=True)
-def test_restore_backup_without_current_backup(mock_is_valid, mock_copy2, db_session, test_db_dir):
+def test_restore_backup_without_current_backup(mock_is_valid, mock_backup, mock_online_backup, mock_rotate, db_session, test_db_dir):
     """测试恢复时不备份当前数据库"""
-    _, test_data_dir = test_db_dir
+    test_db_path, test_data_dir = test_db_dir
     
     # 创建另一个测试数据库作为备份源
     backup_source = os.path.join(test_data_dir, "backup_source.db")
     open(backup_source, 'w').close()
     
     # 模拟_get_database_stats返回
-    with patch('cashlog.services.data_service.DataService._get_database_stats', return_value={"tables": {"test_table": 10}}):
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.DataService._get_database_stats', return_value={"tables": {"test_table": 10}}):
         result = DataService.restore_backup(input_path=backup_source, backup_current=False)
     
-    # 验证copy2只被调用了一次：只恢复数据
-    assert mock_copy2.call_count == 1
+    # 验证只恢复数据
+    mock_backup.assert_not_called()
+    assert mock_online_backup.call_count == 1
     # 验证结果包含current_backup_path，但值为None
     assert 'current_backup_path' in result
     assert result['current_backup_path'] is None
 
 
+def test_restore_backup_visible_to_open_connection(db_session, test_db_dir):
+    """测试恢复在原文件上完成，已打开的连接无需重连即可读到恢复后的数据"""
+    import sqlite3
+    test_db_path, test_data_dir = test_db_dir
+    backup_source = os.path.join(test_data_dir, "backup_source.db")
+    conn = sqlite3.connect(backup_source)
+    conn.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO test (name) VALUES (?)", [("restored",), ("restored",)])
+    conn.commit()
+    conn.close()
+
+    reader = sqlite3.connect(test_db_path)
+    reader.execute("PRAGMA journal_mode=WAL")
+    assert reader.execute("SELECT COUNT(*) FROM test").fetchone()[0] == 1
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.models.db.dispose_engine') as mock_dispose:
+        DataService.restore_backup(input_path=backup_source, backup_current=False)
+
+    assert reader.execute("SELECT name FROM test").fetchall() == [("restored",), ("restored",)]
+    reader.close()
+    # 本进程的连接池被丢弃，之后的查询重新连接
+    mock_dispose.assert_called_once()
+
+
+def test_restore_backup_failure_keeps_database(db_session, test_db_dir):
+    """测试恢复中途失败时当前数据库保持原样"""
+    import sqlite3
+    test_db_path, test_data_dir = test_db_dir
+    backup_source = os.path.join(test_data_dir, "backup_source.db")
+    conn = sqlite3.connect(backup_source)
+    conn.execute("CREATE TABLE other (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO other (payload) VALUES (?)", [("x" * 500,) for _ in range(100)])
+    conn.commit()
+    conn.close()
+
+    def fail_midway(copied, total):
+        raise RuntimeError("模拟中断")
+
+    with patch('cashlog.services.data_service.DB_PATH', test_db_path), \
+         patch('cashlog.services.data_service.DataService._get_backup_throttle', return_value=(1, 0)):
+        with pytest.raises(IOError, match="恢复失败"):
+            DataService.restore_backup(input_path=backup_source, backup_current=False, progress=fail_midway)
+
+    conn = sqlite3.connect(test_db_path)
+    assert conn.execute("SELECT name FROM test").fetchall() == [("test",)]
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+
+
 def test_get_database_stats(db_session, test_db_dir):
     """测试获取数据库统计信息"""
     test_db_path, _ = test_db_dir
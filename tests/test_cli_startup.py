@@ -0,0 +1,71 @@
+"""CLI启动开销测试
+
+在独立进程中导入，避免受测试进程中已导入模块的影响。
+"""
+import os
+import subprocess
+import sys
+from click.testing import CliRunner
+from cashlog.cli.main_cli import SUBCOMMANDS, cli
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# 导入主命令行接口的耗时上限（微秒），按需导入前约为450ms
+IMPORT_BUDGET_US = 150_000
+
+# 入口模块不应加载的重型依赖
+HEAVY_MODULES = ("sqlalchemy", "rich", "cashlog.models", "cashlog.services")
+
+
+def run_python(*args):
+    """以 src 为模块路径运行Python子进程"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 {模块名: 累计耗时（微秒）}"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_main_cli_import_budget():
+    """测试导入入口模块不加载数据库和rich，且耗时在预算内"""
+    result = run_python("-X", "importtime", "-c", "import cashlog.cli.main_cli")
+    timings = parse_importtime(result.stderr)
+
+    heavy = [name for name in timings if name.startswith(HEAVY_MODULES)]
+    assert heavy == []
+    assert timings["cashlog.cli.main_cli"] < IMPORT_BUDGET_US
+
+
+def test_only_invoked_group_is_imported():
+    """测试执行子命令时只导入该命令组，导入数据库模块不创建引擎"""
+    result = run_python("-c", (
+        "import sys, click\n"
+        "from cashlog.cli.main_cli import cli\n"
+        "cli.get_command(click.Context(cli), 'todo')\n"
+        "import cashlog.models.db as db\n"
+        "print(sorted(m for m in sys.modules if m.startswith('cashlog.cli.')))\n"
+        "print(db._engine is None)\n"
+    ))
+    loaded, engine_missing = result.stdout.splitlines()
+
+    assert loaded == "['cashlog.cli.main_cli', 'cashlog.cli.todo_cli']"
+    assert engine_missing == "True"
+
+
+def test_help_lists_all_groups():
+    """测试帮助信息列出全部命令组"""
+    result = CliRunner().invoke(cli, ["--help"])
+
+    assert result.exit_code == 0
+    for name in SUBCOMMANDS:
+        assert name in result.output
+    assert CliRunner().invoke(cli, ["--version"]).output.strip().endswith("0.1.0")
@@ -0,0 +1,217 @@
+"""索引与查询计划单元测试"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, init_db
+from cashlog.models.migrations import SCHEMA_VERSION
+from cashlog.models.todo import Todo
+from cashlog.services.report_service import ReportService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def explain(db_session, func):
+    """执行func并返回其中每条SELECT语句的查询计划"""
+    captured = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    connection = db_session.connection().connection
+    plans = []
+    for statement, parameters in captured:
+        rows = connection.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        plans.append(" | ".join(row[-1] for row in rows))
+    return plans
+
+
+def test_report_uses_rollup_primary_key(db_session):
+    """测试生成报表时按日期范围读取汇总表主键，不扫描交易表"""
+    plans = explain(db_session, lambda: ReportService.generate_report(db_session, "monthly", use_cache=False))
+    assert plans
+    for plan in plans:
+        assert "SEARCH daily_category_rollup USING INDEX sqlite_autoindex_daily_category_rollup_1 (day>? AND day<?)" in plan
+        assert "transactions" not in plan
+
+
+def test_report_category_filter_uses_rollup_primary_key(db_session):
+    """测试带分类筛选生成报表时仍按日期范围读取汇总表主键"""
+    plans = explain(db_session, lambda: ReportService.generate_report(
+        db_session, "custom", start="2023-12-01", end="2023-12-31", categories=["餐饮", "交通"], use_cache=False
+    ))
+    assert plans
+    for plan in plans:
+        assert "SEARCH daily_category_rollup USING INDEX sqlite_autoindex_daily_category_rollup_1" in plan
+        assert "SCAN daily_category_rollup" not in plan
+
+
+def test_partial_day_aggregate_uses_created_at_index(db_session):
+    """测试非整天区间回退到交易表聚合时使用时间索引"""
+    plans = explain(db_session, lambda: ReportService._aggregate_by_category(
+        db_session, datetime(2023, 12, 1, 8), datetime(2023, 12, 31, 18)
+    ))
+    assert "ix_transactions_created_at" in plans[0]
+
+
+def test_partial_day_aggregate_category_filter_uses_composite_index(db_session):
+    """测试非整天区间带分类筛选回退到交易表聚合时使用分类+时间复合索引"""
+    plans = explain(db_session, lambda: ReportService._aggregate_by_category(
+        db_session, datetime(2023, 12, 1, 8), datetime(2023, 12, 31, 18), ["餐饮", "交通"]
+    ))
+    assert "ix_transactions_category_created_at" in plans[0]
+
+
+def test_transaction_list_by_month_uses_index(db_session):
+    """测试按月份查询交易使用时间索引且无需额外排序"""
+    plans = explain(db_session, lambda: TransactionService.get_transactions(db_session, month="2023-12"))
+    assert "ix_transactions_created_at" in plans[0]
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plans[0]
+
+
+def test_todo_list_by_status_uses_index(db_session):
+    """测试按状态和截止时间查询待办使用复合索引"""
+    plans = explain(db_session, lambda: TodoService.get_todos(db_session, status="todo", deadline_before="2023-12-31"))
+    assert "ix_todos_status_deadline" in plans[0]
+
+
+def test_todo_lookup_by_transaction_uses_unique_index(db_session):
+    """测试按交易ID反查待办使用唯一索引"""
+    plans = explain(db_session, lambda: db_session.query(Todo).filter(Todo.transaction_id == 1).first())
+    assert "ux_todos_transaction_id" in plans[0]
+
+
+def test_init_db_upgrades_existing_database(tmp_path):
+    """测试为没有索引的旧数据库补建索引，且可重复执行"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER NOT NULL PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, tags VARCHAR(200), notes TEXT, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE todos (id INTEGER NOT NULL PRIMARY KEY, content TEXT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, tags VARCHAR(200), deadline DATETIME, "
+            "transaction_id INTEGER REFERENCES transactions (id), status VARCHAR(5) NOT NULL, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME)"
+        ))
+
+    init_db(engine)
+    init_db(engine)
+
+    inspector = inspect(engine)
+    transaction_indexes = {index["name"] for index in inspector.get_indexes("transactions")}
+    todo_indexes = {index["name"]: index for index in inspector.get_indexes("todos")}
+    assert {"ix_transactions_created_at", "ix_transactions_category_created_at"} <= transaction_indexes
+    assert {"ix_todos_status_deadline", "ix_todos_created_at", "ux_todos_transaction_id"} <= set(todo_indexes)
+    assert todo_indexes["ux_todos_transaction_id"]["unique"]
+    engine.dispose()
+
+
+def test_init_db_skips_current_schema(tmp_path, monkeypatch):
+    """测试结构版本为最新时不再执行建表和升级，版本落后时重新升级"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'cashlog.db'}")
+    init_db(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == SCHEMA_VERSION
+
+    with patch('cashlog.models.migrations.upgrade_schema') as mock_upgrade, \
+         patch.object(Base.metadata, 'create_all') as mock_create_all:
+        init_db(engine)
+    mock_upgrade.assert_not_called()
+    mock_create_all.assert_not_called()
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_transactions_created_at"))
+        conn.execute(text("PRAGMA user_version = 0"))
+    init_db(engine)
+
+    assert "ix_transactions_created_at" in {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == SCHEMA_VERSION
+    engine.dispose()
+
+
+def test_init_db_retries_unique_index_after_duplicates_removed(tmp_path, monkeypatch):
+    """测试重复数据导致唯一索引无法建立时给出警告并改建非唯一索引，清理重复后下次初始化建立唯一索引"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'cashlog.db'}")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_todos_transaction_id"))
+        conn.execute(text(
+            "INSERT INTO todos (content, category, transaction_id, status, created_at) "
+            "VALUES ('报销', '工作', 1, 'todo', '2023-10-01'), ('报销', '工作', 1, 'done', '2023-10-02')"
+        ))
+
+    with pytest.warns(RuntimeWarning, match="无法建立唯一索引 ux_todos_transaction_id"):
+        init_db(engine)
+    todo_indexes = {index["name"]: index for index in inspect(engine).get_indexes("todos")}
+    assert "ux_todos_transaction_id" not in todo_indexes
+    assert not todo_indexes["ux_todos_transaction_id_nonunique"]["unique"]
+    with engine.connect() as conn:
+        plan = conn.execute(text("EXPLAIN QUERY PLAN SELECT id FROM todos WHERE transaction_id = 1")).all()
+        assert "ux_todos_transaction_id_nonunique" in plan[0][-1]
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE todos SET transaction_id = NULL WHERE status = 'done'"))
+    init_db(engine)
+
+    todo_indexes = {index["name"]: index for index in inspect(engine).get_indexes("todos")}
+    assert todo_indexes["ux_todos_transaction_id"]["unique"]
+    assert "ux_todos_transaction_id_nonunique" not in todo_indexes
+    engine.dispose()
+
+
+def test_init_db_recreates_missing_triggers(tmp_path, monkeypatch):
+    """测试结构版本为最新但触发器被删除时，init_db 补建触发器并重建缺失期间的派生数据"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'cashlog.db'}")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER transactions_rollup_ai"))
+        conn.execute(text("DROP TRIGGER transactions_fts_ai"))
+        conn.execute(text(
+            "INSERT INTO transactions (amount_minor, category, notes, created_at) "
+            "VALUES (-1500, '餐饮', '公司午餐便当', '2023-10-01 12:00:00')"
+        ))
+
+    init_db(engine)
+
+    with engine.connect() as conn:
+        triggers = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        assert {"transactions_rollup_ai", "transactions_fts_ai"} <= triggers
+        assert conn.execute(text("SELECT expense, count FROM daily_category_rollup")).all() == [(1500, 1)]
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH '午餐便当'"
+        )).scalar() == 1
+    engine.dispose()
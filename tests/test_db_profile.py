@@ -0,0 +1,146 @@
+"""数据库性能档位单元测试"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import create_engine
+from cashlog.models import db
+from cashlog.models.db import PRAGMA_PROFILES, get_profile_name, register_pragma_profile, resolve_profile_name
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+@pytest.fixture
+def test_db_file(tmp_path):
+    """创建临时测试数据库文件路径"""
+    return tmp_path / "profile.db"
+
+
+def read_pragmas(engine):
+    """读取连接上实际生效的PRAGMA"""
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout")
+        }
+
+
+def test_register_throughput_profile(test_db_file):
+    """测试throughput档位启用WAL和内存映射"""
+    engine = create_engine(f"sqlite:///{test_db_file}")
+    register_pragma_profile(engine, "throughput")
+
+    pragmas = read_pragmas(engine)
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1  # NORMAL
+    assert pragmas["mmap_size"] == PRAGMA_PROFILES["throughput"]["mmap_size"]
+    assert pragmas["cache_size"] == PRAGMA_PROFILES["throughput"]["cache_size"]
+    assert pragmas["busy_timeout"] == PRAGMA_PROFILES["throughput"]["busy_timeout"]
+    engine.dispose()
+
+
+def test_register_safe_profile(test_db_file):
+    """测试safe档位使用回滚日志和完全同步"""
+    engine = create_engine(f"sqlite:///{test_db_file}")
+    register_pragma_profile(engine, "safe")
+
+    pragmas = read_pragmas(engine)
+    assert pragmas["journal_mode"] == "delete"
+    assert pragmas["synchronous"] == 2  # FULL
+    engine.dispose()
+
+
+def test_safe_profile_keeps_wal_database(test_db_file):
+    """测试safe档位打开WAL数据库时不切换回回滚日志"""
+    wal_engine = create_engine(f"sqlite:///{test_db_file}")
+    register_pragma_profile(wal_engine, "throughput")
+    with wal_engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+    engine = create_engine(f"sqlite:///{test_db_file}")
+    register_pragma_profile(engine, "safe")
+    pragmas = read_pragmas(engine)
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 2  # FULL
+    assert read_pragmas(wal_engine)["journal_mode"] == "wal"
+    engine.dispose()
+    wal_engine.dispose()
+
+
+def test_register_invalid_profile(test_db_file):
+    """测试无效档位"""
+    engine = create_engine(f"sqlite:///{test_db_file}")
+    with pytest.raises(ValueError, match="未知的数据库性能档位"):
+        register_pragma_profile(engine, "turbo")
+
+
+def test_get_profile_name_from_env(monkeypatch):
+    """测试通过环境变量选择档位"""
+    monkeypatch.setenv("CASHLOG_DB_PROFILE", "Balanced")
+    assert get_profile_name() == "balanced"
+
+    monkeypatch.setenv("CASHLOG_DB_PROFILE", "turbo")
+    with pytest.raises(ValueError, match="未知的数据库性能档位"):
+        get_profile_name()
+
+
+def test_get_profile_name_from_config_file(monkeypatch, tmp_path):
+    """测试通过配置文件选择档位，环境变量优先"""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"db_profile": "throughput"}), encoding="utf-8")
+    monkeypatch.setenv("CASHLOG_CONFIG", str(config_path))
+    monkeypatch.delenv("CASHLOG_DB_PROFILE", raising=False)
+    assert get_profile_name() == "throughput"
+
+    monkeypatch.setenv("CASHLOG_DB_PROFILE", "safe")
+    assert get_profile_name() == "safe"
+
+
+def test_get_profile_name_default(monkeypatch, tmp_path):
+    """测试未配置时使用默认档位"""
+    monkeypatch.setenv("CASHLOG_CONFIG", str(tmp_path / "missing.json"))
+    monkeypatch.delenv("CASHLOG_DB_PROFILE", raising=False)
+    assert get_profile_name() == "safe"
+
+
+def test_resolve_invalid_profile_falls_back(monkeypatch):
+    """测试创建引擎时遇到无效档位改用balanced并给出警告"""
+    monkeypatch.setenv("CASHLOG_DB_PROFILE", "turbo")
+    with pytest.warns(RuntimeWarning, match="未知的数据库性能档位"):
+        assert resolve_profile_name() == db.FALLBACK_PROFILE == "balanced"
+
+
+def test_invalid_profile_does_not_break_import(tmp_path):
+    """测试无效档位不影响导入数据库模块和查看帮助"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, CASHLOG_DB_PROFILE="turbo",
+               CASHLOG_CONFIG=str(tmp_path / "missing.json"))
+    result = subprocess.run(
+        [sys.executable, "-c", (
+            "import cashlog.models.db as db\n"
+            "from cashlog.cli.data_cli import data\n"
+            "print(db.get_active_profile())\n"
+        )],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "balanced"
+    assert "未知的数据库性能档位" in result.stderr
+
+
+def test_engine_reads_profile_when_created(monkeypatch, tmp_path):
+    """测试引擎创建时才读取档位，导入后修改的配置同样生效"""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "lazy.db"))
+    monkeypatch.setattr(db, "_engine", None)
+    monkeypatch.setattr(db, "_engine_profile", None)
+    monkeypatch.setenv("CASHLOG_DB_PROFILE", "throughput")
+
+    engine = db.get_engine()
+    try:
+        assert db.get_active_profile() == "throughput"
+        assert read_pragmas(engine)["journal_mode"] == "wal"
+
+        # 引擎创建后不再重新读取配置
+        monkeypatch.setenv("CASHLOG_DB_PROFILE", "safe")
+        assert db.get_active_profile() == "throughput"
+    finally:
+        engine.dispose()
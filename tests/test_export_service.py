@@ -0,0 +1,140 @@
+"""数据导出服务单元测试"""
+import csv
+import json
+import sys
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.todo import Todo, TodoStatus
+from cashlog.services.export_service import ExportService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def sample_data(db_session):
+    """创建测试数据"""
+    for amount, category, tags, created_at in [
+        ("-0.10", "餐饮", "日常", "2023-10-01 08:00:00"),
+        ("-35.5", "餐饮", "日常,午餐", "2023-10-31 23:59:59"),
+        ("5000", "工资", None, "2023-11-01 00:00:00"),
+        ("-8", "交通", "日常", "2023-09-30 18:00:00"),
+    ]:
+        TransactionService.create_transaction(db_session, {
+            "amount": amount, "category": category, "tags": tags, "created_at": created_at
+        })
+    db_session.add(Todo(content="报销", category="工作", status=TodoStatus.DONE))
+    db_session.add(Todo(content="买菜", category="生活"))
+    db_session.commit()
+
+
+def test_export_csv_with_date_range(sample_data, db_session, tmp_path):
+    """测试按日期范围导出CSV，结束日期包含当天"""
+    path = tmp_path / "october.csv"
+    stats = ExportService.export(db_session, "transactions", "csv", str(path), start="2023-10-01", end="2023-10-31")
+
+    assert stats["rows"] == 2
+    assert stats["path"] == str(path)
+    rows = list(csv.DictReader(path.open(encoding="utf-8")))
+    assert [(r["amount"], r["created_at"]) for r in rows] == [
+        ("-35.50", "2023-10-31T23:59:59"),
+        ("-0.10", "2023-10-01T08:00:00"),
+    ]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_export_with_transaction_filters(sample_data, db_session, tmp_path):
+    """测试导出支持与get_transactions相同的筛选条件"""
+    path = tmp_path / "filtered.jsonl"
+    ExportService.export(db_session, "transactions", "jsonl", str(path), tags="日常", category="餐饮")
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["amount"] for r in records] == [-35.5, -0.1]
+
+    path = tmp_path / "income.jsonl"
+    ExportService.export(db_session, "transactions", "jsonl", str(path), transaction_type="income")
+    assert [json.loads(line)["category"] for line in path.read_text(encoding="utf-8").splitlines()] == ["工资"]
+
+
+def test_export_todos_to_stdout(sample_data, db_session, capsys):
+    """测试未指定输出文件时导出到标准输出"""
+    stats = ExportService.export(db_session, "todos", "json", status="done")
+
+    assert stats == {"rows": 1, "path": None, "elapsed": stats["elapsed"]}
+    records = json.loads(capsys.readouterr().out)
+    assert [(r["content"], r["status"]) for r in records] == [("报销", "done")]
+
+
+def test_export_streams_in_batches(sample_data, db_session):
+    """测试导出按批次从游标读取，不一次性载入全部结果"""
+    from sqlalchemy import event
+
+    fetches = []
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        fetches.append(context.execution_options.get("yield_per"))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "after_cursor_execute", after_execute)
+    try:
+        records = list(ExportService.iter_records(db_session, "transactions", batch_size=2))
+    finally:
+        event.remove(engine, "after_cursor_execute", after_execute)
+
+    assert len(records) == 4
+    assert fetches[-1] == 2
+
+
+def test_export_invalid_arguments(db_session, tmp_path):
+    """测试导出参数校验"""
+    with pytest.raises(ValueError, match="不支持导出的表"):
+        list(ExportService.iter_records(db_session, "tags"))
+    with pytest.raises(ValueError, match="不支持的导出格式"):
+        ExportService.export(db_session, "transactions", "xlsx")
+    with pytest.raises(ValueError, match="开始日期格式"):
+        ExportService.export(db_session, "transactions", "csv", str(tmp_path / "a.csv"), start="2023/10/01")
+    with pytest.raises(ValueError, match="开始日期不能晚于结束日期"):
+        ExportService.export(db_session, "transactions", "csv", str(tmp_path / "a.csv"), start="2023-11-01", end="2023-10-01")
+    with pytest.raises(ValueError, match="输出目录不存在"):
+        ExportService.export(db_session, "transactions", "csv", str(tmp_path / "missing" / "a.csv"))
+    with pytest.raises(ValueError, match="Parquet格式需要指定输出文件"):
+        ExportService.export(db_session, "transactions", "parquet")
+
+
+def test_export_parquet_requires_pyarrow(db_session, tmp_path, monkeypatch):
+    """测试未安装pyarrow时导出Parquet给出提示"""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ValueError, match="需要安装pyarrow"):
+        ExportService.export(db_session, "transactions", "parquet", str(tmp_path / "ledger.parquet"))
+
+
+def test_export_parquet_row_groups(sample_data, db_session, tmp_path):
+    """测试Parquet按行组写出，金额为定点小数"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    from decimal import Decimal
+
+    path = tmp_path / "ledger.parquet"
+    stats = ExportService.export(db_session, "transactions", "parquet", str(path), row_group_size=3)
+
+    assert stats["rows"] == 4
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.metadata.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.column("amount").to_pylist()[-1] == Decimal("-8.00")
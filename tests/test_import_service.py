@@ -0,0 +1,185 @@
+"""批量导入服务单元测试"""
+import json
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.bulk import SUSPENDED_TRIGGERS
+from cashlog.models.db import Base
+from cashlog.models.rollup import DailyCategoryRollup, rebuild_rollups
+from cashlog.models.version import get_data_version
+from cashlog.services.import_service import ImportService
+from cashlog.services.search_service import SearchService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """创建包含有效行和无效行的CSV文件"""
+    path = tmp_path / "transactions.csv"
+    path.write_text(
+        "金额,分类,标签,备注,日期\n"
+        "-12.50,餐饮,\"日常,午餐\",公司楼下的面馆,2023-10-01 12:00:00\n"
+        "5000,工资,,,2023-10-05\n"
+        "abc,餐饮,,,2023-10-02\n"
+        "-30,,,,2023-10-02\n"
+        "-8,交通,日常,地铁,2023/10/02\n"
+        "-20.005,餐饮,,晚餐,2023-10-01T19:30:00\n",
+        encoding="utf-8"
+    )
+    return str(path)
+
+
+MAPPING = "amount=金额,category=分类,tags=标签,notes=备注,created_at=日期"
+
+
+def test_import_csv_with_mapping(csv_file, db_session):
+    """测试按列映射导入CSV，无效行按create_transaction的规则跳过"""
+    stats = ImportService.import_transactions(db_session, csv_file, "csv", ImportService.parse_mapping(MAPPING), batch_size=2)
+
+    assert stats["total"] == 6
+    assert stats["imported"] == 3
+    assert stats["failed"] == 3
+    assert stats["errors"] == [
+        (4, "金额需为数字"),
+        (5, "分类为必填项"),
+        (6, "时间格式不正确，请使用YYYY-MM-DD HH:MM:SS格式"),
+    ]
+    assert stats["rate"] > 0
+
+    transactions = TransactionService.get_transactions(db_session)
+    assert [(t.amount_minor, t.category) for t in transactions] == [(500000, "工资"), (-2001, "餐饮"), (-1250, "餐饮")]
+    assert transactions[2].tags == "日常,午餐"
+
+
+def test_import_maintains_derived_data(csv_file, db_session):
+    """测试批量导入后全文索引、按日汇总、标签关联和数据版本与逐条写入一致"""
+    TransactionService.create_transaction(db_session, {"amount": "-5", "category": "餐饮", "created_at": "2023-10-01 08:00:00"})
+    _, version = get_data_version(db_session)
+
+    ImportService.import_transactions(db_session, csv_file, "csv", ImportService.parse_mapping(MAPPING), batch_size=2)
+
+    rollup = db_session.query(DailyCategoryRollup).order_by(DailyCategoryRollup.day, DailyCategoryRollup.category).all()
+    snapshot = [(r.day, r.category, r.income, r.expense, r.count) for r in rollup]
+    rebuild_rollups(db_session.connection())
+    rebuilt = db_session.query(DailyCategoryRollup).order_by(DailyCategoryRollup.day, DailyCategoryRollup.category).all()
+    assert snapshot == [(r.day, r.category, r.income, r.expense, r.count) for r in rebuilt]
+    assert snapshot[0][1:] == ("餐饮", 0, 3751, 3)
+
+    results, total = SearchService.search(db_session, "面馆")
+    assert total == 1
+    assert len(TransactionService.get_transactions(db_session, tags="午餐")) == 1
+    assert get_data_version(db_session)[1] > version
+    # 变更日志覆盖全部交易，增量备份可以捕获批量导入的记录
+    assert db_session.execute(text(
+        "SELECT COUNT(*) FROM changed_rows WHERE table_name = 'transactions'"
+    )).scalar() == db_session.execute(text("SELECT COUNT(*) FROM transactions")).scalar()
+
+    # 暂停的触发器在导入后恢复，之后的逐条写入照常维护派生数据
+    triggers = set(db_session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    assert {"transactions_fts_ai", "transactions_rollup_ai", "transactions_version_ai", "transactions_changes_ai"} <= triggers
+    TransactionService.create_transaction(db_session, {"amount": "-1", "category": "餐饮", "notes": "面馆加蛋"})
+    assert SearchService.search(db_session, "面馆")[1] == 2
+
+
+def test_import_jsonl(tmp_path, db_session):
+    """测试导入JSON Lines，数值金额和无法解析的行"""
+    path = tmp_path / "transactions.jsonl"
+    lines = [
+        json.dumps({"amount": -0.1, "category": "餐饮", "created_at": "2023-10-01T08:00:00"}, ensure_ascii=False),
+        "",
+        "{not json",
+        json.dumps(["-1", "餐饮"]),
+        json.dumps({"amount": "100", "category": "奖金"}, ensure_ascii=False),
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    stats = ImportService.import_transactions(db_session, str(path), "jsonl")
+
+    assert stats["imported"] == 2
+    assert [line_no for line_no, _ in stats["errors"]] == [3, 4]
+    assert sorted(t.amount_minor for t in TransactionService.get_transactions(db_session)) == [-10, 10000]
+
+
+def test_import_skips_out_of_range_amount(tmp_path, db_session):
+    """测试超出64位整数范围的金额在逐行校验时跳过，不影响同批的其他行"""
+    path = tmp_path / "transactions.csv"
+    path.write_text(
+        "amount,category\n"
+        "-1,餐饮\n"
+        "100000000000000000,工资\n"
+        "-2,交通\n",
+        encoding="utf-8"
+    )
+
+    stats = ImportService.import_transactions(db_session, str(path), "csv")
+
+    assert stats["imported"] == 2
+    assert stats["errors"] == [(3, "金额超出可保存的范围")]
+    assert sorted(t.amount_minor for t in TransactionService.get_transactions(db_session)) == [-200, -100]
+
+
+def test_import_retries_failed_batch_row_by_row(csv_file, db_session):
+    """测试某一批因个别行写入失败时逐行重试，只跳过失败的行"""
+    original = ImportService._insert
+
+    def insert(db, rows):
+        if any(row["category"] == "工资" for row in rows):
+            raise OverflowError("Python int too large to convert to SQLite INTEGER")
+        original(db, rows)
+
+    with patch.object(ImportService, "_insert", side_effect=insert):
+        stats = ImportService.import_transactions(db_session, csv_file, "csv", ImportService.parse_mapping(MAPPING))
+
+    assert stats["imported"] == 2
+    assert stats["failed"] == 4
+    assert stats["errors"][-1] == (3, "写入失败: Python int too large to convert to SQLite INTEGER")
+    assert [t.category for t in TransactionService.get_transactions(db_session)] == ["餐饮", "餐饮"]
+
+
+def test_import_invalid_arguments(csv_file, db_session):
+    """测试导入参数校验"""
+    with pytest.raises(ValueError, match="导入文件不存在"):
+        ImportService.import_transactions(db_session, csv_file + ".missing")
+    with pytest.raises(ValueError, match="不支持的导入格式"):
+        ImportService.import_transactions(db_session, csv_file, "xlsx")
+    with pytest.raises(ValueError, match="导入文件缺少列: amount, category"):
+        ImportService.import_transactions(db_session, csv_file)
+    with pytest.raises(ValueError, match="列映射格式无效"):
+        ImportService.parse_mapping("amount")
+    with pytest.raises(ValueError, match="不支持导入的字段"):
+        ImportService.parse_mapping("todo_id=待办")
+
+
+def test_failed_batch_keeps_triggers(csv_file, db_session):
+    """测试批量写入失败回滚后，暂停的触发器仍然存在，之后的写入继续维护汇总"""
+    with patch('cashlog.models.bulk.add_rollup_rows', side_effect=RuntimeError("磁盘已满")):
+        with pytest.raises(RuntimeError):
+            ImportService.import_transactions(db_session, csv_file, "csv", ImportService.parse_mapping(MAPPING))
+
+    triggers = set(db_session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    assert set(SUSPENDED_TRIGGERS) <= triggers
+    assert db_session.execute(text("SELECT COUNT(*) FROM transactions")).scalar() == 0
+
+    TransactionService.create_transaction(db_session, {"amount": -15, "category": "餐饮", "created_at": "2023-10-03"})
+    rollup = db_session.query(DailyCategoryRollup).all()
+    assert [(row.category, row.expense, row.count) for row in rollup] == [("餐饮", 1500, 1)]
+    assert get_data_version(db_session)[1] == 1
@@ -0,0 +1,237 @@
+"""增量备份服务单元测试"""
+import gzip
+import json
+import os
+import sqlite3
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import init_db
+from cashlog.models.transaction import Transaction
+from cashlog.services.data_service import DataService
+from cashlog.services.incremental_service import MANIFEST_NAME, IncrementalBackupService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    """创建文件数据库，并让备份服务指向它"""
+    db_path = str(tmp_path / "cashlog.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    init_db(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    with patch('cashlog.services.data_service.DB_PATH', db_path), \
+         patch('cashlog.services.incremental_service.DB_PATH', db_path):
+        try:
+            yield db, db_path, str(tmp_path / "chain")
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def _snapshot(db_path):
+    """读取交易、待办、标签关联和汇总，用于比较两个数据库的内容"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            "transactions": conn.execute(
+                "SELECT id, amount_minor, category, tags, notes, created_at FROM transactions ORDER BY id").fetchall(),
+            "todos": conn.execute("SELECT id, content, status, transaction_id FROM todos ORDER BY id").fetchall(),
+            "tags": conn.execute(
+                "SELECT tt.transaction_id, t.name FROM transaction_tags tt JOIN tags t ON t.id = tt.tag_id "
+                "ORDER BY 1, 2").fetchall(),
+            "rollup": conn.execute(
+                "SELECT day, category, income, expense, count FROM daily_category_rollup ORDER BY 1, 2").fetchall(),
+            "search": conn.execute("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH '午餐便当'").fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+def test_first_backup_creates_base(ledger):
+    """测试首次增量备份创建基础备份和清单"""
+    db, db_path, chain_dir = ledger
+    TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+
+    result = IncrementalBackupService.backup(chain_dir)
+
+    assert result["kind"] == "base"
+    assert os.path.exists(result["path"])
+    points = IncrementalBackupService.describe(chain_dir)
+    assert [point["kind"] for point in points] == ["base"]
+    assert points[0]["size"] > 0
+
+
+def test_changeset_captures_only_changes(ledger):
+    """测试变更集只包含上次备份以来的新增、修改和删除"""
+    db, db_path, chain_dir = ledger
+    kept = TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+    edited = TransactionService.create_transaction(db, {"amount": -30, "category": "交通"})
+    removed = TransactionService.create_transaction(db, {"amount": 100, "category": "工资"})
+    IncrementalBackupService.backup(chain_dir)
+
+    # 基础备份之后没有变更时不写文件
+    assert IncrementalBackupService.backup(chain_dir)["kind"] is None
+
+    TransactionService.update_transaction(db, edited.id, {"notes": "打车"})
+    db.delete(db.get(Transaction, removed.id))
+    db.commit()
+    added = TransactionService.create_transaction(db, {"amount": -5, "category": "餐饮"})
+
+    result = IncrementalBackupService.backup(chain_dir)
+
+    assert result["kind"] == "changes"
+    with gzip.open(result["path"], "rt", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert entries[0] == {"op": "delete", "table": "transactions", "id": removed.id}
+    upserted = {entry["row"]["id"] for entry in entries if entry["op"] == "upsert"}
+    assert upserted == {edited.id, added.id}
+    assert result["deleted"] == 1
+    assert kept.id in {row[0] for row in _snapshot(db_path)["transactions"]}
+
+
+def test_changeset_ignores_clock(ledger):
+    """测试按变更序号捕获，修改时间早于上一个恢复点（时钟回拨、提交延迟）的写入也不会遗漏"""
+    db, db_path, chain_dir = ledger
+    TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+    IncrementalBackupService.backup(chain_dir)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO transactions (amount_minor, category, created_at, updated_at) "
+        "VALUES (-500, '交通', '2000-01-01 00:00:00', '2000-01-01 00:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+    result = IncrementalBackupService.backup(chain_dir)
+    assert (result["kind"], result["rows"]) == ("changes", 1)
+
+
+def test_new_base_prunes_tombstones(ledger, tmp_path):
+    """测试新的基础备份清理已包含的墓碑，落后的其他备份链需要重建"""
+    db, db_path, chain_dir = ledger
+    other_dir = str(tmp_path / "other")
+    removed = TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+    IncrementalBackupService.backup(other_dir)
+    db.delete(db.get(Transaction, removed.id))
+    db.commit()
+
+    IncrementalBackupService.backup(chain_dir)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM deleted_rows").fetchone()[0] == 0
+    conn.close()
+    assert IncrementalBackupService.backup(chain_dir)["kind"] is None
+    with pytest.raises(ValueError, match="--new-chain"):
+        IncrementalBackupService.backup(other_dir)
+
+
+def test_chain_from_old_version_requires_new_chain(ledger):
+    """测试旧版本按修改时间记录的备份链需要重建"""
+    db, db_path, chain_dir = ledger
+    IncrementalBackupService.backup(chain_dir)
+    manifest_path = os.path.join(chain_dir, MANIFEST_NAME)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    del manifest["base"]["change_seq"]
+    manifest["base"]["watermarks"] = {"transactions": None, "todos": None}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError, match="旧版本"):
+        IncrementalBackupService.backup(chain_dir)
+
+
+def test_materialize_replays_chain(ledger, tmp_path):
+    """测试重放备份链得到与源数据库一致的数据，包括标签、汇总和全文索引"""
+    db, db_path, chain_dir = ledger
+    first = TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮", "tags": "日常"})
+    todo = TodoService.create_todo(db, {"content": "报销", "category": "工作"})
+    IncrementalBackupService.backup(chain_dir)
+
+    TransactionService.update_transaction(db, first.id, {"tags": "日常,午餐", "notes": "公司午餐便当"})
+    TodoService.update_todo_status(db, todo.id, "done")
+    second = TransactionService.create_transaction(db, {"amount": 300, "category": "工资"})
+    IncrementalBackupService.backup(chain_dir)
+
+    db.delete(db.get(Transaction, second.id))
+    db.commit()
+    TransactionService.create_transaction(db, {"amount": -8, "category": "交通", "tags": "通勤"})
+    IncrementalBackupService.backup(chain_dir)
+
+    target = str(tmp_path / "restored.db")
+    result = IncrementalBackupService.materialize(chain_dir, target)
+
+    assert result["applied"] == 2
+    expected = _snapshot(db_path)
+    assert expected["search"] and len(expected["transactions"]) == 2
+    assert _snapshot(target) == expected
+    assert DataService._is_valid_sqlite_db(target)
+
+
+def test_materialize_until_point(ledger, tmp_path):
+    """测试按时间点只重放部分变更集"""
+    db, db_path, chain_dir = ledger
+    TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+    IncrementalBackupService.backup(chain_dir)
+    TransactionService.create_transaction(db, {"amount": -30, "category": "交通"})
+    IncrementalBackupService.backup(chain_dir)
+
+    # 将第二个恢复点的时间改到未来，按当前时间恢复时不应重放
+    manifest_path = os.path.join(chain_dir, MANIFEST_NAME)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["changesets"][0]["created_at"] = "2999-01-01 00:00:00"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    target = str(tmp_path / "restored.db")
+    result = IncrementalBackupService.materialize(chain_dir, target, until="2998-12-31")
+
+    assert result["applied"] == 0
+    assert len(_snapshot(target)["transactions"]) == 1
+    with pytest.raises(ValueError, match="早于基础备份"):
+        IncrementalBackupService.materialize(chain_dir, target, until="2000-01-01")
+    with pytest.raises(ValueError, match="无效的恢复时间点"):
+        IncrementalBackupService.materialize(chain_dir, target, until="昨天")
+
+
+def test_chain_rejects_other_database(ledger):
+    """测试数据库被恢复或更换后，需要新建备份链"""
+    db, db_path, chain_dir = ledger
+    IncrementalBackupService.backup(chain_dir)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE data_version SET token = 'other' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ValueError, match="--new-chain"):
+        IncrementalBackupService.backup(chain_dir)
+
+    result = IncrementalBackupService.backup(chain_dir, new_chain=True)
+    assert result["kind"] == "base"
+    assert sorted(os.listdir(chain_dir)) == sorted([MANIFEST_NAME, os.path.basename(result["path"])])
+
+
+def test_restore_from_chain(ledger):
+    """测试通过restore_backup从备份链恢复"""
+    db, db_path, chain_dir = ledger
+    TransactionService.create_transaction(db, {"amount": -20, "category": "餐饮"})
+    IncrementalBackupService.backup(chain_dir)
+    TransactionService.create_transaction(db, {"amount": -30, "category": "交通"})
+    IncrementalBackupService.backup(chain_dir)
+    expected = _snapshot(db_path)
+    db.close()
+
+    with patch('cashlog.services.data_service.DataService._rotate_data_token'), \
+         patch('cashlog.services.data_service.DataService._get_database_stats', return_value={}):
+        result = DataService.restore_backup(chain_dir, backup_current=False)
+
+    assert result["restored_point"]
+    assert _snapshot(db_path) == expected
+    with pytest.raises(ValueError, match="增量备份链"):
+        DataService.restore_backup(db_path, backup_current=False, until="2024-01-01")
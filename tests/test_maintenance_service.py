@@ -0,0 +1,119 @@
+"""数据库维护服务单元测试"""
+import sqlite3
+from unittest.mock import patch
+import pytest
+from cashlog.services.maintenance_service import MaintenanceService
+
+
+def _create_db(db_path, auto_vacuum="INCREMENTAL", wal=True):
+    """创建包含一张表的数据库，删除大部分记录以产生空闲页"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA auto_vacuum={auto_vacuum}")
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.execute("CREATE INDEX ix_items_payload ON items (payload)")
+    conn.executemany("INSERT INTO items (payload) VALUES (?)", [("x" * 500 + str(i),) for i in range(2000)])
+    conn.commit()
+    conn.execute("DELETE FROM items WHERE id > 100")
+    conn.commit()
+    conn.close()
+
+
+def _pragma(db_path, name):
+    """读取单个PRAGMA的值"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_optimize_runs_all_steps(tmp_path):
+    """测试依次执行各步骤并报告回收的空间"""
+    db_path = str(tmp_path / "cashlog.db")
+    _create_db(db_path)
+
+    results = MaintenanceService.optimize(db_path, vacuum_pages=0)
+
+    assert [result["step"] for result in results] == ["analyze", "vacuum", "checkpoint", "quick_check"]
+    assert all(result["status"] == "ok" for result in results)
+    steps = {result["step"]: result for result in results}
+    # ANALYZE 写入统计信息会占用少量空闲页，其余空闲页全部回收
+    assert steps["vacuum"]["reclaimed"] > 500 * _pragma(db_path, "page_size")
+    assert _pragma(db_path, "freelist_count") == 0
+    # 回收的页在检查点写回后才从文件中截掉，WAL同时被截断
+    assert steps["checkpoint"]["reclaimed"] > 0
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'items'").fetchone()[0] > 0
+    conn.close()
+
+
+def test_vacuum_respects_page_budget(tmp_path):
+    """测试每次最多回收指定的页数，计划任务模式分批回收结果一致"""
+    db_path = str(tmp_path / "cashlog.db")
+    _create_db(db_path)
+    page_size = _pragma(db_path, "page_size")
+
+    results = MaintenanceService.optimize(db_path, vacuum_pages=50)
+    assert results[1]["reclaimed"] == 50 * page_size
+    free_after = _pragma(db_path, "freelist_count")
+    assert free_after > 400
+
+    with patch('cashlog.services.maintenance_service.VACUUM_CHUNK_PAGES', 30), \
+         patch('cashlog.services.maintenance_service.YIELD_SECONDS', 0):
+        results = MaintenanceService.optimize(db_path, vacuum_pages=70, schedule=True)
+    assert results[1]["reclaimed"] == 70 * page_size
+    assert _pragma(db_path, "freelist_count") == free_after - 70
+
+
+def test_vacuum_requires_incremental_mode(tmp_path):
+    """测试未启用增量回收的数据库跳过回收，--enable-incremental-vacuum 切换模式"""
+    db_path = str(tmp_path / "cashlog.db")
+    _create_db(db_path, auto_vacuum="NONE", wal=False)
+
+    results = MaintenanceService.optimize(db_path)
+    steps = {result["step"]: result for result in results}
+    assert steps["vacuum"]["status"] == "skipped"
+    assert steps["checkpoint"]["status"] == "skipped"
+
+    results = MaintenanceService.optimize(db_path, enable_incremental_vacuum=True)
+    assert results[1]["status"] == "ok"
+    assert results[1]["reclaimed"] > 0
+    assert _pragma(db_path, "auto_vacuum") == 2
+
+    with pytest.raises(ValueError, match="计划任务模式"):
+        MaintenanceService.optimize(db_path, schedule=True, enable_incremental_vacuum=True)
+
+
+def test_schedule_yields_to_writer(tmp_path):
+    """测试计划任务模式下其他连接持有写锁时跳过需要写入的步骤，只读检查仍然执行"""
+    db_path = str(tmp_path / "cashlog.db")
+    _create_db(db_path)
+    free_before = _pragma(db_path, "freelist_count")
+
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO items (payload) VALUES ('pending')")
+    try:
+        with patch('cashlog.services.maintenance_service.YIELD_RETRIES', 2), \
+             patch('cashlog.services.maintenance_service.YIELD_SECONDS', 0):
+            results = MaintenanceService.optimize(db_path, schedule=True)
+    finally:
+        writer.execute("COMMIT")
+        writer.close()
+
+    steps = {result["step"]: result for result in results}
+    assert steps["analyze"]["status"] == "busy"
+    assert steps["vacuum"]["status"] == "busy"
+    assert steps["quick_check"]["status"] == "ok"
+    assert _pragma(db_path, "freelist_count") == free_before
+
+
+def test_quick_check_reports_errors():
+    """测试完整性检查失败时返回错误信息"""
+    class FakeConn:
+        def execute(self, sql):
+            return iter([("row 5 missing from index ix_items_payload",)])
+
+    assert MaintenanceService._quick_check(FakeConn()) == ("error", "row 5 missing from index ix_items_payload", 0)
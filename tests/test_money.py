@@ -0,0 +1,50 @@
+"""金额换算工具单元测试"""
+import pytest
+from decimal import Decimal
+from cashlog.utils.money import MAX_MINOR, format_minor, from_minor, to_minor
+
+
+def test_to_minor():
+    """测试元转换为分"""
+    assert to_minor("100.50") == 10050
+    assert to_minor(-0.1) == -10
+    assert to_minor(0.1 + 0.2) == 30
+    assert to_minor(Decimal("19.995")) == 2000
+    assert to_minor("-0.285") == -29
+    assert to_minor(12) == 1200
+
+
+@pytest.mark.parametrize("value", ["abc", "", None, "nan", "inf", True])
+def test_to_minor_invalid(value):
+    """测试无效金额"""
+    with pytest.raises(ValueError, match="金额需为数字"):
+        to_minor(value)
+
+
+@pytest.mark.parametrize("value", ["1e30", "-1e30", "100000000000000000", Decimal(MAX_MINOR + 1).scaleb(-2)])
+def test_to_minor_out_of_range(value):
+    """测试超出精度或64位整数范围的金额"""
+    with pytest.raises(ValueError, match="金额超出可保存的范围"):
+        to_minor(value)
+
+
+def test_to_minor_limit():
+    """测试64位整数范围的边界"""
+    assert to_minor(Decimal(MAX_MINOR).scaleb(-2)) == MAX_MINOR
+    assert to_minor(Decimal(-MAX_MINOR).scaleb(-2)) == -MAX_MINOR
+
+
+def test_from_minor():
+    """测试分转换为元"""
+    assert from_minor(10050) == 100.5
+    assert from_minor(-1) == -0.01
+    assert from_minor(None) is None
+
+
+def test_format_minor():
+    """测试分格式化为精确的金额字符串"""
+    assert format_minor(10050) == "100.50"
+    assert format_minor(-1) == "-0.01"
+    assert format_minor(0) == "0.00"
+    assert format_minor(to_minor("12345678901234.56")) == "12345678901234.56"
+    assert format_minor(None) is None
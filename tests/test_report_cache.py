@@ -0,0 +1,189 @@
+"""报表缓存单元测试"""
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.version import get_data_version
+from cashlog.services.report_cache import DEFAULT_MEMORY_SIZE, ReportCache, create_report_cache
+from cashlog.services.report_service import ReportService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """替换报表服务使用的缓存，避免测试之间互相影响"""
+    cache = ReportCache(memory_size=8)
+    monkeypatch.setattr("cashlog.services.report_service.report_cache", cache)
+    return cache
+
+
+def add(db_session, amount, category="餐饮", created_at="2023-12-05 12:00:00"):
+    """创建交易"""
+    TransactionService.create_transaction(db_session, {
+        "amount": amount, "category": category, "created_at": created_at
+    })
+
+
+def test_data_version_counts_writes(db_session):
+    """测试交易写入递增数据版本"""
+    token, version = get_data_version(db_session)
+    assert token is not None
+
+    add(db_session, "-10")
+    db_session.execute(text("UPDATE transactions SET category = '交通'"))
+    db_session.execute(text("DELETE FROM transactions"))
+    assert get_data_version(db_session) == (token, version + 3)
+
+
+def test_report_cache_hit_and_invalidation(db_session, cache):
+    """测试相同参数命中缓存，交易写入后自动失效"""
+    add(db_session, "-10")
+    first = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+    second = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+    assert second == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # 返回副本，调用方修改结果不影响缓存
+    second["total_expense"] = 0
+    assert ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")["total_expense"] == 10.0
+
+    add(db_session, "-5")
+    third = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+    assert third["total_expense"] == 15.0
+    assert cache.misses == 2
+
+    # 分类顺序不同视为相同查询；跳过缓存时不计入统计
+    ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31", ["交通", "餐饮"])
+    ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31", ["餐饮", "交通"])
+    ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31", use_cache=False)
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 3
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """测试内存层按最近使用淘汰"""
+    cache = ReportCache(memory_size=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.get("a")
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_shared_between_instances(tmp_path):
+    """测试磁盘层在不同缓存实例（多次CLI调用）之间共享"""
+    key = ReportCache.make_key("token", 1, "monthly", datetime(2023, 12, 1), datetime(2023, 12, 31, 23, 59, 59))
+    ReportCache(disk_dir=str(tmp_path)).put(key, {"total_income": 1.5, "category_stats": {"工资": {"income": 1.5}}})
+
+    other = ReportCache(disk_dir=str(tmp_path))
+    assert other.get(key) == {"total_income": 1.5, "category_stats": {"工资": {"income": 1.5}}}
+    assert other.stats()["disk_hits"] == 1
+
+    # 损坏的缓存文件视为未命中
+    (tmp_path / f"{key}.json").write_text("{", encoding="utf-8")
+    assert ReportCache(disk_dir=str(tmp_path)).get(key) is None
+
+    assert other.clear() == 1
+    assert other.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_prunes_old_files(tmp_path):
+    """测试磁盘层超出容量时删除旧文件"""
+    cache = ReportCache(memory_size=0, disk_dir=str(tmp_path), disk_size=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"key": key})
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_create_report_cache_from_settings(monkeypatch, tmp_path):
+    """测试通过环境变量配置缓存"""
+    monkeypatch.setenv("CASHLOG_REPORT_CACHE_SIZE", "4")
+    monkeypatch.setenv("CASHLOG_REPORT_CACHE_DIR", str(tmp_path))
+    cache = create_report_cache()
+    assert cache.memory_size == 4
+    assert cache.disk_dir == tmp_path
+
+    monkeypatch.setenv("CASHLOG_REPORT_CACHE_SIZE", "many")
+    with pytest.warns(RuntimeWarning, match="报表缓存容量配置无效"):
+        assert create_report_cache().memory_size == DEFAULT_MEMORY_SIZE
+
+
+def test_invalid_cache_size_does_not_break_import(tmp_path):
+    """测试容量配置无效时仍可导入报表命令并查看帮助"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, CASHLOG_REPORT_CACHE_SIZE="many",
+               CASHLOG_CONFIG=str(tmp_path / "missing.json"))
+    result = subprocess.run(
+        [sys.executable, "-c", "from cashlog.cli.main_cli import cli; cli(['report', '--help'])"],
+        env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0
+    assert "报表缓存容量配置无效" in result.stderr
+
+
+def test_hit_counters_shared_through_disk_tier(tmp_path):
+    """测试启用磁盘层时命中统计在各进程（缓存实例）之间累计"""
+    first = ReportCache(disk_dir=str(tmp_path))
+    first.put("a", {"v": 1})
+    assert first.get("a") == {"v": 1}
+    assert first.get("b") is None
+
+    other = ReportCache(disk_dir=str(tmp_path))
+    assert other.get("a") == {"v": 1}
+    stats = ReportCache(disk_dir=str(tmp_path)).stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"], stats["shared"]) == (2, 1, 1, True)
+    assert stats["disk_entries"] == 1
+
+    memory_only = ReportCache()
+    memory_only.get("a")
+    assert (memory_only.stats()["misses"], memory_only.stats()["shared"]) == (1, False)
+
+
+def test_restore_rotates_token(tmp_path, monkeypatch):
+    """测试恢复备份后生成新的实例令牌"""
+    from cashlog.services.data_service import DataService
+
+    db_path = tmp_path / "cashlog.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    backup_path = tmp_path / "backup.db"
+    backup_path.write_bytes(db_path.read_bytes())
+
+    def read_token():
+        conn = sqlite3.connect(str(db_path))
+        try:
+            return conn.execute("SELECT token FROM data_version").fetchone()[0]
+        finally:
+            conn.close()
+
+    before = read_token()
+    monkeypatch.setattr("cashlog.services.data_service.DB_PATH", db_path)
+    DataService.restore_backup(str(backup_path), backup_current=False)
+    assert read_token() != before
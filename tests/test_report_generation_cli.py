@@ -307,4 +307,84 @@ class TestReportCLI(CLITestBase):
             assert result.exit_code == 0
             mock_generate.assert_called_once()
             mock_format.assert_called_once()
-            mock_print.assert_called_once()
\ No newline at end of file
+            mock_print.assert_called_once()
+    def test_generate_report_no_cache(self):
+        """测试跳过报表缓存"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.report_service.ReportService.generate_report') as mock_generate, \
+             patch('cashlog.services.report_service.ReportService.format_report') as mock_format:
+
+            mock_generate.return_value = {"has_data": True, "period": "2023-12"}
+            mock_format.return_value = "月度报表"
+
+            result = self.runner.invoke(report, ['generate', '--no-cache'])
+
+            assert result.exit_code == 0
+            assert mock_generate.call_args.kwargs["use_cache"] is False
+
+    def test_cache_stats_and_clear(self):
+        """测试查看和清空报表缓存"""
+        with patch('cashlog.services.report_cache.ReportCache.stats') as mock_stats, \
+             patch('cashlog.services.report_cache.ReportCache.clear') as mock_clear:
+
+            mock_stats.return_value = {
+                "hits": 3, "disk_hits": 1, "misses": 1, "hit_rate": 0.75, "shared": False,
+                "memory_entries": 2, "memory_size": 128, "disk_dir": None, "disk_entries": 0
+            }
+            mock_clear.return_value = 5
+
+            result = self.runner.invoke(report, ['cache'])
+            assert result.exit_code == 0
+            assert '命中率: 75.0%（仅本次命令，未启用磁盘层）' in result.output
+            assert '磁盘层: 未启用' in result.output
+
+            result = self.runner.invoke(report, ['cache', '--clear'])
+            assert result.exit_code == 0
+            assert '删除 5 个磁盘缓存文件' in result.output
+
+    def test_series_csv(self):
+        """测试输出CSV格式的收支趋势"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.report_service.ReportService.generate_series') as mock_series, \
+             patch('cashlog.services.report_service.ReportService.format_series') as mock_format:
+
+            mock_series.return_value = {"periods": []}
+            mock_format.return_value = "period,income\n2023-12,100.00\n"
+
+            result = self.runner.invoke(report, ['series', '--weekly', '-n', '8', '--by-category', '--format', 'csv'])
+
+            assert result.exit_code == 0
+            assert result.output == "period,income\n2023-12,100.00\n"
+            args = mock_series.call_args.args
+            assert args[1:] == ("weekly", 8, None, True, None)
+
+    def test_pivot_csv(self):
+        """测试输出CSV格式的交叉报表"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.report_service.ReportService.iter_pivot') as mock_pivot:
+
+            mock_pivot.return_value = iter([("餐饮", [0.0, 12.5], 12.5), ("合计", [0.0, 12.5], 12.5)])
+
+            result = self.runner.invoke(report, [
+                'pivot', '--rows', 'category', '--cols', 'month', '--start', '2023-11-01', '--end', '2023-12-31',
+                '--value', 'expense', '--format', 'csv'
+            ])
+
+            assert result.exit_code == 0
+            assert result.output == "分类,2023-11,2023-12,合计\n餐饮,0.00,12.50,12.50\n合计,0.00,12.50,12.50\n"
+            args = mock_pivot.call_args.args
+            assert args[1:] == ("2023-11-01", "2023-12-31", "month", "expense", None)
+
+    def test_pivot_invalid_range(self):
+        """测试交叉报表日期无效时提示错误"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.utils.formatter.Formatter.print_error') as mock_print_error:
+
+            result = self.runner.invoke(report, ['pivot', '--start', '2023-12-31', '--end', '2023-11-01'])
+
+            assert result.exit_code == 0
+            mock_print_error.assert_called_once()
@@ -268,3 +268,255 @@ def test_format_report_with_custom_fields(sample_transactions, db_session):
     assert "餐饮:" in text_report
     assert "交易描述" not in text_report
     assert "待办 ID" not in text_report
+
+
+def test_generate_report_mixed_category(db_session):
+    """测试同一分类同时有收入和支出时的聚合结果"""
+    TransactionService.create_transaction(db_session, {
+        "amount": "300.00",
+        "category": "理财",
+        "created_at": "2023-12-02 10:00:00"
+    })
+    TransactionService.create_transaction(db_session, {
+        "amount": "-100.00",
+        "category": "理财",
+        "created_at": "2023-12-03 10:00:00"
+    })
+    TransactionService.create_transaction(db_session, {
+        "amount": "-300.00",
+        "category": "餐饮",
+        "created_at": "2023-12-04 10:00:00"
+    })
+
+    report_data = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+
+    stats = report_data["category_stats"]["理财"]
+    assert stats["income"] == 300.00
+    assert stats["expense"] == 100.00
+    assert stats["count"] == 2
+    assert stats["income_percentage"] == 100
+    assert stats["expense_percentage"] == 25
+    assert report_data["category_stats"]["餐饮"]["expense_percentage"] == 75
+    assert report_data["transaction_count"] == 3
+    assert report_data["balance"] == -100.00
+
+
+def test_generate_report_aggregates_in_sql(sample_transactions, db_session):
+    """测试当前周期统计通过GROUP BY聚合查询完成，不加载交易对象"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        ReportService._aggregate_by_category(
+            db_session, datetime(2023, 12, 1), datetime(2023, 12, 31, 23, 59, 59)
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert len(statements) == 1
+    assert "GROUP BY" in statements[0]
+    assert "sum(CASE" in statements[0]
+
+
+def test_generate_report_compares_periods_in_one_query(sample_transactions, db_session):
+    """测试当前周期和基准周期在同一条查询中聚合，结果与分别聚合一致"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        report_data = ReportService.generate_report(db_session, "monthly", start="2023-12-01", use_cache=False)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert len(statements) == 1
+    current = ReportService._aggregate_by_category(db_session, datetime(2023, 12, 1), datetime(2023, 12, 31, 23, 59, 59, 999999))
+    base = ReportService._aggregate_by_category(db_session, datetime(2023, 11, 1), datetime(2023, 11, 30, 23, 59, 59, 999999))
+    assert report_data["category_stats"] == current[0]
+    assert report_data["comparison"]["total_income"] == base[1] / 100
+    assert report_data["comparison"]["total_expense"] == base[2] / 100
+
+
+def test_aggregate_periods_on_raw_transactions(sample_transactions, db_session):
+    """测试非整天区间按交易明细条件聚合，分类只出现在有交易的区间中"""
+    current, base = ReportService._aggregate_periods(db_session, [
+        (datetime(2023, 12, 1, 12, 0), datetime(2023, 12, 31, 12, 0)),
+        (datetime(2023, 11, 1, 12, 0), datetime(2023, 11, 30, 12, 0)),
+    ], ["工资", "餐饮", "购物"])
+
+    assert set(current[0]) == {"餐饮", "购物"}
+    assert (current[1], current[2], current[3]) == (0, 300000, 2)
+    assert base == ReportService._aggregate_by_category(
+        db_session, datetime(2023, 11, 1, 12, 0), datetime(2023, 11, 30, 12, 0), ["工资", "餐饮", "购物"]
+    )
+
+
+def test_report_totals_are_exact(db_session):
+    """测试报表金额以整数分汇总，不产生浮点误差"""
+    for _ in range(10):
+        TransactionService.create_transaction(db_session, {
+            "amount": "0.10",
+            "category": "利息",
+            "created_at": "2023-12-01 10:00:00"
+        })
+    TransactionService.create_transaction(db_session, {
+        "amount": "-0.30",
+        "category": "手续费",
+        "created_at": "2023-12-02 10:00:00"
+    })
+
+    report_data = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+    assert report_data["total_income"] == 1.0
+    assert report_data["total_expense"] == 0.3
+    assert report_data["balance"] == 0.7
+    assert report_data["category_stats"]["利息"]["income"] == 1.0
+
+
+def test_generate_series_monthly(sample_transactions, db_session):
+    """测试按月时间序列，周期划分与环比一致"""
+    series = ReportService.generate_series(db_session, "monthly", 3, until="2023-12-15")
+
+    assert [item["period"] for item in series["periods"]] == ["2023-10", "2023-11", "2023-12"]
+    assert series["periods"][0]["transaction_count"] == 0
+    assert series["periods"][1]["total_income"] == 4500.0
+    assert series["periods"][2]["total_income"] == 6000.0
+    assert series["periods"][2]["total_expense"] == 3500.0
+    assert series["periods"][2]["balance"] == 2500.0
+    assert (series["periods"][2]["start"], series["periods"][2]["end"]) == ("2023-12-01", "2023-12-31")
+
+    # 与单次报表结果一致
+    report_data = ReportService.generate_report(db_session, "monthly", start="2023-12-01", use_cache=False)
+    assert series["periods"][2]["total_expense"] == report_data["total_expense"]
+    assert series["periods"][1]["total_income"] == report_data["comparison"]["total_income"]
+
+
+def test_generate_series_by_category_in_one_query(sample_transactions, db_session):
+    """测试按分类拆分的时间序列通过一次查询完成"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        series = ReportService.generate_series(
+            db_session, "quarterly", 2, categories=["工资", "餐饮"], by_category=True, until="2023-12-31"
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert len(statements) == 1
+    assert [item["period"] for item in series["periods"]] == ["2023-Q3", "2023-Q4"]
+    assert series["periods"][1]["category_stats"] == {
+        "工资": {"income": 9500.0, "expense": 0.0, "count": 2},
+        "餐饮": {"income": 0.0, "expense": 1000.0, "count": 1},
+    }
+
+
+def test_generate_series_invalid_arguments(db_session):
+    """测试时间序列参数校验"""
+    with pytest.raises(ValueError, match="不支持的时间维度"):
+        ReportService.generate_series(db_session, "custom")
+    with pytest.raises(ValueError, match="周期数量"):
+        ReportService.generate_series(db_session, "monthly", 0)
+    with pytest.raises(ValueError, match="日期格式"):
+        ReportService.generate_series(db_session, "monthly", 3, until="2023/12/01")
+
+
+def test_format_series(sample_transactions, db_session):
+    """测试时间序列的各种输出格式"""
+    import json
+
+    series = ReportService.generate_series(db_session, "monthly", 2, until="2023-12-01", by_category=True)
+
+    csv_output = ReportService.format_series(series, "csv")
+    assert csv_output.splitlines()[0] == "period,start,end,category,income,expense,balance,count"
+    assert "2023-12,2023-12-01,2023-12-31,餐饮,0.00,1000.00,-1000.00,1" in csv_output
+
+    assert json.loads(ReportService.format_series(series, "json")) == series
+    assert "| 周期 | 开始日期 | 结束日期 | 分类 |" in ReportService.format_series(series, "markdown")
+    assert "按月收支趋势（最近2期）" in ReportService.format_series(series, "text")
+
+
+def test_pivot_columns():
+    """测试交叉报表列的划分"""
+    assert ReportService.pivot_columns("2023-11-15", "2024-02-01", "month") == ["2023-11", "2023-12", "2024-01", "2024-02"]
+    assert ReportService.pivot_columns("2023-11-15", "2024-02-01", "quarter") == ["2023-Q4", "2024-Q1"]
+    assert ReportService.pivot_columns("2023-12-30", "2024-01-01", "year") == ["2023", "2024"]
+
+    with pytest.raises(ValueError, match="不支持的列维度"):
+        ReportService.pivot_columns("2023-11-01", "2023-12-31", "hour")
+    with pytest.raises(ValueError, match="列数超过"):
+        ReportService.pivot_columns("2020-01-01", "2023-12-31", "day")
+
+
+def test_iter_pivot_in_one_query(sample_transactions, db_session):
+    """测试交叉报表通过一次查询得到矩阵及行列合计"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        rows = list(ReportService.iter_pivot(db_session, "2023-11-01", "2023-12-31", "month", "net"))
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert len(statements) == 1
+    assert rows == [
+        ("交通", [0.0, -500.0], -500.0),
+        ("奖金", [0.0, 1000.0], 1000.0),
+        ("工资", [4500.0, 5000.0], 9500.0),
+        ("购物", [0.0, -2000.0], -2000.0),
+        ("餐饮", [0.0, -1000.0], -1000.0),
+        ("合计", [4500.0, 2500.0], 7000.0),
+    ]
+
+
+def test_iter_pivot_values_and_filter(sample_transactions, db_session):
+    """测试交叉报表的统计值和分类筛选"""
+    rows = list(ReportService.iter_pivot(db_session, "2023-10-01", "2023-12-31", "quarter", "count", ["工资", "餐饮"]))
+    assert rows == [("工资", [2], 2), ("餐饮", [1], 1), ("合计", [3], 3)]
+
+    rows = list(ReportService.iter_pivot(db_session, "2024-01-01", "2024-01-31", "month", "expense"))
+    assert rows == [("合计", [0.0], 0.0)]
+
+    with pytest.raises(ValueError, match="不支持的统计值"):
+        list(ReportService.iter_pivot(db_session, "2023-11-01", "2023-12-31", "month", "balance"))
+
+
+def test_format_pivot(sample_transactions, db_session):
+    """测试交叉报表的各种输出格式"""
+    columns = ReportService.pivot_columns("2023-11-01", "2023-12-31", "month")
+
+    def rows():
+        return ReportService.iter_pivot(db_session, "2023-11-01", "2023-12-31", "month", "expense", ["餐饮"])
+
+    csv_lines = list(ReportService.format_pivot(columns, rows(), "csv"))
+    assert csv_lines == ["分类,2023-11,2023-12,合计", "餐饮,0.00,1000.00,1000.00", "合计,0.00,1000.00,1000.00"]
+
+    markdown_lines = list(ReportService.format_pivot(columns, rows(), "markdown", "分类支出"))
+    assert markdown_lines[0] == "# 分类支出"
+    assert "| 餐饮 | 0.00 | 1000.00 | 1000.00 |" in markdown_lines
+
+    text_lines = list(ReportService.format_pivot(columns, rows(), "text"))
+    assert text_lines[0].split() == ["分类", "2023-11", "2023-12", "合计"]
+    assert text_lines[-1].split() == ["合计", "0.00", "1000.00", "1000.00"]
@@ -267,4 +267,109 @@ class TestTransactionAPI:
         data = response.json()
         assert data["page"] == 2
         assert len(data["items"]) == 1
-        assert data["items"][0]["amount"] == 100.0
\ No newline at end of file
+        assert data["items"][0]["amount"] == 100.0
+
+def test_list_pagination_runs_in_database(test_app):
+    """测试列表分页在数据库端通过LIMIT/OFFSET完成"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_execute)
+    try:
+        response = test_app.get("/api/transactions/?page=2&size=1")
+        todo_response = test_app.get("/api/todos/?page=1&size=2")
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_execute)
+
+    assert response.json()["total"] == 3
+    assert len(response.json()["items"]) == 1
+    assert todo_response.json()["total"] == 3
+    assert len(todo_response.json()["items"]) == 2
+
+    select_statements = [s for s in statements if "LIMIT" in s]
+    count_statements = [s for s in statements if "count(" in s]
+    assert any("FROM transactions" in s for s in select_statements)
+    assert any("FROM todos" in s for s in select_statements)
+    assert count_statements
+    assert all("ORDER BY" not in s for s in count_statements)
+
+
+def test_cursor_pagination(test_app):
+    """测试交易和待办事项的游标分页"""
+    response = test_app.get("/api/transactions/?limit=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["category"] for item in data["items"]] == ["购物", "餐饮"]
+    assert data["limit"] == 2
+    assert data["next_cursor"]
+
+    response = test_app.get(f"/api/transactions/?limit=2&cursor={data['next_cursor']}")
+    data = response.json()
+    assert [item["category"] for item in data["items"]] == ["工资"]
+    assert data["next_cursor"] is None
+
+    response = test_app.get("/api/todos/?limit=1&status=done")
+    data = response.json()
+    assert len(data["items"]) == 1
+    assert data["next_cursor"] is None
+
+    response = test_app.get("/api/todos/?cursor=invalid&limit=1")
+    assert response.status_code == 400
+
+
+def test_search_api(test_app):
+    """测试全文检索接口"""
+    response = test_app.get("/api/search/", params={"q": "购买衣服"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["kind"] == "transaction"
+    assert data["items"][0]["text"] == "购买衣服"
+
+    response = test_app.get("/api/search/", params={"q": "测试待办", "kind": "todo", "size": 2})
+    data = response.json()
+    assert data["total"] == 3
+    assert len(data["items"]) == 2
+    assert data["pages"] == 2
+
+    response = test_app.get("/api/search/", params={"q": "  "})
+    assert response.status_code == 400
+
+
+def test_report_series_api(test_app):
+    """测试收支趋势接口"""
+    response = test_app.get("/api/reports/series", params={"periods": 2, "until": "2023-12-31"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["period"] for item in data["periods"]] == ["2023-11", "2023-12"]
+    assert data["periods"][1]["total_income"] == 100.0
+    assert data["periods"][1]["total_expense"] == 250.0
+
+    response = test_app.get("/api/reports/series", params={"periods": 1, "until": "2023-12-31", "format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[1] == "2023-12,2023-12-01,2023-12-31,100.00,250.00,-150.00,3"
+
+    response = test_app.get("/api/reports/series", params={"until": "12/31"})
+    assert response.status_code == 400
+
+
+def test_report_cache_api(test_app, monkeypatch):
+    """测试报表缓存统计接口返回API服务进程的统计"""
+    from cashlog.services.report_cache import ReportCache
+
+    cache = ReportCache(memory_size=4)
+    monkeypatch.setattr("cashlog.api.report.report_cache", cache)
+    cache.put("a", {"v": 1})
+    cache.get("a")
+    cache.get("b")
+
+    response = test_app.get("/api/reports/cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["hits"], data["misses"], data["shared"], data["memory_entries"]) == (1, 1, False, 1)
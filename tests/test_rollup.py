@@ -0,0 +1,130 @@
+"""按日分类汇总单元测试"""
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, init_db
+from cashlog.models.rollup import DailyCategoryRollup, rebuild_rollups
+from cashlog.services.report_service import ReportService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def rollup_rows(db_session):
+    """读取全部汇总行"""
+    return {
+        (row.day, row.category): (row.income, row.expense, row.count)
+        for row in db_session.query(DailyCategoryRollup).all()
+    }
+
+
+def add(db_session, amount, category, created_at):
+    """创建交易"""
+    return TransactionService.create_transaction(db_session, {
+        "amount": amount, "category": category, "created_at": created_at
+    })
+
+
+def test_rollup_follows_writes(db_session):
+    """测试新增、修改、删除交易时汇总同步更新"""
+    lunch = add(db_session, "-30.50", "餐饮", "2023-12-01 12:00:00")
+    add(db_session, "-20", "餐饮", "2023-12-01 18:00:00")
+    add(db_session, "100", "红包", "2023-12-01 09:00:00")
+    assert rollup_rows(db_session) == {
+        (date(2023, 12, 1), "餐饮"): (0, 5050, 2),
+        (date(2023, 12, 1), "红包"): (10000, 0, 1),
+    }
+
+    # 修改金额、分类后旧汇总扣减，新汇总累加
+    TransactionService.update_transaction(db_session, lunch.id, {"amount": "-10", "category": "零食"})
+    assert rollup_rows(db_session) == {
+        (date(2023, 12, 1), "餐饮"): (0, 2000, 1),
+        (date(2023, 12, 1), "零食"): (0, 1000, 1),
+        (date(2023, 12, 1), "红包"): (10000, 0, 1),
+    }
+
+    # 删除后笔数归零的汇总行被移除
+    db_session.delete(lunch)
+    db_session.commit()
+    assert (date(2023, 12, 1), "零食") not in rollup_rows(db_session)
+
+
+def test_rebuild_rollups(db_session):
+    """测试全量重建汇总"""
+    add(db_session, "-30", "餐饮", "2023-12-01 12:00:00")
+    add(db_session, "-20", "餐饮", "2023-12-02 12:00:00")
+    expected = rollup_rows(db_session)
+
+    db_session.execute(text("DELETE FROM daily_category_rollup"))
+    assert rebuild_rollups(db_session.connection()) == 2
+    assert rollup_rows(db_session) == expected
+
+
+def test_report_reads_rollups_for_whole_days(db_session):
+    """测试整天区间的报表读取汇总表，结果与明细一致"""
+    add(db_session, "5000", "工资", "2023-12-01 10:00:00")
+    add(db_session, "-30", "餐饮", "2023-12-05 12:00:00")
+    add(db_session, "-70", "餐饮", "2023-12-31 23:59:59")
+    add(db_session, "-10", "餐饮", "2024-01-01 00:00:00")
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        report_data = ReportService.generate_report(db_session, "custom", "2023-12-01", "2023-12-31")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert report_data["total_income"] == 5000.0
+    assert report_data["total_expense"] == 100.0
+    assert report_data["transaction_count"] == 3
+    assert report_data["category_stats"]["餐饮"]["count"] == 2
+    assert statements and all("FROM transactions" not in statement for statement in statements)
+
+    # 非整天区间仍直接聚合交易表
+    _, total_income, total_expense, count = ReportService._aggregate_by_category(
+        db_session, datetime(2023, 12, 1, 11, 0), datetime(2023, 12, 31, 23, 59, 59)
+    )
+    assert (total_income, total_expense, count) == (0, 10000, 2)
+
+
+def test_init_db_builds_rollups_for_existing_data(tmp_path):
+    """测试升级时为已有交易生成汇总"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in ("transactions_rollup_ai", "transactions_rollup_ad", "transactions_rollup_au"):
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text(
+            "INSERT INTO transactions (amount_minor, category, created_at) "
+            "VALUES (-3000, '餐饮', '2023-12-01 12:00:00'), (-2000, '餐饮', '2023-12-01 18:00:00')"
+        ))
+
+    init_db(engine)
+    init_db(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT day, category, expense, count FROM daily_category_rollup")).all()
+    assert [tuple(row) for row in rows] == [("2023-12-01", "餐饮", 5000, 2)]
+    engine.dispose()
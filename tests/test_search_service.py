@@ -0,0 +1,179 @@
+"""全文检索服务单元测试"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, init_db
+from cashlog.models.search import DEFAULT_TOKENIZER, create_search_index, resolve_fts_tokenizer
+from cashlog.models.todo import Todo
+from cashlog.models.transaction import Transaction
+from cashlog.services.search_service import SearchService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session(monkeypatch):
+    """创建测试数据库会话"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def sample_records(db_session):
+    """创建测试交易和待办事项"""
+    lunch = Transaction(amount=-30, category="餐饮", notes="公司楼下吃牛肉拉面")
+    taxi = Transaction(amount=-45, category="交通", notes="打车去机场赶飞机")
+    todo = Todo(content="整理机场打车发票并报销", category="工作")
+    db_session.add_all([lunch, taxi, todo])
+    db_session.commit()
+    return lunch, taxi, todo
+
+
+def test_search_chinese_text(db_session, sample_records):
+    """测试trigram分词器检索中文备注和待办内容"""
+    lunch, taxi, todo = sample_records
+
+    results, total = SearchService.search(db_session, "牛肉拉面")
+    assert total == 1
+    assert results[0]["kind"] == "transaction"
+    assert results[0]["record"].id == lunch.id
+    assert "[牛肉拉面]" in results[0]["snippet"]
+
+    results, total = SearchService.search(db_session, "机场打车")
+    assert total == 1
+    assert results[0]["record"].id == todo.id
+
+
+def test_search_multiple_terms_and_kind(db_session, sample_records):
+    """测试多关键词需同时命中，以及按记录类型筛选"""
+    _, taxi, todo = sample_records
+
+    results, total = SearchService.search(db_session, "打车 机场")
+    assert total == 2
+    assert {(r["kind"], r["id"]) for r in results} == {("transaction", taxi.id), ("todo", todo.id)}
+
+    results, total = SearchService.search(db_session, "打车 机场", kind="todo")
+    assert [r["id"] for r in results] == [todo.id]
+
+    with pytest.raises(ValueError, match="无效的记录类型"):
+        SearchService.search(db_session, "打车", kind="report")
+
+
+def test_search_short_term_falls_back_to_like(db_session, sample_records):
+    """测试短于3个字符的关键词仍可检索"""
+    _, taxi, todo = sample_records
+    results, total = SearchService.search(db_session, "打车")
+    assert total == 2
+    assert {r["id"] for r in results if r["kind"] == "transaction"} == {taxi.id}
+
+
+def test_search_mixed_terms_keeps_ranking(db_session, sample_records):
+    """测试同时包含长词和短词时，长词通过全文索引排序，短词以LIKE过滤"""
+    lunch, taxi, _ = sample_records
+
+    results, total = SearchService.search(db_session, "餐饮 牛肉拉面")
+    assert total == 1
+    assert results[0]["id"] == lunch.id
+    assert results[0]["score"] != 0.0
+    assert "[牛肉拉面]" in results[0]["snippet"]
+
+    assert SearchService.search(db_session, "交通 牛肉拉面")[1] == 0
+    results, total = SearchService.search(db_session, "打车 去机场", kind="transaction")
+    assert [r["id"] for r in results] == [taxi.id]
+
+
+def test_search_pagination(db_session, sample_records):
+    """测试检索结果分页"""
+    page1, total = SearchService.search(db_session, "机场", limit=1)
+    page2, _ = SearchService.search(db_session, "机场", limit=1, offset=1)
+    assert total == 2
+    assert len(page1) == 1 and len(page2) == 1
+    assert (page1[0]["kind"], page1[0]["id"]) != (page2[0]["kind"], page2[0]["id"])
+
+
+def test_search_index_follows_updates_and_deletes(db_session, sample_records):
+    """测试触发器在更新和删除时同步全文索引"""
+    lunch, _, _ = sample_records
+    TransactionService.update_transaction(db_session, lunch.id, {"notes": "食堂吃麻辣香锅"})
+    assert SearchService.search(db_session, "牛肉拉面")[1] == 0
+    assert SearchService.search(db_session, "麻辣香锅")[1] == 1
+
+    # 绕过ORM直接删除，索引同样同步
+    db_session.execute(text("DELETE FROM transactions WHERE id = :id"), {"id": lunch.id})
+    assert SearchService.search(db_session, "麻辣香锅")[1] == 0
+
+
+def test_search_empty_query(db_session):
+    """测试空关键词"""
+    with pytest.raises(ValueError, match="搜索关键词不能为空"):
+        SearchService.search(db_session, "  ")
+
+
+def test_init_db_builds_index_for_existing_data(tmp_path, monkeypatch):
+    """测试升级时为已有数据建立全文索引，并在分词器变更时重建"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE transactions_fts"))
+        conn.execute(text("DROP TRIGGER transactions_fts_ai"))
+        conn.execute(text(
+            "INSERT INTO transactions (amount_minor, category, notes, created_at) "
+            "VALUES (-3000, '餐饮', '公司楼下吃牛肉拉面', '2023-12-01 12:00:00')"
+        ))
+
+    init_db(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    try:
+        assert SearchService.search(db, "牛肉拉面")[1] == 1
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        assert create_search_index(conn, "transaction", "unicode61") is True
+        assert create_search_index(conn, "transaction", "unicode61") is False
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'transactions_fts'")).scalar()
+    assert "unicode61" in sql
+    engine.dispose()
+
+
+def test_init_db_applies_tokenizer_change(tmp_path, monkeypatch):
+    """测试结构版本为最新时，分词器配置变更仍会触发索引重建"""
+    monkeypatch.delenv("CASHLOG_FTS_TOKENIZER", raising=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'cashlog.db'}")
+    init_db(engine)
+
+    monkeypatch.setenv("CASHLOG_FTS_TOKENIZER", "unicode61")
+    init_db(engine)
+
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'todos_fts'")).scalar()
+    assert "unicode61" in sql
+    engine.dispose()
+
+
+def test_invalid_tokenizer_falls_back(tmp_path, monkeypatch):
+    """测试分词器配置无效时给出警告并使用默认分词器，初始化数据库和检索不受影响"""
+    monkeypatch.setenv("CASHLOG_FTS_TOKENIZER", "jieba")
+    with pytest.warns(RuntimeWarning, match="未知的全文检索分词器"):
+        assert resolve_fts_tokenizer() == DEFAULT_TOKENIZER
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'cashlog.db'}")
+    with pytest.warns(RuntimeWarning):
+        init_db(engine)
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'todos_fts'")).scalar()
+    assert "trigram" in sql
+    engine.dispose()
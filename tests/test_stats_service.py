@@ -0,0 +1,73 @@
+"""数据库统计服务单元测试"""
+import sqlite3
+import pytest
+from cashlog.services.stats_service import StatsService
+
+
+@pytest.fixture
+def stats_db(tmp_path):
+    """创建包含普通表、索引、WITHOUT ROWID表和全文索引的数据库文件"""
+    db_path = str(tmp_path / "stats.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE INDEX ix_items_name ON items (name)")
+    conn.execute("CREATE TABLE pairs (a INTEGER, b INTEGER, PRIMARY KEY (a, b)) WITHOUT ROWID")
+    conn.execute("CREATE VIRTUAL TABLE items_fts USING fts5(name)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item {i}",) for i in range(500)])
+    conn.executemany("INSERT INTO pairs VALUES (?, ?)", [(i, i) for i in range(30)])
+    conn.execute("INSERT INTO items_fts (rowid, name) SELECT id, name FROM items")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_estimated_counts_match_append_only_tables(stats_db):
+    """测试只追加的表估算行数与准确行数一致"""
+    estimated = StatsService.get_row_counts(stats_db)
+    exact = StatsService.get_row_counts(stats_db, exact=True)
+
+    assert estimated["tables"]["items"] == exact["tables"]["items"] == 500
+    assert estimated["tables"]["items_fts"] == 500
+    # WITHOUT ROWID 表没有统计信息时累加叶子页记录数
+    assert estimated["tables"]["pairs"] == 30
+    assert "items" in estimated["estimated"]
+    assert exact["estimated"] == []
+
+
+def test_estimated_counts_after_delete(stats_db):
+    """测试删除记录后估算值为上界，--exact 给出准确值"""
+    conn = sqlite3.connect(stats_db)
+    conn.execute("DELETE FROM items WHERE id <= 100")
+    conn.commit()
+    conn.close()
+
+    assert StatsService.get_row_counts(stats_db)["tables"]["items"] == 500
+    assert StatsService.get_row_counts(stats_db, exact=True)["tables"]["items"] == 400
+
+
+def test_estimated_counts_use_stat1(stats_db):
+    """测试执行 ANALYZE 后 WITHOUT ROWID 表使用 sqlite_stat1 的行数"""
+    conn = sqlite3.connect(stats_db)
+    conn.execute("ANALYZE")
+    conn.execute("UPDATE sqlite_stat1 SET stat = '1234 1' WHERE tbl = 'pairs'")
+    conn.commit()
+    conn.close()
+
+    assert StatsService.get_row_counts(stats_db)["tables"]["pairs"] == 1234
+
+
+def test_object_sizes(stats_db):
+    """测试按表和索引统计占用空间，全文索引的内部表计入虚拟表"""
+    sizes = StatsService.get_object_sizes(stats_db)
+    objects = {obj["name"]: obj for obj in sizes["objects"]}
+
+    assert objects["ix_items_name"]["type"] == "index"
+    assert objects["ix_items_name"]["table"] == "items"
+    assert objects["ix_items_name"]["bytes"] == objects["ix_items_name"]["pages"] * sizes["page_size"]
+    assert objects["items_fts_data"]["table"] == "items_fts"
+    assert sum(obj["bytes"] for obj in sizes["objects"]) + sizes["free_bytes"] == sizes["file_size"]
+
+    grouped = {entry["table"]: entry for entry in StatsService.group_by_table(sizes["objects"])}
+    assert grouped["items"]["index_bytes"] == objects["ix_items_name"]["bytes"]
+    assert grouped["items_fts"]["table_bytes"] >= objects["items_fts_data"]["bytes"]
+    assert "items_fts_data" not in grouped
@@ -0,0 +1,166 @@
+"""标签服务单元测试"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, init_db
+from cashlog.models.tag import Tag
+from cashlog.models.todo import Todo
+from cashlog.services.transaction_service import TransactionService
+from cashlog.services.todo_service import TodoService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def tagged_transactions(db_session):
+    """创建带标签的交易"""
+    lunch = TransactionService.create_transaction(db_session, {
+        "amount": "-30", "category": "餐饮", "tags": "餐饮,午餐"
+    })
+    dinner = TransactionService.create_transaction(db_session, {
+        "amount": "-80", "category": "餐饮", "tags": "餐饮,晚餐,聚会"
+    })
+    meal = TransactionService.create_transaction(db_session, {
+        "amount": "-20", "category": "餐饮", "tags": "餐"
+    })
+    return lunch, dinner, meal
+
+
+def test_parse_tags():
+    """测试标签字符串解析"""
+    assert Tag.parse(" 餐饮, 午餐,,餐饮 ") == ["餐饮", "午餐"]
+    assert Tag.parse(None) == []
+    assert Tag.parse("") == []
+
+
+def test_create_transaction_links_tags(db_session, tagged_transactions):
+    """测试创建交易时建立标签关联，相同标签只保存一次"""
+    lunch, dinner, _ = tagged_transactions
+    assert sorted(tag.name for tag in lunch.tag_objects) == ["午餐", "餐饮"]
+    assert db_session.query(Tag).filter(Tag.name == "餐饮").count() == 1
+    assert db_session.execute(text("SELECT COUNT(*) FROM transaction_tags")).scalar() == 6
+
+
+def test_tag_filter_matches_whole_tags(db_session, tagged_transactions):
+    """测试标签筛选按完整标签匹配，不再匹配子串"""
+    _, _, meal = tagged_transactions
+    result = TransactionService.get_transactions(db_session, tags="餐")
+    assert [t.id for t in result] == [meal.id]
+
+
+def test_tag_filter_any_and_all(db_session, tagged_transactions):
+    """测试任一标签和全部标签两种匹配方式"""
+    lunch, dinner, _ = tagged_transactions
+
+    any_match = TransactionService.get_transactions(db_session, tags="午餐,晚餐")
+    assert {t.id for t in any_match} == {lunch.id, dinner.id}
+
+    all_match = TransactionService.get_transactions(db_session, tags="餐饮,聚会", tag_match="all")
+    assert [t.id for t in all_match] == [dinner.id]
+
+    with pytest.raises(ValueError, match="标签匹配方式无效"):
+        TransactionService.get_transactions(db_session, tags="餐饮", tag_match="some")
+
+
+def test_update_transaction_relinks_tags(db_session, tagged_transactions):
+    """测试更新交易标签后关联同步更新"""
+    lunch, _, _ = tagged_transactions
+    TransactionService.update_transaction(db_session, lunch.id, {"tags": "早餐"})
+
+    assert [t.id for t in TransactionService.get_transactions(db_session, tags="早餐")] == [lunch.id]
+    assert TransactionService.get_transactions(db_session, tags="午餐") == []
+
+
+def test_todo_tags_filter(db_session):
+    """测试待办事项标签筛选，包括同一次flush中新增的共享标签"""
+    db_session.add_all([
+        Todo(content="写报告", category="工作", tags="重要,紧急"),
+        Todo(content="买菜", category="生活", tags="紧急"),
+    ])
+    db_session.commit()
+
+    assert len(TodoService.get_todos(db_session, tags="紧急")) == 2
+    assert [t.content for t in TodoService.get_todos(db_session, tags="重要,紧急", tag_match="all")] == ["写报告"]
+    assert db_session.query(Tag).filter(Tag.name == "紧急").count() == 1
+
+
+def test_init_db_backfills_tag_links(tmp_path):
+    """测试升级时为历史记录回填标签关联"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO transactions (amount_minor, category, tags, created_at) "
+            "VALUES (-1000, '餐饮', '午餐,工作日', '2023-12-01 12:00:00'), (500000, '工资', NULL, '2023-12-01 09:00:00')"
+        ))
+        conn.execute(text(
+            "INSERT INTO todos (content, category, tags, status, created_at) "
+            "VALUES ('报销', '工作', '工作日', 'TODO', '2023-12-01 10:00:00')"
+        ))
+
+    init_db(engine)
+    init_db(engine)
+
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    try:
+        assert [t.category for t in TransactionService.get_transactions(db, tags="工作日")] == ["餐饮"]
+        assert [t.content for t in TodoService.get_todos(db, tags="工作日")] == ["报销"]
+        assert db.execute(text("SELECT COUNT(*) FROM transaction_tags")).scalar() == 2
+        assert db.execute(text("SELECT COUNT(*) FROM todo_tags")).scalar() == 1
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_delete_removes_tag_links(db_session):
+    """测试删除交易和待办事项时清理其标签关联，复用的ID不会带上旧标签"""
+    transaction = TransactionService.create_transaction(db_session, {"amount": -20, "category": "餐饮", "tags": "午餐"})
+    todo = TodoService.create_todo(db_session, {"content": "报销", "category": "工作", "tags": "工作日"})
+
+    # 分别覆盖不经过ORM的删除和ORM删除
+    db_session.execute(text("DELETE FROM transactions WHERE id = :id"), {"id": transaction.id})
+    db_session.expunge(transaction)
+    db_session.delete(todo)
+    db_session.commit()
+
+    assert db_session.execute(text("SELECT COUNT(*) FROM transaction_tags")).scalar() == 0
+    assert db_session.execute(text("SELECT COUNT(*) FROM todo_tags")).scalar() == 0
+    reused = TransactionService.create_transaction(db_session, {"amount": -5, "category": "交通"})
+    assert reused.id == transaction.id
+    assert TransactionService.get_transactions(db_session, tags="午餐") == []
+
+
+def test_init_db_removes_orphan_tag_links(tmp_path):
+    """测试升级时删除所属记录已不存在的标签关联"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER transactions_tags_ad"))
+        conn.execute(text("INSERT INTO tags (name) VALUES ('午餐')"))
+        conn.execute(text("INSERT INTO transaction_tags (transaction_id, tag_id) VALUES (42, 1)"))
+
+    init_db(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM transaction_tags")).scalar() == 0
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'transactions_tags_ad'"
+        )).scalar() == 1
+    engine.dispose()
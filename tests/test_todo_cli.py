@@ -247,6 +247,36 @@ class TestTodoCLI(CLITestBase):
             mock_get.assert_called_once()
             mock_format.assert_called_once()
     
+    def test_list_todos_output_jsonl(self):
+        """测试以JSON Lines格式列出待办事项"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.todo_service.TodoService.iter_todos') as mock_iter, \
+             patch('cashlog.services.todo_service.TodoService.get_todos') as mock_get:
+            
+            # 模拟返回的数据
+            mock_todo = MagicMock()
+            mock_todo.id = 2
+            mock_todo.content = "报销"
+            mock_todo.category = "工作"
+            mock_todo.status.value = "doing"
+            mock_todo.tags = None
+            mock_todo.deadline = None
+            mock_todo.transaction_id = None
+            mock_todo.created_at = None
+            mock_todo.updated_at = None
+            mock_iter.return_value = iter([mock_todo])
+            
+            # 执行CLI命令
+            result = self.runner.invoke(todo, ['list', '-s', 'doing', '--output', 'jsonl'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert result.output.startswith('{"id": 2, "content": "报销"')
+            assert '"status": "doing"' in result.output
+            assert mock_iter.call_args[1]["status"] == "doing"
+            mock_get.assert_not_called()
+    
     def test_list_todos_with_filters(self):
         """测试带筛选条件列出待办事项"""
         with self.mock_db_dependency() as mock_get_db, \
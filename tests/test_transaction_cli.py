@@ -1,5 +1,6 @@
 """交易CLI命令单元测试"""
 import pytest
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
 from cashlog.cli.transaction_cli import transaction
@@ -119,6 +120,117 @@ class TestTransactionCLI(CLITestBase):
             assert result.exit_code == 0
             mock_get.assert_called_once()
     
+    def test_list_transactions_with_cursor(self):
+        """测试游标分页列出交易记录"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.transaction_service.TransactionService.get_transactions_page') as mock_page:
+            
+            # 模拟返回的数据
+            mock_page.return_value = ([], "next-cursor")
+            
+            # 执行CLI命令
+            result = self.runner.invoke(transaction, ['list', '--limit', '10', '--after-cursor', 'abc'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert '下一页游标: next-cursor' in result.output
+            assert mock_page.call_args[0][1:] == ('abc', 10)
+    
+    def test_list_transactions_stream(self):
+        """测试流式列出交易记录"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.transaction_service.TransactionService.iter_transactions') as mock_iter, \
+             patch('cashlog.services.transaction_service.TransactionService.get_transactions') as mock_get:
+            
+            # 模拟返回的数据
+            mock_transaction = MagicMock()
+            mock_transaction.id = 3
+            mock_transaction.amount = -12.5
+            mock_transaction.transaction_type = "支出"
+            mock_transaction.category = "餐饮"
+            mock_transaction.tags = None
+            mock_transaction.notes = "午餐"
+            mock_transaction.created_at = None
+            mock_iter.return_value = iter([mock_transaction])
+            
+            # 执行CLI命令
+            result = self.runner.invoke(transaction, ['list', '--offset', '20', '--limit', '10', '-c', '餐饮'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert mock_iter.call_args[0][1:] == (20, 10)
+            assert mock_iter.call_args[1]["category"] == "餐饮"
+            assert "-12.50" in result.output and "午餐" in result.output
+            assert '共输出 1 条记录' in result.output
+            mock_get.assert_not_called()
+    
+    def test_list_transactions_stream_with_cursor(self):
+        """测试流式输出不能与游标分页同时使用"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.transaction_service.TransactionService.iter_transactions') as mock_iter:
+            
+            # 执行CLI命令
+            result = self.runner.invoke(transaction, ['list', '--stream', '--after-cursor', 'abc'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert '流式输出不能与游标分页同时使用' in result.output
+            mock_iter.assert_not_called()
+    
+    def test_list_transactions_output_csv(self):
+        """测试以CSV格式列出交易记录，标准输出只包含数据"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.transaction_service.TransactionService.iter_transactions') as mock_iter:
+            
+            # 模拟返回的数据
+            mock_transaction = MagicMock()
+            mock_transaction.id = 3
+            mock_transaction.amount_minor = -1250
+            mock_transaction.category = "餐饮"
+            mock_transaction.tags = None
+            mock_transaction.notes = "午餐"
+            mock_transaction.created_at = datetime(2023, 10, 1, 12, 0, 0)
+            mock_transaction.updated_at = None
+            mock_iter.return_value = iter([mock_transaction])
+            
+            # 执行CLI命令
+            result = self.runner.invoke(transaction, ['list', '-c', '餐饮', '--output', 'csv'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert result.output == (
+                "id,amount,type,category,tags,notes,created_at,updated_at\n"
+                "3,-12.50,expense,餐饮,,午餐,2023-10-01T12:00:00,\n"
+            )
+    
+    def test_import_transactions(self):
+        """测试批量导入交易记录并报告错误行"""
+        with self.mock_db_dependency() as mock_get_db, \
+             self.mock_init_db() as mock_init_db, \
+             patch('cashlog.services.import_service.ImportService.import_transactions') as mock_import:
+            
+            # 模拟返回的导入统计
+            mock_import.return_value = {
+                "total": 3, "imported": 2, "failed": 1, "errors": [(3, "金额需为数字")],
+                "elapsed": 0.5, "rate": 4.0
+            }
+            
+            # 执行CLI命令
+            result = self.runner.invoke(transaction, ['import', 'bank.csv', '--map', 'amount=金额', '--batch-size', '100'])
+            
+            # 验证结果
+            assert result.exit_code == 0
+            assert '成功 2 行，失败 1 行' in result.output
+            assert '第 3 行: 金额需为数字' in result.output
+            args = mock_import.call_args[0]
+            assert args[1:3] == ('bank.csv', 'csv')
+            assert args[3]["amount"] == "金额"
+            assert args[4] == 100
+    
     def test_update_transaction_success(self):
         """测试成功更新交易记录"""
         with self.mock_db_dependency() as mock_get_db, \
@@ -174,3 +174,122 @@ def test_get_transaction_by_id(db_session):
     # 查询不存在的ID
     not_found = TransactionService.get_transaction_by_id(db_session, 999)
     assert not_found is None
+
+
+def test_get_transactions_page_walks_all_rows(db_session):
+    """测试游标分页可以不重不漏地遍历全部交易"""
+    # 同一时间的多条交易，依靠ID保证顺序稳定
+    for i in range(7):
+        TransactionService.create_transaction(db_session, {
+            "amount": str(-10 - i),
+            "category": "餐饮",
+            "created_at": "2023-10-01 12:00:00" if i < 4 else f"2023-10-0{i} 12:00:00"
+        })
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = TransactionService.get_transactions_page(db_session, cursor, 3)
+        assert len(page) <= 3
+        seen.extend(t.id for t in page)
+        if cursor is None:
+            break
+
+    expected = [t.id for t in TransactionService.get_transactions(db_session)]
+    assert seen == expected
+    assert len(set(seen)) == 7
+
+
+def test_get_transactions_page_invalid_cursor(db_session):
+    """测试无效游标"""
+    with pytest.raises(ValueError, match="游标无效"):
+        TransactionService.get_transactions_page(db_session, "not-a-cursor", 10)
+
+
+def test_iter_transactions_offset_and_limit(db_session):
+    """测试流式查询按批读取，并支持offset和limit"""
+    for i in range(7):
+        TransactionService.create_transaction(db_session, {
+            "amount": str(-10 - i),
+            "category": "餐饮" if i % 2 else "交通",
+            "created_at": f"2023-10-0{i + 1} 12:00:00"
+        })
+    expected = [t.id for t in TransactionService.get_transactions(db_session)]
+
+    assert [t.id for t in TransactionService.iter_transactions(db_session, batch_size=2)] == expected
+    assert [t.id for t in TransactionService.iter_transactions(db_session, 2, 3, batch_size=2)] == expected[2:5]
+    assert [t.id for t in TransactionService.iter_transactions(db_session, 6)] == expected[6:]
+    assert len(list(TransactionService.iter_transactions(db_session, category="餐饮"))) == 3
+
+    with pytest.raises(ValueError, match="不能为负数"):
+        TransactionService.iter_transactions(db_session, -1)
+    with pytest.raises(ValueError, match="月份格式"):
+        TransactionService.iter_transactions(db_session, month="2023/10")
+
+
+def test_iter_transactions_with_todos(db_session):
+    """测试流式查询按批次加载关联的待办事项"""
+    from cashlog.models.todo import Todo
+    from sqlalchemy import event
+
+    for i in range(4):
+        transaction = TransactionService.create_transaction(db_session, {"amount": "-10", "category": "餐饮"})
+        if i % 2:
+            db_session.add(Todo(content=f"待办{i}", category="日常", transaction_id=transaction.id))
+    db_session.commit()
+    db_session.expire_all()
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        linked = [t.todo.content for t in TransactionService.iter_transactions(db_session, with_todos=True) if t.todo]
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert sorted(linked) == ["待办1", "待办3"]
+    assert len(statements) == 2
+
+
+def test_amount_stored_as_minor_units(db_session):
+    """测试金额以整数分保存，按元读写"""
+    transaction = TransactionService.create_transaction(db_session, {"amount": "-19.99", "category": "餐饮"})
+    assert transaction.amount_minor == -1999
+    assert transaction.amount == -19.99
+
+    TransactionService.update_transaction(db_session, transaction.id, {"amount": 0.1 + 0.2})
+    assert transaction.amount_minor == 30
+
+    assert db_session.query(Transaction).filter(Transaction.amount > 0.25).count() == 1
+
+
+def test_init_db_converts_float_amounts(tmp_path):
+    """测试升级时将历史浮点金额转换为整数分"""
+    from sqlalchemy import text, inspect
+    from cashlog.models.db import init_db
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER NOT NULL PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, tags VARCHAR(200), notes TEXT, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions (amount, category, created_at) VALUES "
+            "(0.1, '利息', '2023-12-01 10:00:00'), (0.2, '利息', '2023-12-02 10:00:00'), "
+            "(-19.99, '餐饮', '2023-12-03 10:00:00')"
+        ))
+
+    init_db(engine)
+    init_db(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("transactions")}
+    assert "amount" not in columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT amount_minor FROM transactions ORDER BY id")).scalars().all() == [10, 20, -1999]
+    engine.dispose()
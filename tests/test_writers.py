@@ -0,0 +1,101 @@
+"""机器可读记录输出单元测试"""
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.todo import Todo
+from cashlog.services.transaction_service import TransactionService
+from cashlog.services.todo_service import TodoService
+from cashlog.utils.writers import (
+    TODO_FIELDS, TRANSACTION_FIELDS, todo_record, transaction_record, write_records
+)
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def records(db_session):
+    """创建测试交易并转换为记录"""
+    TransactionService.create_transaction(db_session, {
+        "amount": "-0.30", "category": "餐饮", "notes": "咖啡,\t外带", "created_at": "2023-10-01 08:00:00"
+    })
+    TransactionService.create_transaction(db_session, {
+        "amount": "5000", "category": "工资", "tags": "固定", "created_at": "2023-10-02 09:30:00"
+    })
+    return [transaction_record(t) for t in TransactionService.iter_transactions(db_session)]
+
+
+def test_transaction_record(records):
+    """测试交易记录只含基本类型且金额精确"""
+    assert [r["type"] for r in records] == ["income", "expense"]
+    assert str(records[1]["amount"]) == "-0.30"
+    assert records[1]["created_at"] == datetime(2023, 10, 1, 8, 0, 0)
+
+
+def test_write_json_and_jsonl(records):
+    """测试JSON和JSON Lines输出"""
+    output = io.StringIO()
+    assert write_records(records, TRANSACTION_FIELDS, "json", output) == 2
+    data = json.loads(output.getvalue())
+    assert data[1]["amount"] == -0.3
+    assert data[1]["created_at"] == "2023-10-01T08:00:00"
+    assert list(data[0].keys()) == TRANSACTION_FIELDS
+
+    output = io.StringIO()
+    write_records(records, ["id", "amount"], "jsonl", output)
+    lines = output.getvalue().splitlines()
+    assert [json.loads(line)["amount"] for line in lines] == [5000, -0.3]
+
+    output = io.StringIO()
+    assert write_records([], TRANSACTION_FIELDS, "json", output) == 0
+    assert json.loads(output.getvalue()) == []
+
+
+@pytest.mark.parametrize("output_format, delimiter", [("csv", ","), ("tsv", "\t")])
+def test_write_csv_and_tsv(records, output_format, delimiter):
+    """测试CSV和TSV输出，特殊字符按规则转义"""
+    output = io.StringIO()
+    write_records(records, TRANSACTION_FIELDS, output_format, output)
+    rows = list(csv.reader(io.StringIO(output.getvalue()), delimiter=delimiter))
+    assert rows[0] == TRANSACTION_FIELDS
+    assert rows[1][1] == "5000.00"
+    assert rows[2][1:7] == ["-0.30", "expense", "餐饮", "", "咖啡,\t外带", "2023-10-01T08:00:00"]
+
+
+def test_write_records_invalid_format(records):
+    """测试不支持的输出格式"""
+    with pytest.raises(ValueError, match="不支持的输出格式"):
+        write_records(records, TRANSACTION_FIELDS, "xml")
+
+
+def test_todo_record(db_session):
+    """测试待办事项记录"""
+    db_session.add(Todo(content="报销", category="工作", deadline=datetime(2023, 10, 31, 18, 0, 0)))
+    db_session.commit()
+
+    output = io.StringIO()
+    write_records((todo_record(t) for t in TodoService.iter_todos(db_session)), TODO_FIELDS, "jsonl", output)
+    record = json.loads(output.getvalue())
+    assert record["status"] == "todo"
+    assert record["deadline"] == "2023-10-31T18:00:00"
+    assert record["transaction_id"] is None